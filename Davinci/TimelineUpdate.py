@@ -9,6 +9,11 @@ from datetime import datetime
 from tkinter import filedialog
 import re
 
+# version_scan.py sits next to this script
+if '__file__' in globals():
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import version_scan
+
 
 #USER EDITABLE VARIABLES:
 VERSION_PREFIX = "v"
@@ -48,38 +53,35 @@ def find_newest_version_path(input_path):
     # Ensure there are no empty elements in path_components
     path_components = [component for component in path_components if component]
 
-    # Find the index of the grandparent directory in the path
-    grandparent_directory_index = len(path_components) - 3
-
     # Construct the path to the grandparent directory
-    grandparent_directory_path = os.path.join(*path_components[:grandparent_directory_index + 1])
-
-    # List all files and directories in the grandparent directory
-    files_in_grandparent_directory = os.listdir(grandparent_directory_path)
+    grandparent_directory_path = version_scan.grandparent_directory(input_path)
 
-    # Extract the version prefix from the path¨
+    # Extract the version prefix and number from the path
     version_file = path_components[-2]
-    version_file_prefix = version_file[:-3]  # Exclude the version number from the path
-    
-    # Filter files in the grandparent directory that match the version prefix
-    matching_versions = [filename for filename in files_in_grandparent_directory if filename.startswith(version_file_prefix)]
+    current_version = version_scan.split_version(version_file)
+    if current_version is None:
+        return None
+    version_file_prefix, _, version_digits = current_version
+
+    # Index the version folders in the grandparent directory by number (listed once per run)
+    version_index = version_scan.version_folder_index(grandparent_directory_path, version_file_prefix)
 
     # If there are matching versions, find the newest one
-    if matching_versions:
-        if "v" in matching_versions[0]:
-            newest_version = max(matching_versions)
-            print("VERSIONS: ", matching_versions)
+    if len(version_index):
+        if "v" in version_file_prefix.lower():
+            newest_version = version_index.newest().name
+            print("VERSIONS: ", [entry.name for entry in version_index.entries])
             # Update the version in the last part of the path
             file_name_parts = path_components[-1].split("_v")
         
         
 
             if ".exr" in path_components[-1]: #Checks if .exr
-                file_name_parts[-1] = newest_version + "." + transform_filename(file_name_parts[-1][4:])
+                file_name_parts[-1] = newest_version + "." + transform_filename(file_name_parts[-1][len(version_digits) + 1:])
                 path_components[-1] = "_".join(file_name_parts)
                 print("true")
             else:
-                file_name_parts[-1] = newest_version + file_name_parts[-1][3:] #file_name_parts[-1] = newest_version + "_" + file_name_parts[-1].split("_", 1)[-1]
+                file_name_parts[-1] = newest_version + file_name_parts[-1][len(version_digits):] #file_name_parts[-1] = newest_version + "_" + file_name_parts[-1].split("_", 1)[-1]
                 path_components[-1] = "_".join(file_name_parts)
 
             # Construct the path to the newest version
@@ -93,21 +95,6 @@ def find_newest_version_path(input_path):
 
 
 
-def extract_version(base_name):
-    # Regular expression pattern to match version number
-    pattern = r'_v(\d+)$'
-
-#Search for the pattern in the base name
-    match = re.search(pattern, base_name)
-
-    if match:
-        version_number = match.group(1)
-        print("Version number:", version_number)
-        return version_number
-    else:
-        print("No version number found")
-
-
 def find_newest_version_in_folder(file_path):
     # Split the provided file path into folder path and file name
     folder_path, file_name = os.path.split(file_path)
@@ -118,34 +105,15 @@ def find_newest_version_in_folder(file_path):
 #Extract the part of the base name before "_v"
     new_base_name = base_name.split('_v')[0]
     print(base_name, "   ", new_base_name)
-    # Initialize the highest version number found
-    highest_version = 0
-
-    # Iterate through files in the folder
-    for file in os.listdir(folder_path):
-        # Check if the new base name is contained in the file name
-        if new_base_name in file:
-            print(file)
-            file_name, extension = os.path.splitext(file)
-            try:
-                # Extract the version number from the file name
-                version = int(extract_version(file_name))
-                # Update the highest version number if a higher version is found
-                print(version)
-                if version > highest_version:
-                    highest_version = version
-                    print("true")
-                    
-            except ValueError:
-                # If the file name does not contain a valid version number, skip it
-                pass
-    print(highest_version)
-    # If a higher version is found, construct the file path and return it
-    if highest_version > 0:
-        newest_file_path = os.path.join(folder_path, f"{new_base_name}_v{highest_version}{extension}")
-        print(newest_file_path)
-        if os.path.exists(newest_file_path):
-            return newest_file_path
+
+    # Index the files in the folder that contain the base name by their _v<number> (any padding)
+    version_index = version_scan.version_file_index(folder_path, new_base_name, extension)
+    newest = version_index.newest()
+
+    # If a version is found, return the path of the newest file
+    if newest is not None and newest.number > 0:
+        print(newest.path)
+        return newest.path
 
     # If no higher version is found, return None
     return None
@@ -156,16 +124,25 @@ def transform_filename(filename):
     print(first_number + file_type)
     return first_number + file_type
 
-def replace_one_clip(item):
+def find_newest_clip_path(item_path):
+    # Plain path lookup, no Resolve API calls, so it can run on a worker thread
+    new_file_path = find_newest_version_path(item_path)
+    if new_file_path == None:
+        new_file_path = find_newest_version_in_folder(item_path)
+    return new_file_path
+
+def replace_one_clip(item, new_file_path=None):
         print("ITEM: ", item)
         print("ITEM NAME: ", item.GetClipProperty("Clip Name"))
         item_path = item.GetClipProperty("File Path")
         print("PATH: ", item_path)
         
         # Turn path to absolute path
-        new_file_path = find_newest_version_path(item_path)
         if new_file_path == None:
-            new_file_path = find_newest_version_in_folder(item_path)
+            new_file_path = find_newest_clip_path(item_path)
+        if new_file_path == None:
+            print("No newest version found for: ", item_path)
+            return False
         
         new_file_name = os.path.basename(new_file_path)
         new_file_path_raw = new_file_path.replace("\\", "\\")
@@ -213,7 +190,7 @@ def list_clips_in_folder(folder):
     
 
 
-def create_update_window():
+def create_update_window(details=""):
     # Create the main window
     window = tk.Tk()
     window.title("Update Status")
@@ -224,6 +201,11 @@ def create_update_window():
     # Pack the label into the window
     label.pack(padx=20, pady=20)
 
+    # Show how many clips were changed, already up to date or not found
+    if details:
+        details_label = tk.Label(window, text=details)
+        details_label.pack(padx=20, pady=(0, 20))
+
 
     # Run the Tkinter event loop
     window.mainloop()
@@ -235,23 +217,55 @@ def traverse_folders(folder):
     for subfolder in folder.GetSubFolderList():
         traverse_folders(subfolder)
 
+def update_clips(items):
+    # Phase 1: find the newest path of every clip concurrently (plain file system work)
+    item_paths = [item.GetClipProperty("File Path") for item in items]
+    print("Directories listed: ", version_scan.prefetch_listings(item_paths))
+    newest_paths = version_scan.resolve_paths(item_paths, find_newest_clip_path)
+
+    # Phase 2: replace only the clips whose newest version differs from the loaded one,
+    # one by one through the Resolve API, on this thread
+    results = []
+    counts = {"changed": 0, "unchanged": 0, "unresolvable": 0}
+    for item, item_path in zip(items, item_paths):
+        new_file_path = newest_paths.get(item_path)
+        if new_file_path == None:
+            print("No newest version found for: ", item_path)
+            counts["unresolvable"] += 1
+            results.append(False)
+        elif version_scan.is_current_path(item_path, new_file_path):
+            print("Already newest version: ", item_path)
+            counts["unchanged"] += 1
+            results.append(False)
+        else:
+            counts["changed"] += 1
+            results.append(replace_one_clip(item, new_file_path))
+    print("CLIPS CHANGED: ", counts["changed"], "UNCHANGED: ", counts["unchanged"], "UNRESOLVABLE: ", counts["unresolvable"])
+    return results, counts
+
+def format_counts(counts):
+    return f"Changed: {counts['changed']}  Unchanged: {counts['unchanged']}  Unresolvable: {counts['unresolvable']}"
+
 def update_all():
+    version_scan.clear_listing_cache()
+    all_clips.clear()
     traverse_folders(rootFolder)
-    for item in all_clips:
-        if is_audio_video(item):
-            replace_one_clip(item)
-    create_update_window()
+    results, counts = update_clips([item for item in all_clips if is_audio_video(item)])
+    version_scan.save_disk_cache()
+    create_update_window(format_counts(counts))
 
 # Function for updating all mediapool items in folder
 def update_folder():
+    version_scan.clear_listing_cache()
     getcurrentfolder = mediapool.GetCurrentFolder()
-    for item in getcurrentfolder.GetClipList():
-        if is_audio_video(item):
-            replace_one_clip(item)
-    create_update_window()
+    results, counts = update_clips([item for item in getcurrentfolder.GetClipList() if is_audio_video(item)])
+    version_scan.save_disk_cache()
+    create_update_window(format_counts(counts))
 
 def update_timeline():
+    version_scan.clear_listing_cache()
     current_timeline = getproject.GetCurrentTimeline()
+    items_to_update = []
     for track_type in ["video", "audio"]:
         number_of_tracks = 0
         number_of_tracks = current_timeline.GetTrackCount(track_type)
@@ -272,12 +286,21 @@ def update_timeline():
 
         for item in all_timeline_items:
             print("Item Color:  ", item.GetClipColor())
-            item_color = item.GetClipColor()
             if item.GetClipColor() != "Chocolate":
-
-                if replace_one_clip(item.GetMediaPoolItem()):
-                    item.SetClipColor(item_color)
-    create_update_window()
+                items_to_update.append(item)
+
+    # A media pool item used by several timeline items (or on a video and an audio
+    # track) is replaced and counted once
+    item_colors = [item.GetClipColor() for item in items_to_update]
+    media_pool_items = [item.GetMediaPoolItem() for item in items_to_update]
+    unique_media_pool_items = list(dict.fromkeys(media_pool_items))
+    results, counts = update_clips(unique_media_pool_items)
+    replaced_items = dict(zip(unique_media_pool_items, results))
+    for item, item_color, media_pool_item in zip(items_to_update, item_colors, media_pool_items):
+        if replaced_items[media_pool_item]:
+            item.SetClipColor(item_color)
+    version_scan.save_disk_cache()
+    create_update_window(format_counts(counts))
 
 
 # Create the main window
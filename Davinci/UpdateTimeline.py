@@ -5,6 +5,11 @@ import datetime
 import copy
 import re
 
+# version_scan.py sits next to this script
+if '__file__' in globals():
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import version_scan
+
 # USER EDITABLE VARIABLES:
 VERSION_PREFIX = "v"
 GRANDPARENT_FOLDER_INDEX = 3
@@ -30,36 +35,38 @@ def find_newest_version_path(input_path):
     path_components = [comp for comp in input_path.split(os.path.sep) if comp]
 
     # Determine the grandparent directory (assumes version folder is the second-to-last element)
-    grandparent_directory_index = len(path_components) - 3
-    grandparent_directory_path = os.path.join(*path_components[:grandparent_directory_index + 1])
+    grandparent_directory_path = version_scan.grandparent_directory(input_path)
 
-    # List entries in the grandparent directory
+    # List entries in the grandparent directory (listed once per run)
     try:
-        files_in_grandparent_directory = os.listdir(grandparent_directory_path)
+        version_scan.listdir(grandparent_directory_path)
     except Exception as e:
         print(f"Error listing directory {grandparent_directory_path}: {e}")
         return None
 
-    # Extract the version folder and its prefix
+    # Extract the version folder, its prefix and its number
     version_file = path_components[-2]
-    version_file_prefix = version_file[:-3]  # Remove version number
+    current_version = version_scan.split_version(version_file)
+    if current_version is None:
+        return None
+    version_file_prefix, _, version_digits = current_version
 
-    # Filter for matching version directories/files
-    matching_versions = [filename for filename in files_in_grandparent_directory if filename.startswith(version_file_prefix)]
+    # Index the matching version folders by number (so v10 is newer than v9)
+    version_index = version_scan.version_folder_index(grandparent_directory_path, version_file_prefix)
     
-    if matching_versions:
+    if len(version_index):
         # If versions include the "v" marker, determine the newest version
-        if "v" in matching_versions[0]:
-            newest_version = max(matching_versions)
-            print("Found versions:", matching_versions)
+        if "v" in version_file_prefix.lower():
+            newest_version = version_index.newest().name
+            print("Found versions:", [entry.name for entry in version_index.entries])
             # Update the version in the file name (last component)
             file_name_parts = path_components[-1].split("_v")
             if ".exr" in path_components[-1]:
-                file_name_parts[-1] = newest_version + "." + transform_filename(file_name_parts[-1][4:])
+                file_name_parts[-1] = newest_version + "." + transform_filename(file_name_parts[-1][len(version_digits) + 1:])
                 path_components[-1] = "_".join(file_name_parts)
                 print("Handling .exr file naming.")
             else:
-                file_name_parts[-1] = newest_version + file_name_parts[-1][3:]
+                file_name_parts[-1] = newest_version + file_name_parts[-1][len(version_digits):]
                 path_components[-1] = "_".join(file_name_parts)
             
             newest_version_path = os.path.join(*path_components)
@@ -70,18 +77,6 @@ def find_newest_version_path(input_path):
     else:
         return None
 
-def extract_version(base_name):
-    # Extracts the version number from a string ending with _v<number>
-    pattern = r'_v(\d+)$'
-    match = re.search(pattern, base_name)
-    if match:
-        version_number = match.group(1)
-        print("Extracted version number:", version_number)
-        return version_number
-    else:
-        print("No version number found in", base_name)
-        return None
-
 def find_newest_version_in_folder(file_path):
     # Separate folder and file name
     folder_path, file_name = os.path.split(file_path)
@@ -91,28 +86,14 @@ def find_newest_version_in_folder(file_path):
     new_base_name = base_name.split('_v')[0]
     print(f"Base name: {base_name} | Identifier: {new_base_name}")
     
-    highest_version = 0
-    for file in os.listdir(folder_path):
-        if new_base_name in file:
-            print("Matching file found:", file)
-            file_name_only, _ = os.path.splitext(file)
-            try:
-                version_str = extract_version(file_name_only)
-                if version_str is None:
-                    continue
-                version = int(version_str)
-                if version > highest_version:
-                    highest_version = version
-                    print("New highest version:", highest_version)
-            except (ValueError, TypeError):
-                continue
-
-    print("Highest version in folder:", highest_version)
-    if highest_version > 0:
-        newest_file_path = os.path.join(folder_path, f"{new_base_name}_v{highest_version}{extension}")
-        print("Newest file path candidate:", newest_file_path)
-        if os.path.exists(newest_file_path):
-            return newest_file_path
+    # Index the matching files by their _v<number> (any padding)
+    version_index = version_scan.version_file_index(folder_path, new_base_name, extension)
+    newest = version_index.newest()
+    if newest is not None and newest.number > 0:
+        print("Highest version in folder:", newest.number)
+        print("Newest file path:", newest.path)
+        return newest.path
+    print("No versioned file found in folder for", new_base_name)
     return None
 
 def transform_filename(filename):
@@ -122,7 +103,7 @@ def transform_filename(filename):
     print("Transformed filename:", result)
     return result
 
-def replace_one_clip(item):
+def replace_one_clip(item, counts=None):
     print("\nProcessing clip:", item)
     clip_name = item.GetClipProperty("Clip Name")
     print("Current Clip Name:", clip_name)
@@ -136,7 +117,18 @@ def replace_one_clip(item):
     
     if new_file_path is None:
         print("No newer version found for clip:", clip_name)
+        if counts is not None:
+            counts["unresolvable"] += 1
+        return False
+
+    # Leave clips that already use the newest version alone (every Resolve call forces a relink)
+    if version_scan.is_current_path(item_path, new_file_path):
+        print("Already the newest version:", clip_name)
+        if counts is not None:
+            counts["unchanged"] += 1
         return False
+    if counts is not None:
+        counts["changed"] += 1
 
     new_file_name = os.path.basename(new_file_path)
     # Adjust path formatting if necessary
@@ -157,8 +149,10 @@ def replace_one_clip(item):
     print("  File Path:", item.GetClipProperty("File Path"))
     return True
 
-def create_update_message():
+def create_update_message(counts=None):
     print("\n=== Timeline Update Finished ===\n")
+    if counts is not None:
+        print(f"Changed: {counts['changed']} | Unchanged: {counts['unchanged']} | Unresolvable: {counts['unresolvable']}\n")
 
 def update_timeline():
     current_timeline = getproject.GetCurrentTimeline()
@@ -166,6 +160,9 @@ def update_timeline():
         print("No current timeline found.")
         return
 
+    # Each run lists the directories fresh (once each)
+    version_scan.clear_listing_cache()
+    counts = {"changed": 0, "unchanged": 0, "unresolvable": 0}
     for track_type in ["video", "audio"]:
         number_of_tracks = current_timeline.GetTrackCount(track_type)
         all_timeline_items = []
@@ -174,14 +171,18 @@ def update_timeline():
             for il in item_list:
                 if il not in all_timeline_items:
                     all_timeline_items.append(il)
+        # List the version folders of all clips once before updating them
+        paths = [item.GetMediaPoolItem().GetClipProperty("File Path") for item in all_timeline_items if item.GetMediaPoolItem()]
+        print("Directories listed:", version_scan.prefetch_listings(paths))
         for item in all_timeline_items:
             print("Timeline clip color:", item.GetClipColor())
             original_color = item.GetClipColor()
             # Skip clips that are marked with a specific color ("Chocolate" in this case)
             if original_color != "Chocolate":
-                if replace_one_clip(item.GetMediaPoolItem()):
+                if replace_one_clip(item.GetMediaPoolItem(), counts):
                     item.SetClipColor(original_color)
-    create_update_message()
+    version_scan.save_disk_cache()
+    create_update_message(counts)
 
 # Run only the timeline update when the script is executed
 if __name__ == "__main__":
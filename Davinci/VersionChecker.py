@@ -1,11 +1,17 @@
 import os
 import re
+import sys
 import DaVinciResolveScript as dvr_script
 
+# version_scan.py sits next to this script
+if '__file__' in globals():
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import version_scan
+
 # ===== User Configuration Variables =====
 TRACK_TO_CHECK = 9                # Default video track to check
 FILE_PROPERTY_NAME = "File Path"  # The media property used to obtain the file path
-VERSION_FOLDER_REGEX = r'\\(v\d{3})\\'  # Regex pattern to match a version folder (e.g., "v013")
+VERSION_FOLDER_REGEX = r'[\\/](v\d+)[\\/]'  # Regex pattern to match a version folder (e.g., "v013", "v9")
 # ===== End User Configuration Variables =====
 
 # Get the Resolve instance
@@ -26,6 +32,9 @@ if not items or len(items) == 0:
     print(f"No clips found on video track {TRACK_TO_CHECK}.")
     exit()
 
+# Start from fresh listings: the modules stay loaded between runs in the same Resolve session
+version_scan.clear_listing_cache()
+
 # Process each clip in the track
 for clip_index, timeline_item in enumerate(items, start=1):
     clip_name = timeline_item.GetName()
@@ -58,28 +67,22 @@ for clip_index, timeline_item in enumerate(items, start=1):
     
     # List all subdirectories in the parent directory
     try:
-        subdirs = os.listdir(parent_dir)
+        version_scan.listdir(parent_dir)
     except Exception as e:
         print("  Error listing directory: " + str(e))
         continue
 
-    # Look for folders that match the version pattern (e.g., "v012", "v013", "v014", etc.)
-    version_numbers = []
-    for subdir in subdirs:
-        match = re.match(r'v(\d{3})$', subdir, re.IGNORECASE)
-        if match:
-            try:
-                ver_num = int(match.group(1))
-                version_numbers.append(ver_num)
-            except ValueError:
-                continue
-
-    if not version_numbers:
+    # Index the version folders (e.g., "v012", "v013", "v9") by number
+    version_index = version_scan.version_folder_index(parent_dir, "v")
+    if not len(version_index):
         print("  No version folders found in parent directory.")
         continue
 
-    max_version = max(version_numbers)
-    if max_version > current_version:
-        print("  Newer version available: v{:03d}".format(max_version))
+    newer_versions = version_index.newer_than(current_version)
+    if newer_versions:
+        print("  Newer version available: " + newer_versions[-1].name)
     else:
         print("  No newer version found.")
+
+# Keep the listings for the next check
+version_scan.save_disk_cache()
@@ -0,0 +1,280 @@
+#!/usr/bin/env python
+"""
+Version scan helpers shared by the Resolve version updaters
+(TimelineUpdate.py, UpdateTimeline.py) and VersionChecker.py.
+
+Directory listings are cached for one update run, keyed by directory path:
+dozens of clips usually share the same publish/.../platePlate parent, so the
+file server is asked for each directory only once. prefetch_listings() lists
+the directories of all clips up front, on a thread pool.
+
+resolve_paths() then works out the newest path of every clip concurrently
+over plain paths; only the clip replacement itself has to go through the
+(single-threaded) Resolve API.
+
+Versions are compared as numbers, not folder names: a VersionIndex parses
+the version folders (v9, v010, version001, ...) or versioned files of a
+directory once into entries sorted by version number, and answers "newest"
+and "newer than" with a binary search.
+
+Listings are also kept on disk between Resolve sessions (VERSION_CACHE_PATH),
+with the modification time of each directory: a directory whose mtime hasn't
+changed since it was listed is answered from the cache with a single stat,
+so a no-op update of an unchanged project doesn't list anything. A listing
+is only reused once the mtime was already the same at the run before: a
+listing taken within the same mtime tick as a change may have missed part of
+it. Only mtimes from the share are compared, never the local clock.
+
+Call clear_listing_cache() at the start of every run, so a new run sees new
+versions, and save_disk_cache() at the end.
+"""
+import os
+import re
+import json
+import time
+import tempfile
+import threading
+from bisect import bisect_left, bisect_right
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+# Directories listed / clip paths resolved at the same time
+SCAN_THREADS = 16
+
+# Listings kept between sessions, keyed by directory path and mtime
+USE_DISK_CACHE = True
+VERSION_CACHE_PATH = os.environ.get('RESOLVE_VERSION_CACHE') or os.path.join(
+    os.environ.get('LOCALAPPDATA') or os.path.expanduser('~'), '.resolve_version_cache.json')
+VERSION_CACHE_VERSION = 1
+MAX_CACHED_DIRECTORIES = 20000
+
+# A version folder name: prefix + version number (v001, v9, version001)
+VERSION_NAME_PATTERN = re.compile(r'^(?P<prefix>.*?)(?P<number>\d+)$')
+
+# Directory path -> list of entries, or the OSError the listing raised
+_listings = {}
+# (directory, kind, key) -> VersionIndex
+_indexes = {}
+# Directory path -> {'mtime': ns, 'stable': bool, 'listed': time, 'entries': [...]}, loaded from VERSION_CACHE_PATH
+_disk_cache = None
+_disk_cache_dirty = False
+_disk_cache_lock = threading.Lock()
+
+
+def clear_listing_cache():
+    """Forget the listings (and version indexes) of the last run."""
+    _listings.clear()
+    _indexes.clear()
+
+
+def _load_disk_cache():
+    global _disk_cache
+    with _disk_cache_lock:
+        if _disk_cache is None:
+            directories = {}
+            try:
+                with open(VERSION_CACHE_PATH, 'r', encoding='utf-8') as cache_file:
+                    data = json.load(cache_file)
+                if data.get('version') == VERSION_CACHE_VERSION:
+                    directories = data['directories']
+            except (OSError, ValueError, KeyError, AttributeError):
+                pass
+            _disk_cache = directories
+    return _disk_cache
+
+
+def save_disk_cache():
+    """Write the listings of this run to VERSION_CACHE_PATH (if anything changed)."""
+    global _disk_cache_dirty
+    if not USE_DISK_CACHE or not _disk_cache_dirty:
+        return
+    directories = _disk_cache
+    if len(directories) > MAX_CACHED_DIRECTORIES:
+        # Keep the most recently listed directories
+        newest = sorted(directories, key=lambda path: directories[path]['listed'], reverse=True)
+        directories = {path: directories[path] for path in newest[:MAX_CACHED_DIRECTORIES]}
+    temp_path = None
+    try:
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(VERSION_CACHE_PATH) or '.', suffix='.tmp')
+        with os.fdopen(fd, 'w', encoding='utf-8') as cache_file:
+            json.dump({'version': VERSION_CACHE_VERSION, 'directories': directories}, cache_file)
+        os.replace(temp_path, VERSION_CACHE_PATH)
+        _disk_cache_dirty = False
+    except OSError as e:
+        print(f"Could not save version cache {VERSION_CACHE_PATH}: {e}")
+        if temp_path and os.path.exists(temp_path):
+            os.remove(temp_path)
+
+
+def _list_directory(path):
+    """
+    os.listdir, answered from the disk cache while the directory's mtime is unchanged.
+    A listing is 'stable' if the mtime didn't change since the run before it,
+    so it was taken well after the last change; only stable listings are reused.
+    """
+    global _disk_cache_dirty
+    if not USE_DISK_CACHE:
+        return os.listdir(path)
+    mtime = os.stat(path).st_mtime_ns
+    disk_cache = _load_disk_cache()
+    cached = disk_cache.get(path)
+    unchanged = bool(cached) and cached['mtime'] == mtime
+    if unchanged and cached.get('stable'):
+        return cached['entries']
+    entries = os.listdir(path)
+    disk_cache[path] = {'mtime': mtime, 'stable': unchanged, 'listed': time.time(), 'entries': entries}
+    _disk_cache_dirty = True
+    return entries
+
+
+def listdir(path):
+    """os.listdir(path), listed once per run. Raises OSError like os.listdir."""
+    if path not in _listings:
+        try:
+            _listings[path] = _list_directory(path)
+        except OSError as e:
+            _listings[path] = e
+    listing = _listings[path]
+    if isinstance(listing, OSError):
+        raise OSError(listing.errno, listing.strerror, listing.filename)
+    return listing
+
+
+def comparable_path(path):
+    """
+    A clip path normalized for comparing the path Resolve has with a looked-up
+    one (the lookups drop the root separator and the separator after the drive).
+    """
+    path = os.path.normcase(os.path.normpath(path.replace(":", ":" + os.path.sep)))
+    return path.lstrip(os.path.sep)
+
+
+def is_current_path(item_path, new_file_path):
+    """True if the looked-up newest path is the file the clip already uses."""
+    return comparable_path(item_path) == comparable_path(new_file_path)
+
+
+def grandparent_directory(input_path):
+    """The folder holding the version folders of a clip path (…/platePlate for …/platePlate/v001/file)."""
+    path_components = [component for component in input_path.split(os.path.sep) if component]
+    grandparent_directory_index = len(path_components) - 3
+    return os.path.join(*path_components[:grandparent_directory_index + 1])
+
+
+def clip_directories(input_path):
+    """The directories the updaters list for a clip: its version parent and its own folder."""
+    directories = []
+    if len([component for component in input_path.split(os.path.sep) if component]) >= 3:
+        directories.append(grandparent_directory(input_path))
+    directories.append(os.path.dirname(input_path))
+    return directories
+
+
+def _prefetch(directory):
+    try:
+        listdir(directory)
+    except OSError:
+        pass
+
+
+def prefetch_listings(paths, max_workers=SCAN_THREADS):
+    """List every directory needed by the clip paths once. Returns the number of directories listed."""
+    directories = {}
+    for path in paths:
+        if not path:
+            continue
+        for directory in clip_directories(path):
+            if directory not in _listings:
+                directories[directory] = True
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        list(executor.map(_prefetch, directories))
+    return len(directories)
+
+
+def resolve_paths(paths, resolver, max_workers=SCAN_THREADS):
+    """
+    Run resolver(path) for every unique path on a thread pool.
+    Returns {path: result}; a path whose resolver raised maps to None.
+    """
+    def resolve(path):
+        try:
+            return resolver(path)
+        except Exception as e:
+            print(f"Could not resolve newest version of {path}: {e}")
+            return None
+
+    unique_paths = list(dict.fromkeys(path for path in paths if path))
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return dict(zip(unique_paths, executor.map(resolve, unique_paths)))
+
+
+VersionEntry = namedtuple('VersionEntry', ['number', 'name', 'path'])
+
+
+def split_version(name):
+    """'v010' -> ('v', 10, '010'); None if the name doesn't end in a number."""
+    match = VERSION_NAME_PATTERN.match(name)
+    if not match:
+        return None
+    return match.group('prefix'), int(match.group('number')), match.group('number')
+
+
+class VersionIndex(object):
+    """
+    Versions of one directory, sorted by version number.
+    Build it with version_folder_index() or version_file_index().
+    """
+
+    def __init__(self, entries):
+        self.entries = sorted(entries)
+        self.numbers = [entry.number for entry in self.entries]
+
+    @classmethod
+    def from_names(cls, directory, names, pattern):
+        """Index the names matching pattern (a compiled regex with a 'number' group)."""
+        entries = []
+        for name in names:
+            match = pattern.match(name)
+            if match:
+                entries.append(VersionEntry(int(match.group('number')), name, os.path.join(directory, name)))
+        return cls(entries)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def newest(self):
+        """The entry with the highest version number, or None."""
+        return self.entries[-1] if self.entries else None
+
+    def newer_than(self, number):
+        """Entries with a higher version number than number, oldest first."""
+        return self.entries[bisect_right(self.numbers, number):]
+
+    def find(self, number):
+        """The entry for a version number, or None."""
+        index = bisect_left(self.numbers, number)
+        if index < len(self.entries) and self.numbers[index] == number:
+            return self.entries[index]
+        return None
+
+
+def _cached_index(key, directory, pattern):
+    if key not in _indexes:
+        try:
+            names = listdir(directory)
+        except OSError:
+            names = []
+        _indexes[key] = VersionIndex.from_names(directory, names, pattern)
+    return _indexes[key]
+
+
+def version_folder_index(directory, prefix="v"):
+    """Index of the version folders (prefix + number, any padding, any case) in directory."""
+    pattern = re.compile(re.escape(prefix) + r'(?P<number>\d+)$', re.IGNORECASE)
+    return _cached_index((directory, 'folder', prefix.lower()), directory, pattern)
+
+
+def version_file_index(directory, base_name, extension=""):
+    """Index of the files in directory containing base_name whose name ends in _v<number><extension>."""
+    pattern = re.compile(r'.*' + re.escape(base_name) + r'.*_v(?P<number>\d+)' + re.escape(extension) + '$')
+    return _cached_index((directory, 'file', base_name, extension), directory, pattern)
@@ -1,98 +1,13 @@
 #!/usr/bin/env python
 import os
 import sys
-import re
 
-# Shot name mapping dictionary
-SHOT_MAPPING = {
-    'ME1_0050': 'EP01_G_050',
-    'ME1_0060': 'EP01_G_060',
-    'ME1_0070': 'EP01_G_070',
-    'ME1_0080': 'EP01_G_080',
-    'ME1_0090': 'EP01_G_090',
-    'ME1_0100': 'EP01_D_100',
-    'ME1_0110': 'EP01_G_110',
-    'ME1_0120': 'EP01_D_120',
-    'ME1_0130': 'EP01_D_130',
-    'ME1_0140': 'EP01_D_140',
-    'ME1_0150': 'EP01_D_150',
-    'ME1_0160': 'EP01_D_160',
-    'ME1_0170': 'EP01_D_170',
-    'ME1_0180': 'EP01_D_180',
-    'ME1_0190': 'EP01_D_190',
-    'ME1_0200': 'EP01_D_200',
-    'ME1_0210': 'EP01_D_210',
-    'ME1_0220': 'EP01_G_220',
-    'ME1_0230': 'EP01_G_230',
-    'ME1_0240': 'EP01_G_240',
-    'ME1_0250': 'EP01_G_250',
-    'ME1_0260': 'EP01_G_260',
-    'ME1_0270': 'EP01_G_270',
-    'ME1_0275': 'EP01_G_275',  # New mapping added
-    'ME1_0280': 'EP01_G_280',
-    'ME1_0290': 'EP01_G_290',
-    'ME1_0300': 'EP01_G_300',
-    'ME1_0310': 'EP01_G_310',
-    'ME1_0320': 'EP01_G_320',
-    'ME1_0330': 'EP01_G_330',
-    'ME1_0340': 'EP01_G_340',
-    'ME1_0350': 'EP01_G_350',
-    'ME1_0360': 'EP01_D_360',
-    'ME1_0370': 'EP01_D_370',
-    'ME1_0380': 'EP01_D_380',
-    'ME1_0390': 'EP01_D_390',
-    'ME1_0400': 'EP01_D_400',
-    'ME1_0410': 'EP01_D_410',
-    'ME1_0420': 'EP01_D_420',
-    'ME1_0430': 'EP01_D_430',
-    'ME1_0440': 'EP01_G_440',
-    'ME1_0450': 'EP01_D_450',  # New mapping added for ME1_0450
-    'ME1_0470': 'EP01_D_470',
-    'ME1_0480': 'EP01_D_480',
-    'ME1_0490': 'EP01_D_490',
-    'ME1_0500': 'EP01_G_500',
-    'ME1_0510': 'EP01_D_510',
-    'ME1_0520': 'EP01_D_520',
-    'ME1_0570': 'EP01_G_570',
-    'ME1_0580': 'EP01_D_580',
-    'ME1_0590': 'EP01_G_590',
-    'ME1_0700': 'EP01_G_700',
-    'ME1_0710': 'EP01_G_710',
-    'ME1_0720': 'EP01_G_720',
-    'ME1_0730': 'EP01_D_730',
-    'ME1_0740': 'EP01_D_740',
-    'ME1_0750': 'EP01_G_750',
-    'ME1_0760': 'EP01_G_760',
-    'ME1_0770': 'EP01_G_770',
-    'ME1_0780': 'EP01_G_780',
-    'ME1_0790': 'EP01_D_790',
-    'ME1_0800': 'EP01_D_800',
-    'ME1_0810': 'EP01_D_810',
-    'ME1_0830': 'EP01_D_830',
-    'ME1_0832': 'EP01_D_832',
-    'ME1_0850': 'EP01_G_850',
-    'ME1_0860': 'EP01_G_860',
-    'ME1_0870': 'EP01_G_870',
-    'ME1_0880': 'EP01_G_880',
-    'ME1_0900': 'EP01_G_900',
-    'ME1_0910': 'EP01_G_910',
-    'ME1_0920': 'EP01_G_920',
-    'ME1_0930': 'EP01_G_930',
-    'ME1_0940': 'EP01_F_940',
-    'ME1_0950': 'EP01_F_950',
-    'ME1_0960': 'EP01_F_960',
-    'ME1_0970': 'EP01_F_970',
-    'ME1_0980': 'EP01_F_980',
-    'ME1_0990': 'EP01_D_990',
-    'ME1_1000': 'EP01_D_1000',
-    'ME1_1010': 'EP01_D_1010',
-    'ME1_1020': 'EP01_D_1020',
-    'ME1_1030': 'EP01_D_1030',
-    'ME1_1040': 'EP01_D_1040',
-    'ME1_1050': 'EP01_G_1050',
-    'ME1_1060': 'EP01_G_1060',
-    'ME1_9990': 'EP01_G_9990'
-}
+# The shared Moloch modules (moloch_shots.py, ...) sit one folder up
+if '__file__' in globals():
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from moloch_shots import get_client_shot
+from moloch_paths import extract_shot_name
 
 # Initialize DaVinci Resolve
 resolve = app.GetResolve()
@@ -100,27 +15,8 @@ projectManager = resolve.GetProjectManager()
 project = projectManager.GetCurrentProject()
 
 def get_product_name(shot_name):
-    """Get the product name for a given shot name from the mapping dictionary."""
-    return SHOT_MAPPING.get(shot_name)
-
-def extract_shot_name(file_path):
-    """Extract ME1_XXXX shot name from file path."""
-    try:
-        # Handle full file path or just filename
-        filename = os.path.basename(file_path)
-        
-        # Look for ME1_XXXX pattern anywhere in the filename
-        match = re.search(r'ME1_\d{4}', filename)
-        if match:
-            shot_name = match.group(0)
-            print(f"Found shot name: {shot_name} in {filename}")
-            return shot_name
-            
-        print(f"No ME1_XXXX pattern found in: {filename}")
-        return None
-    except Exception as e:
-        print(f"Error extracting shot name: {e}")
-        return None
+    """Get the product name for a given shot name from the shared shot registry."""
+    return get_client_shot(shot_name)
 
 def replace_clip_name(item):
     """Add a marker with the product name and version to the clip."""
@@ -142,8 +38,8 @@ def replace_clip_name(item):
             print("Could not get clip properties")
             return False
 
-        # Extract shot name and get corresponding product name
-        shot_name = extract_shot_name(file_path)
+        # Extract shot name (from the file name only) and get corresponding product name
+        shot_name = extract_shot_name(os.path.basename(file_path))
         if not shot_name:
             print(f"No shot name found in: {clip_name}")
             return False
@@ -20,120 +20,35 @@ This version processes multiple selected Read nodes.
 
 import nuke
 import os
-import re
 import datetime
-import csv
+import contextlib
+import sys
 
-# Shot name mapping dictionary
-SHOT_MAPPING = {
-    'ME1_0050': 'EP01_G_050',
-    'ME1_0060': 'EP01_G_060',
-    'ME1_0070': 'EP01_G_070',
-    'ME1_0080': 'EP01_G_080',
-    'ME1_0090': 'EP01_G_090',
-    'ME1_0100': 'EP01_D_100',
-    'ME1_0110': 'EP01_G_110',
-    'ME1_0120': 'EP01_D_120',
-    'ME1_0130': 'EP01_D_130',
-    'ME1_0140': 'EP01_D_140',
-    'ME1_0150': 'EP01_D_150',
-    'ME1_0160': 'EP01_D_160',
-    'ME1_0170': 'EP01_D_170',
-    'ME1_0180': 'EP01_D_180',
-    'ME1_0190': 'EP01_D_190',
-    'ME1_0200': 'EP01_D_200',
-    'ME1_0210': 'EP01_D_210',
-    'ME1_0220': 'EP01_G_220',
-    'ME1_0230': 'EP01_G_230',
-    'ME1_0240': 'EP01_G_240',
-    'ME1_0250': 'EP01_G_250',
-    'ME1_0260': 'EP01_G_260',
-    'ME1_0270': 'EP01_G_270',
-    'ME1_0275': 'EP01_G_275',  # New mapping added
-    'ME1_0280': 'EP01_G_280',
-    'ME1_0290': 'EP01_G_290',
-    'ME1_0300': 'EP01_G_300',
-    'ME1_0310': 'EP01_G_310',
-    'ME1_0320': 'EP01_G_320',
-    'ME1_0330': 'EP01_G_330',
-    'ME1_0340': 'EP01_G_340',
-    'ME1_0350': 'EP01_G_350',
-    'ME1_0360': 'EP01_D_360',
-    'ME1_0370': 'EP01_D_370',
-    'ME1_0380': 'EP01_D_380',
-    'ME1_0390': 'EP01_D_390',
-    'ME1_0400': 'EP01_D_400',
-    'ME1_0410': 'EP01_D_410',
-    'ME1_0420': 'EP01_D_420',
-    'ME1_0430': 'EP01_D_430',
-    'ME1_0440': 'EP01_G_440',
-    'ME1_0450': 'EP01_D_450',  # New mapping added for ME1_0450
-    'ME1_0460': 'EP01_D_460',
-    'ME1_0470': 'EP01_D_470',
-    'ME1_0480': 'EP01_D_480',
-    'ME1_0490': 'EP01_D_490',
-    'ME1_0500': 'EP01_G_500',
-    'ME1_0510': 'EP01_D_510',
-    'ME1_0520': 'EP01_D_520',
-    'ME1_0560': 'EP01_G_560',
-    'ME1_0570': 'EP01_G_570',
-    'ME1_0580': 'EP01_D_580',
-    'ME1_0590': 'EP01_G_590',
-    'ME1_0591': 'EP01_G_591',
-    'ME1_0595': 'EP01_G_595',
-    'ME1_0630': 'EP01_G_630',  # New mapping added
-    'ME1_0640': 'EP01_G_640',  # New mapping added
-    'ME1_0650': 'EP01_G_650',  # New mapping added
-    'ME1_0660': 'EP01_D_660',  # New mapping added
-    'ME1_0670': 'EP01_D_670',  # New mapping added
-    'ME1_0680': 'EP01_D_680',  # New mapping added
-    'ME1_0700': 'EP01_G_700',
-    'ME1_0710': 'EP01_G_710',
-    'ME1_0715': 'EP01_D_715',
-    'ME1_0720': 'EP01_G_720',
-    'ME1_0730': 'EP01_D_730',
-    'ME1_0740': 'EP01_D_740',
-    'ME1_0750': 'EP01_G_750',
-    'ME1_0760': 'EP01_G_760',
-    'ME1_0770': 'EP01_G_770',
-    'ME1_0780': 'EP01_G_780',
-    'ME1_0790': 'EP01_D_790',
-    'ME1_0800': 'EP01_D_800',
-    'ME1_0810': 'EP01_D_810',
-    'ME1_0820': 'EP01_D_820',
-    'ME1_0830': 'EP01_D_830',
-    'ME1_0832': 'EP01_D_832',
-    'ME1_0840': 'EP01_D_840',
-    'ME1_0850': 'EP01_G_850',
-    'ME1_0860': 'EP01_G_860',
-    'ME1_0870': 'EP01_G_870',
-    'ME1_0880': 'EP01_G_880',
-    'ME1_0890': 'EP01_G_890',
-    'ME1_0900': 'EP01_G_900',
-    'ME1_0910': 'EP01_G_910',
-    'ME1_0920': 'EP01_G_920',
-    'ME1_0930': 'EP01_G_930',
-    'ME1_0940': 'EP01_F_940',
-    'ME1_0950': 'EP01_F_950',
-    'ME1_0960': 'EP01_F_960',
-    'ME1_0970': 'EP01_F_970',
-    'ME1_0980': 'EP01_F_980',
-    'ME1_0990': 'EP01_D_990',
-    'ME1_1000': 'EP01_D_1000',
-    'ME1_1010': 'EP01_D_1010',
-    'ME1_1020': 'EP01_D_1020',
-    'ME1_1030': 'EP01_D_1030',
-    'ME1_1040': 'EP01_D_1040',
-    'ME1_1050': 'EP01_G_1050',
-    'ME1_1060': 'EP01_G_1060',
-    'ME1_9990': 'EP01_G_9990'
-}
+# The delivery modules sit next to this script, the shared Moloch modules
+# (moloch_shots.py, ...) one folder up
+if '__file__' in globals():
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import delivery_log
+import delivery_plan
+import plate_metadata
+import nuke_graph
+from nuke_graph import GraphBuilder
+from moloch_shots import SHOT_MAPPING
+from moloch_paths import extract_shot_name, extract_version
 
 # Default directory and file settings
 DEFAULT_OUTPUT_BASE_DIR = "Y:/MOLOCH_02426/sources/Users/MT/tmp"
 DEFAULT_SOURCE_PLATES_DIR = "Y:/MOLOCH_02426/sources/_raw_material"
 DEFAULT_LOG_FILE_DIR = "Y:/MOLOCH_02426/sources/Users/MT/logs"
 DEFAULT_LOG_FILE_NAME = "nuke_delivery_log.csv"
+DEFAULT_LOG_BACKEND = "csv"
+DEFAULT_LEDGER_FILE_NAME = "nuke_delivery_log.sqlite"
+LOG_BACKENDS = ["csv", "sqlite"]
+DEFAULT_USE_SIDECAR_METADATA = False
+# Source path of the Reads created for shots picked from the list (relink them to the comp renders)
+LIST_SOURCE_PATH = "/path/to/{shot}/dummy_filename.exr"
 
 def setup_user_variables():
     """
@@ -162,11 +77,29 @@ def setup_user_variables():
         user_prefs.addKnob(log_dir_knob)
         user_prefs.addKnob(log_file_knob)
     
+    # Knobs added after the first release are created separately so existing preferences pick them up
+    if not user_prefs.knob("plateProcessorLogBackend"):
+        backend_knob = nuke.Enumeration_Knob('plateProcessorLogBackend', 'Log Backend', LOG_BACKENDS)
+        backend_knob.setValue(DEFAULT_LOG_BACKEND)
+        backend_knob.setTooltip('csv: append to the CSV log file\nsqlite: indexed ledger file in the log directory')
+        ledger_file_knob = nuke.String_Knob('plateProcessorLedgerFileName', 'Ledger File Name', DEFAULT_LEDGER_FILE_NAME)
+        ledger_file_knob.setTooltip('Name of the SQLite ledger used by the sqlite log backend')
+        user_prefs.addKnob(backend_knob)
+        user_prefs.addKnob(ledger_file_knob)
+    if not user_prefs.knob("plateProcessorSidecarMetadata"):
+        sidecar_knob = nuke.Boolean_Knob('plateProcessorSidecarMetadata', 'Use Plate Metadata Sidecars', DEFAULT_USE_SIDECAR_METADATA)
+        sidecar_knob.setTooltip('Inject the original plate metadata from a cached sidecar with ModifyMetaData\n'
+                                'instead of reading the plate again through CopyMetaData')
+        user_prefs.addKnob(sidecar_knob)
+    
     config = {
         'OUTPUT_BASE_DIR': user_prefs['plateProcessorOutputDir'].value() or DEFAULT_OUTPUT_BASE_DIR,
         'SOURCE_PLATES_DIR': user_prefs['plateProcessorSourceDir'].value() or DEFAULT_SOURCE_PLATES_DIR,
         'LOG_FILE_DIR': user_prefs['plateProcessorLogDir'].value() or DEFAULT_LOG_FILE_DIR,
-        'LOG_FILE_NAME': user_prefs['plateProcessorLogFileName'].value() or DEFAULT_LOG_FILE_NAME
+        'LOG_FILE_NAME': user_prefs['plateProcessorLogFileName'].value() or DEFAULT_LOG_FILE_NAME,
+        'LOG_BACKEND': user_prefs['plateProcessorLogBackend'].value() or DEFAULT_LOG_BACKEND,
+        'LEDGER_FILE_NAME': user_prefs['plateProcessorLedgerFileName'].value() or DEFAULT_LEDGER_FILE_NAME,
+        'USE_SIDECAR_METADATA': bool(user_prefs['plateProcessorSidecarMetadata'].value())
     }
     
     return config
@@ -176,68 +109,101 @@ OUTPUT_BASE_DIR = CONFIG['OUTPUT_BASE_DIR']
 SOURCE_PLATES_DIR = CONFIG['SOURCE_PLATES_DIR']
 LOG_FILE_DIR = CONFIG['LOG_FILE_DIR']
 LOG_FILE_NAME = CONFIG['LOG_FILE_NAME']
+LOG_BACKEND = CONFIG['LOG_BACKEND']
+LEDGER_FILE_NAME = CONFIG['LEDGER_FILE_NAME']
+USE_SIDECAR_METADATA = CONFIG['USE_SIDECAR_METADATA']
 
-def extract_shot_name(file_path):
-    """
-    Extract shot name from file path.
-    """
-    match = re.search(r'(ME1_\d{4})', file_path)
-    return match.group(1) if match else None
-
-def extract_version(file_path):
+def get_ledger():
     """
-    Extract the version number from the file path.
+    Return the SQLite delivery ledger if the sqlite log backend is selected, otherwise None.
     """
-    match = re.search(r'v(\d{3})', file_path)
-    return f"v{match.group(1)}" if match else None
+    if LOG_BACKEND != "sqlite":
+        return None
+    return delivery_log.get_ledger(os.path.join(LOG_FILE_DIR, LEDGER_FILE_NAME))
 
 def get_latest_delivered_version(shot_name):
     """
     Find the latest version delivered for a specific shot by reading the log file.
+    The CSV log is cached per session, so repeated lookups only parse new rows.
     """
-    log_file_path = os.path.join(LOG_FILE_DIR, LOG_FILE_NAME)
-    if not os.path.exists(log_file_path):
-        if not os.path.exists(LOG_FILE_DIR):
-            os.makedirs(LOG_FILE_DIR)
-        with open(log_file_path, 'w', newline='') as csvfile:
-            fieldnames = ['timestamp', 'source_shot', 'delivery_shot', 'source_version', 'delivery_version', 'source_path', 'delivery_path']
-            csv.DictWriter(csvfile, fieldnames=fieldnames).writeheader()
-        return None, None
+    ledger = get_ledger()
+    if ledger:
+        return ledger.get_latest_delivered_version(shot_name)
     
-    latest_version = None
-    version_info = None
-    with open(log_file_path, 'r') as csvfile:
-        reader = csv.DictReader(csvfile)
-        for row in reader:
-            if row['delivery_shot'] == shot_name:
-                if latest_version is None or row['delivery_version'] > latest_version:
-                    latest_version = row['delivery_version']
-                    version_info = row
-    return latest_version, version_info
+    log_file_path = os.path.join(LOG_FILE_DIR, LOG_FILE_NAME)
+    delivery_log.ensure_csv_log(log_file_path)
+    return delivery_log.get_latest_delivered_version(log_file_path, shot_name)
 
 def log_delivery(source_shot, delivery_shot, source_version, delivery_version, source_path, delivery_path):
     """
-    Log delivery information to a CSV file.
+    Log delivery information to the CSV file or the SQLite ledger.
+    """
+    timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    row = {
+        'timestamp': timestamp,
+        'source_shot': source_shot,
+        'delivery_shot': delivery_shot,
+        'source_version': source_version,
+        'delivery_version': delivery_version,
+        'source_path': source_path,
+        'delivery_path': delivery_path
+    }
+    ledger = get_ledger()
+    if ledger:
+        ledger.log_delivery(row)
+        return
+    
+    delivery_log.log_delivery_row(os.path.join(LOG_FILE_DIR, LOG_FILE_NAME), row)
+
+@contextlib.contextmanager
+def delivery_batch():
+    """
+    Buffer the log rows of a batch and write them once when it ends
+    (one locked append for the CSV log, one transaction for the ledger).
+    """
+    ledger = get_ledger()
+    if ledger:
+        with ledger.batch():
+            yield
+    else:
+        with delivery_log.DeliveryLogBatch(os.path.join(LOG_FILE_DIR, LOG_FILE_NAME)):
+            yield
+
+def import_csv_log_to_ledger():
+    """
+    One-time import of the existing CSV delivery log into the SQLite ledger.
     """
     log_file_path = os.path.join(LOG_FILE_DIR, LOG_FILE_NAME)
-    if not os.path.exists(LOG_FILE_DIR):
-        os.makedirs(LOG_FILE_DIR)
+    ledger_path = os.path.join(LOG_FILE_DIR, LEDGER_FILE_NAME)
     if not os.path.exists(log_file_path):
-        with open(log_file_path, 'w', newline='') as csvfile:
-            fieldnames = ['timestamp', 'source_shot', 'delivery_shot', 'source_version', 'delivery_version', 'source_path', 'delivery_path']
-            csv.DictWriter(csvfile, fieldnames=fieldnames).writeheader()
-    timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    with open(log_file_path, 'a', newline='') as csvfile:
-        fieldnames = ['timestamp', 'source_shot', 'delivery_shot', 'source_version', 'delivery_version', 'source_path', 'delivery_path']
-        csv.DictWriter(csvfile, fieldnames=fieldnames).writerow({
-            'timestamp': timestamp,
-            'source_shot': source_shot,
-            'delivery_shot': delivery_shot,
-            'source_version': source_version,
-            'delivery_version': delivery_version,
-            'source_path': source_path,
-            'delivery_path': delivery_path
-        })
+        nuke.message(f"CSV log not found: {log_file_path}")
+        return
+    if not nuke.ask(f"Import {log_file_path}\ninto {ledger_path}?"):
+        return
+    try:
+        imported = delivery_log.get_ledger(ledger_path).import_csv(log_file_path)
+    except Exception as e:
+        nuke.message(f"Import failed: {str(e)}")
+        return
+    nuke.message(f"Imported {imported} deliveries into {ledger_path}.\n\nSet 'Log Backend' to sqlite in the Plate Processor settings to use it.")
+
+def compact_delivery_log():
+    """
+    Archive old rows of the CSV log and refresh the per-shot snapshot.
+    """
+    if get_ledger():
+        nuke.message("The SQLite ledger is indexed and does not need compacting.")
+        return
+    log_file_path = os.path.join(LOG_FILE_DIR, LOG_FILE_NAME)
+    keep_days = nuke.getInput("Keep deliveries from the last N days in the live log:", str(delivery_log.COMPACT_KEEP_DAYS))
+    if keep_days is None:
+        return
+    try:
+        archived, kept, shots = delivery_log.compact_log(log_file_path, int(keep_days))
+    except Exception as e:
+        nuke.message(f"Compaction failed: {str(e)}")
+        return
+    nuke.message(f"Delivery log compacted.\n\nArchived rows: {archived}\nRows kept in live log: {kept}\nShots in snapshot: {shots}")
 
 def process_single_plate(read_node, batch_mode=False, version_choice_override=None):
     """
@@ -291,17 +257,11 @@ def process_single_plate(read_node, batch_mode=False, version_choice_override=No
             os.makedirs(output_dir)
         output_path = f"{output_dir}/{delivery_shot}_{delivery_version}.####.exr"
         
-        write_node = nuke.createNode("Write")
-        write_node.setInput(0, read_node)
-        write_node['channels'].setValue("all")
-        write_node['file'].setValue(output_path)
-        write_node['file_type'].setValue("exr")
-        write_node['compression'].setValue("PIZ Wavelet (32 scanlines)")
-        write_node['metadata'].setValue("all metadata")
-        write_node['first_part'].setValue("rgba")
-        write_node['create_directories'].setValue(True)
-        write_node.setXYpos(read_node.xpos(), read_node.ypos() + 100)
-        write_node.setName(f"Write_{delivery_shot}_{delivery_version}")
+        builder = GraphBuilder()
+        write_spec = builder.add("Write", delivery_write_knobs(output_path), inputs=[read_node],
+                                 name=f"Write_{delivery_shot}_{delivery_version}",
+                                 position=(read_node.xpos(), read_node.ypos() + 100))
+        write_node = builder.build()[write_spec]
         
         log_delivery(
             source_shot=shot_name,
@@ -315,117 +275,141 @@ def process_single_plate(read_node, batch_mode=False, version_choice_override=No
         return True, f"Successfully processed {shot_name} (full CG shot)", {"write_node": write_node}
     
     # Process non-TIFF files (raw plates)
-    shot_name = extract_shot_name(file_path)
-    if not shot_name:
-        if not batch_mode:
-            nuke.message(f"Could not extract shot name from {file_path}")
-        return False, f"Could not extract shot name from {file_path}", {}
-    
-    if shot_name not in SHOT_MAPPING:
-        if not batch_mode:
-            nuke.message(f"Shot {shot_name} not found in the mapping dictionary.")
-        return False, f"Shot {shot_name} not found in the mapping dictionary.", {}
-    
-    original_shot = SHOT_MAPPING[shot_name]
-    shot_number = original_shot.split('_')[-1]
-    original_shot_with_zero = f"{original_shot[:6]}_0{shot_number}"
-    original_plate_path = f"{SOURCE_PLATES_DIR}/{original_shot_with_zero}/{original_shot_with_zero}.####.exr"
-
-    source_dir = os.path.dirname(original_plate_path.replace("####", "0001"))
-    # If original directory not found, try with L1 suffix
-    if not os.path.exists(source_dir):
-        # Try alternate L1 naming pattern
-        original_shot_with_l1 = f"{original_shot_with_zero}_L1"
-        l1_plate_path = f"{SOURCE_PLATES_DIR}/{original_shot_with_l1}/{original_shot_with_l1}.####.exr"
-        l1_source_dir = os.path.dirname(l1_plate_path.replace("####", "0001"))
-        
-        if os.path.exists(l1_source_dir):
-            original_plate_path = l1_plate_path
-            source_dir = l1_source_dir
-        else:
-            if not batch_mode:
-                nuke.message(f"Original plate directory not found: {source_dir}\nAlso checked: {l1_source_dir}")
-            return False, f"Original plate directory not found: {source_dir} or {l1_source_dir}", {}
-    
-    original_read = nuke.createNode("Read")
-    original_read['file'].setValue(original_plate_path)
-    original_read['file_type'].setValue('exr')
+    comp_range = None
     if 'first' in read_node.knobs() and 'last' in read_node.knobs():
-        original_read['first'].setValue(read_node['first'].value())
-        original_read['last'].setValue(read_node['last'].value())
-        original_read['origfirst'].setValue(read_node['first'].value())
-        original_read['origlast'].setValue(read_node['last'].value())
-    if 'format' in read_node.knobs():
-        original_read['format'].setValue(read_node['format'].value())
-    original_read['origset'].setValue(True)
-    original_read.setXYpos(read_node.xpos() + 100, read_node.ypos())
-    
-    copy_metadata = nuke.createNode("CopyMetaData")
-    copy_metadata.setInput(0, read_node)
-    copy_metadata.setInput(1, original_read)
-    copy_metadata.setXYpos(original_read.xpos() + 100, original_read.ypos() + 50)
-    
-    original_read.setName(f"OriginalPlate_{shot_name}")
-    copy_metadata.setName(f"CopyMetaData_{shot_name}")
-    
-    source_version = extract_version(file_path) or "unknown"
-    
-    # Use internal version as delivery version instead of converting to v001
-    delivery_version = source_version or "v001"
-    
-    latest_version, version_info = get_latest_delivered_version(original_shot)
+        comp_range = (int(read_node['first'].value()), int(read_node['last'].value()))
+    plan = delivery_plan.plan_plate_delivery(file_path, SOURCE_PLATES_DIR, OUTPUT_BASE_DIR,
+                                             get_latest_delivered_version, comp_range)
+    if isinstance(plan, delivery_plan.PlanFailure):
+        if not batch_mode:
+            nuke.message(plan.message)
+        return False, plan.message, {}
     
-    if latest_version:
+    if plan.latest_version:
         if batch_mode and version_choice_override is not None:
             version_choice = version_choice_override
         else:
-            msg = (f"Shot {original_shot} has already been delivered as {latest_version}.\n"
-                   f"Last delivery was from source {version_info['source_version']} on {version_info['timestamp']}.\n\n")
-            version_choice = nuke.choice("Version Options", f"Shot {original_shot} already delivered",
-                                         ["Cancel", f"Use source version ({delivery_version})", "Overwrite existing version"])
+            version_choice = nuke.choice("Version Options", f"Shot {plan.delivery_shot} already delivered",
+                                         ["Cancel", f"Use source version ({plan.delivery_version})", "Overwrite existing version"])
         if version_choice == 0:
             if not batch_mode:
                 nuke.message("Delivery cancelled")
-            return False, "Delivery cancelled", {"original_read": original_read, "copy_metadata": copy_metadata}
-        elif version_choice == 1:
-            # Keep delivery_version as source_version (already set above)
-            pass
+            return False, "Delivery cancelled", {}
         elif version_choice == 2:
             if not batch_mode:
-                nuke.message(f"WARNING: Overwriting existing delivery for {original_shot}!")
-    
-    # New folder structure: <OUTPUT_BASE_DIR>/<shot>/<version>/
-    output_dir = f"{OUTPUT_BASE_DIR}/{original_shot}/{delivery_version}"
-    if not os.path.exists(output_dir):
-        os.makedirs(output_dir)
-    output_path = f"{output_dir}/{original_shot}_{delivery_version}.####.exr"
+                nuke.message(f"WARNING: Overwriting existing delivery for {plan.delivery_shot}!")
     
-    write_node = nuke.createNode("Write")
-    write_node.setInput(0, copy_metadata)
-    write_node['channels'].setValue("all")
-    write_node['file'].setValue(output_path)
-    write_node['file_type'].setValue("exr")
-    write_node['compression'].setValue("PIZ Wavelet (32 scanlines)")
-    write_node['metadata'].setValue("all metadata")
-    write_node['first_part'].setValue("rgba")
-    write_node['create_directories'].setValue(True)
-    write_node.setXYpos(copy_metadata.xpos(), copy_metadata.ypos() + 100)
-    write_node.setName(f"Write_{original_shot}_{delivery_version}")
+    return materialize_deliveries([plan], [read_node])[0]
+
+def delivery_write_knobs(output_path):
+    """Knobs of a delivery Write node (file_type before the exr knobs)."""
+    return [
+        ('channels', "all"),
+        ('file', output_path),
+        ('file_type', "exr"),
+        ('compression', "PIZ Wavelet (32 scanlines)"),
+        ('metadata', "all metadata"),
+        ('first_part', "rgba"),
+        ('create_directories', True)
+    ]
+
+def add_delivery_nodes(builder, plan, read_node):
+    """
+    Add the delivery graph of a plan below read_node (an existing node or a spec)
+    to builder: plate metadata (sidecar + ModifyMetaData, or original plate
+    Read + CopyMetaData) and the Write.
+    Returns a dict of node specs, or None if the plate metadata can't be read.
+    """
+    xpos, ypos = nuke_graph.position(read_node)
+    if USE_SIDECAR_METADATA and plan.plate_sequence:
+        # Inject the plate metadata from its sidecar so the render only reads the comp frames
+        plate_metadata_values = plate_metadata.get_plate_metadata(
+            plan.plate_sequence, os.path.join(LOG_FILE_DIR, plate_metadata.SIDECAR_DIR_NAME))
+        if plate_metadata_values is None:
+            return None
+        metadata_script = plate_metadata.modify_metadata_script(
+            *plate_metadata_values, plan.plate_sequence.first, plan.plate_sequence.last)
+        metadata_node = builder.add("ModifyMetaData", [('metadata', nuke_graph.Raw("{" + metadata_script + "}"))],
+                                    inputs=[read_node], name=f"PlateMetaData_{plan.source_shot}",
+                                    position=(xpos + 100, ypos + 50))
+        specs = {"plate_metadata": metadata_node}
+    else:
+        read_knobs = [('file', plan.plate_path), ('file_type', 'exr')]
+        # Frame range of the original plate sequence, or of the comp if it wasn't found
+        if plan.plate_sequence:
+            first, last = plan.plate_sequence.first, plan.plate_sequence.last
+        elif not isinstance(read_node, nuke_graph.NodeSpec) and 'first' in read_node.knobs() and 'last' in read_node.knobs():
+            first, last = int(read_node['first'].value()), int(read_node['last'].value())
+        else:
+            first = last = None
+        if first is not None:
+            read_knobs += [('first', first), ('last', last), ('origfirst', first), ('origlast', last)]
+        read_knobs.append(('origset', True))
+        if not isinstance(read_node, nuke_graph.NodeSpec) and 'format' in read_node.knobs():
+            read_knobs.append(('format', read_node['format'].value()))
+        original_read = builder.add("Read", read_knobs, name=f"OriginalPlate_{plan.source_shot}",
+                                    position=(xpos + 100, ypos))
+        metadata_node = builder.add("CopyMetaData", inputs=[read_node, original_read],
+                                    name=f"CopyMetaData_{plan.source_shot}",
+                                    position=(xpos + 200, ypos + 50))
+        specs = {"original_read": original_read, "copy_metadata": metadata_node}
     
-    log_delivery(
-        source_shot=shot_name,
-        delivery_shot=original_shot,
-        source_version=source_version,
-        delivery_version=delivery_version,
-        source_path=file_path,
-        delivery_path=output_path
-    )
+    write_xpos, write_ypos = nuke_graph.position(metadata_node)
+    specs["write_node"] = builder.add("Write", delivery_write_knobs(plan.output_path), inputs=[metadata_node],
+                                      name=f"Write_{plan.delivery_shot}_{plan.delivery_version}",
+                                      position=(write_xpos, write_ypos + 100))
+    return specs
+
+def materialize_deliveries(plans, read_nodes=None, progress_task=None):
+    """
+    Create the nodes of planned deliveries with one paste, make their output
+    folders and log them. Without read_nodes, a placeholder source Read is
+    created for every plan. Returns a list of (success, message, nodes) like
+    process_single_plate, in the order of plans.
+    With a nuke.ProgressTask, progress is reported and a cancel before the
+    paste skips the remaining plans.
+    """
+    builder = GraphBuilder()
+    planned = []
+    for index, plan in enumerate(plans):
+        if progress_task:
+            if progress_task.isCancelled():
+                break
+            progress_task.setProgress(int(index * 50 / len(plans)))
+            progress_task.setMessage(f"Planning nodes for {plan.source_shot}...")
+        for warning in plan.warnings:
+            print(f"WARNING: {plan.source_shot}: {warning}")
+        if read_nodes:
+            read_node = read_nodes[index]
+        else:
+            # Source Reads of a list batch are laid out in a row, 300px apart
+            read_node = builder.add("Read", [('file', plan.source_path)], name=f"DummyRead_{plan.source_shot}",
+                                    position=(index * 300, 0))
+        planned.append((plan, read_node, add_delivery_nodes(builder, plan, read_node)))
     
-    return True, f"Successfully processed {shot_name} to {original_shot}", {
-        "original_read": original_read,
-        "copy_metadata": copy_metadata,
-        "write_node": write_node
-    }
+    if progress_task:
+        progress_task.setMessage(f"Creating {len(planned)} delivery trees...")
+    created = builder.build()
+    results = []
+    for index, (plan, read_node, specs) in enumerate(planned):
+        if progress_task:
+            progress_task.setProgress(50 + int(index * 50 / len(planned)))
+            progress_task.setMessage(f"Logging {plan.source_shot}...")
+        if specs is None:
+            if isinstance(read_node, nuke_graph.NodeSpec):
+                nuke.delete(created[read_node])
+            results.append((False, f"Could not read metadata from original plate: {plan.plate_path}", {}))
+            continue
+        if not os.path.exists(plan.output_dir):
+            os.makedirs(plan.output_dir)
+        log_delivery(**plan.log_fields)
+        message = f"Successfully processed {plan.source_shot} to {plan.delivery_shot}"
+        if plan.warnings:
+            message += " (WARNING: " + "; ".join(plan.warnings) + ")"
+        results.append((True, message, {key: created[spec] for key, spec in specs.items()}))
+    # Plans skipped by a cancel
+    results += [(False, "Batch processing cancelled", {}) for plan in plans[len(planned):]]
+    return results
 
 def process_plate():
     """
@@ -455,9 +439,10 @@ def batch_process_plates():
     if not selected_nodes:
         return batch_process_from_list()
     results = []
-    for read_node in selected_nodes:
-        success, message, nodes = process_single_plate(read_node)
-        results.append((read_node.name(), success, message))
+    with delivery_batch():
+        for read_node in selected_nodes:
+            success, message, nodes = process_single_plate(read_node)
+            results.append((read_node.name(), success, message))
     summary = "Batch Processing Results:\n\n"
     for node_name, success, message in results:
         status = "✓ Success" if success else "✗ Failed"
@@ -471,11 +456,11 @@ def batch_process_from_list():
     shot_choices = sorted(list(SHOT_MAPPING.keys()))
     shot_dialog = nuke.Panel("Select Shots to Process")
     shot_dialog.addMultilineTextInput("Shots", "\n".join(shot_choices[:10]) + "\n\n(Edit to include only the shots you want)")
-    shot_dialog.addBooleanCheckBox("Overwrite Existing v001", False)
+    shot_dialog.addBooleanCheckBox("Skip Already Delivered Shots", False)
     if not shot_dialog.show():
         return
     selected_shots_text = shot_dialog.value("Shots")
-    overwrite_existing = shot_dialog.value("Overwrite Existing v001")
+    skip_delivered = shot_dialog.value("Skip Already Delivered Shots")
     selected_shots = [shot.strip() for shot in selected_shots_text.split('\n') if shot.strip() in SHOT_MAPPING]
     if not selected_shots:
         nuke.message("No valid shots selected for processing.")
@@ -485,43 +470,35 @@ def batch_process_from_list():
         confirm_msg += f"• {shot} -> {SHOT_MAPPING[shot]}\n"
     if len(selected_shots) > 10:
         confirm_msg += f"• ... and {len(selected_shots) - 10} more\n"
-    if overwrite_existing:
-        confirm_msg += "\nWARNING: Overwriting existing v001 deliveries!"
+    if skip_delivered:
+        confirm_msg += "\nShots already delivered as the same version are skipped."
+    else:
+        confirm_msg += "\nWARNING: Shots already delivered as the same version are overwritten!"
     confirm_msg += "\n\nDo you want to continue?"
     if not nuke.ask(confirm_msg):
         return
-    version_choice = 2 if overwrite_existing else 1
-    results = []
-    processed_count = 0
+    
+    # Plan every shot first without touching the node graph, then build all of them in one undo step
+    plans, failures = delivery_plan.plan_deliveries(
+        [LIST_SOURCE_PATH.format(shot=shot) for shot in selected_shots],
+        SOURCE_PLATES_DIR, OUTPUT_BASE_DIR, get_latest_delivered_version, skip_delivered)
+    results = [(extract_shot_name(failure.source_path), False, failure.message) for failure in failures]
     progress_task = nuke.ProgressTask("Batch Processing")
-    progress_task.setMessage("Setting up...")
-    try:
-        for i, shot in enumerate(selected_shots):
-            if progress_task.isCancelled():
-                nuke.message("Batch processing cancelled by user.")
-                break
-            progress_task.setProgress(int((i / float(len(selected_shots))) * 100))
-            progress_task.setMessage(f"Processing {shot}...")
-            dummy_read = nuke.createNode("Read", inpanel=False)
-            dummy_read['file'].setValue(f"/path/to/{shot}/dummy_filename.exr")
-            dummy_read.setName(f"DummyRead_{shot}")
-            try:
-                success, message, nodes = process_single_plate(
-                    dummy_read, 
-                    batch_mode=True,
-                    version_choice_override=version_choice
-                )
-                results.append((shot, success, message))
-                processed_count += 1 if success else 0
-                if not success:
-                    nuke.delete(dummy_read)
-            except Exception as e:
-                import traceback
-                error_msg = traceback.format_exc()
-                results.append((shot, False, f"Error: {str(e)}\n{error_msg}"))
-                nuke.delete(dummy_read)
-    finally:
-        del progress_task
+    undo = nuke.Undo()
+    undo.begin("Batch Delivery")
+    with delivery_batch():
+        try:
+            delivered = materialize_deliveries(plans, progress_task=progress_task)
+        except Exception as e:
+            import traceback
+            error_msg = traceback.format_exc()
+            delivered = [(False, f"Error: {str(e)}\n{error_msg}", {}) for plan in plans]
+        finally:
+            undo.end()
+            del progress_task
+    for plan, (success, message, nodes) in zip(plans, delivered):
+        results.append((plan.source_shot, success, message))
+    processed_count = sum(1 for success, message, nodes in delivered if success)
     summary = f"Batch Processing Complete\n\nSuccessfully processed: {processed_count}/{len(selected_shots)} shots\n\n"
     for shot, success, message in results:
         status = "✓ Success" if success else "✗ Failed"
@@ -532,6 +509,8 @@ def batch_process_from_list():
 menu = nuke.menu('Nuke').addMenu('Plate Processor')
 menu.addCommand('Process Plates (All Selected Reads)', process_plate)
 menu.addCommand('Batch Process Multiple Plates', batch_process_plates)
+menu.addCommand('Import CSV Log into Ledger', import_csv_log_to_ledger)
+menu.addCommand('Compact Delivery Log', compact_delivery_log)
 menu.addCommand('Edit Settings', 'nuke.tab("Preferences").showPanel("PlateProcessor")', '')
 
 if __name__ == "__main__":
@@ -11,105 +11,32 @@ This script combines plate finding and delivery functionalities:
 
 import nuke
 import os
-import re
 import datetime
-import csv
+import contextlib
+import sys
 
-# Shot mapping dictionary
-SHOT_MAPPING = {
-    'ME1_0050': 'EP01_G_050',
-    'ME1_0060': 'EP01_G_060',
-    'ME1_0070': 'EP01_G_070',
-    'ME1_0080': 'EP01_G_080',
-    'ME1_0090': 'EP01_G_090',
-    'ME1_0100': 'EP01_D_100',
-    'ME1_0110': 'EP01_G_110',
-    'ME1_0120': 'EP01_D_120',
-    'ME1_0130': 'EP01_D_130',
-    'ME1_0140': 'EP01_D_140',
-    'ME1_0150': 'EP01_D_150',
-    'ME1_0160': 'EP01_D_160',
-    'ME1_0170': 'EP01_D_170',
-    'ME1_0180': 'EP01_D_180',
-    'ME1_0190': 'EP01_D_190',
-    'ME1_0200': 'EP01_D_200',
-    'ME1_0210': 'EP01_D_210',
-    'ME1_0220': 'EP01_G_220',
-    'ME1_0230': 'EP01_G_230',
-    'ME1_0240': 'EP01_G_240',
-    'ME1_0250': 'EP01_G_250',
-    'ME1_0260': 'EP01_G_260',
-    'ME1_0270': 'EP01_G_270',
-    'ME1_0275': 'EP01_G_275',
-    'ME1_0280': 'EP01_G_280',
-    'ME1_0290': 'EP01_G_290',
-    'ME1_0300': 'EP01_G_300',
-    'ME1_0310': 'EP01_G_310',
-    'ME1_0320': 'EP01_G_320',
-    'ME1_0330': 'EP01_G_330',
-    'ME1_0340': 'EP01_G_340',
-    'ME1_0350': 'EP01_G_350',
-    'ME1_0360': 'EP01_D_360',
-    'ME1_0370': 'EP01_D_370',
-    'ME1_0380': 'EP01_D_380',
-    'ME1_0390': 'EP01_D_390',
-    'ME1_0400': 'EP01_D_400',
-    'ME1_0410': 'EP01_D_410',
-    'ME1_0420': 'EP01_D_420',
-    'ME1_0430': 'EP01_D_430',
-    'ME1_0440': 'EP01_G_440',
-    'ME1_0470': 'EP01_D_470',
-    'ME1_0480': 'EP01_D_480',
-    'ME1_0490': 'EP01_D_490',
-    'ME1_0500': 'EP01_G_500',
-    'ME1_0510': 'EP01_D_510',
-    'ME1_0520': 'EP01_D_520',
-    'ME1_0570': 'EP01_G_570',
-    'ME1_0580': 'EP01_D_580',
-    'ME1_0590': 'EP01_G_590',
-    'ME1_0700': 'EP01_G_700',
-    'ME1_0710': 'EP01_G_710',
-    'ME1_0720': 'EP01_G_720',
-    'ME1_0730': 'EP01_D_730',
-    'ME1_0740': 'EP01_D_740',
-    'ME1_0750': 'EP01_G_750',
-    'ME1_0760': 'EP01_G_760',
-    'ME1_0770': 'EP01_G_770',
-    'ME1_0780': 'EP01_G_780',
-    'ME1_0790': 'EP01_D_790',
-    'ME1_0800': 'EP01_D_800',
-    'ME1_0810': 'EP01_D_810',
-    'ME1_0830': 'EP01_D_830',
-    'ME1_0832': 'EP01_D_832',
-    'ME1_0850': 'EP01_G_850',
-    'ME1_0860': 'EP01_G_860',
-    'ME1_0870': 'EP01_G_870',
-    'ME1_0880': 'EP01_G_880',
-    'ME1_0900': 'EP01_G_900',
-    'ME1_0910': 'EP01_G_910',
-    'ME1_0920': 'EP01_G_920',
-    'ME1_0930': 'EP01_G_930',
-    'ME1_0940': 'EP01_F_940',
-    'ME1_0950': 'EP01_F_950',
-    'ME1_0960': 'EP01_F_960',
-    'ME1_0970': 'EP01_F_970',
-    'ME1_0980': 'EP01_F_980',
-    'ME1_0990': 'EP01_D_990',
-    'ME1_1000': 'EP01_D_1000',
-    'ME1_1010': 'EP01_D_1010',
-    'ME1_1020': 'EP01_D_1020',
-    'ME1_1030': 'EP01_D_1030',
-    'ME1_1040': 'EP01_D_1040',
-    'ME1_1050': 'EP01_G_1050',
-    'ME1_1060': 'EP01_G_1060',
-    'ME1_9990': 'EP01_G_9990'
-}
+# The delivery modules sit next to this script, the shared Moloch modules
+# (moloch_shots.py, ...) one folder up
+if '__file__' in globals():
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import delivery_log
+import plate_metadata
+from moloch_shots import SHOT_MAPPING, ShotId
+from moloch_paths import extract_shot_name, extract_version
+from moloch_plates import get_plate_index
+from moloch_sequences import find_sequence, format_frame_ranges
 
 # Default directory and file settings
 DEFAULT_OUTPUT_BASE_DIR = "Y:/MOLOCH_02426/sources/Users/MT/tmp"
 DEFAULT_SOURCE_PLATES_DIR = "Y:/MOLOCH_02426/sources/_raw_material"
 DEFAULT_LOG_FILE_DIR = "Y:/MOLOCH_02426/sources/Users/MT/logs"
 DEFAULT_LOG_FILE_NAME = "nuke_delivery_log.csv"
+DEFAULT_LOG_BACKEND = "csv"
+DEFAULT_LEDGER_FILE_NAME = "nuke_delivery_log.sqlite"
+LOG_BACKENDS = ["csv", "sqlite"]
+DEFAULT_USE_SIDECAR_METADATA = False
 
 def setup_user_variables():
     """
@@ -146,12 +73,34 @@ def setup_user_variables():
         user_prefs.addKnob(log_dir_knob)
         user_prefs.addKnob(log_file_knob)
     
+    # Create the log backend knobs separately so existing preferences pick them up
+    if not user_prefs.knob("plateProcessorLogBackend"):
+        backend_knob = nuke.Enumeration_Knob('plateProcessorLogBackend', 'Log Backend', LOG_BACKENDS)
+        backend_knob.setValue(DEFAULT_LOG_BACKEND)
+        backend_knob.setTooltip('csv: append to the CSV log file\nsqlite: indexed ledger file in the log directory')
+        
+        ledger_file_knob = nuke.String_Knob('plateProcessorLedgerFileName', 'Ledger File Name', DEFAULT_LEDGER_FILE_NAME)
+        ledger_file_knob.setTooltip('Name of the SQLite ledger used by the sqlite log backend')
+        
+        user_prefs.addKnob(backend_knob)
+        user_prefs.addKnob(ledger_file_knob)
+    
+    # Plate metadata mode: sidecar + ModifyMetaData instead of a second plate Read + CopyMetaData
+    if not user_prefs.knob("plateProcessorSidecarMetadata"):
+        sidecar_knob = nuke.Boolean_Knob('plateProcessorSidecarMetadata', 'Use Plate Metadata Sidecars', DEFAULT_USE_SIDECAR_METADATA)
+        sidecar_knob.setTooltip('Inject the original plate metadata from a cached sidecar with ModifyMetaData\n'
+                                'instead of reading the plate again through CopyMetaData')
+        user_prefs.addKnob(sidecar_knob)
+    
     # Get current values (or defaults if not set)
     config = {
         'OUTPUT_BASE_DIR': user_prefs['plateProcessorOutputDir'].value() or DEFAULT_OUTPUT_BASE_DIR,
         'SOURCE_PLATES_DIR': user_prefs['plateProcessorSourceDir'].value() or DEFAULT_SOURCE_PLATES_DIR,
         'LOG_FILE_DIR': user_prefs['plateProcessorLogDir'].value() or DEFAULT_LOG_FILE_DIR,
-        'LOG_FILE_NAME': user_prefs['plateProcessorLogFileName'].value() or DEFAULT_LOG_FILE_NAME
+        'LOG_FILE_NAME': user_prefs['plateProcessorLogFileName'].value() or DEFAULT_LOG_FILE_NAME,
+        'LOG_BACKEND': user_prefs['plateProcessorLogBackend'].value() or DEFAULT_LOG_BACKEND,
+        'LEDGER_FILE_NAME': user_prefs['plateProcessorLedgerFileName'].value() or DEFAULT_LEDGER_FILE_NAME,
+        'USE_SIDECAR_METADATA': bool(user_prefs['plateProcessorSidecarMetadata'].value())
     }
     
     return config
@@ -169,95 +118,150 @@ SOURCE_PLATES_DIR = CONFIG['SOURCE_PLATES_DIR']
 LOG_FILE_DIR = CONFIG['LOG_FILE_DIR']
 LOG_FILE_NAME = CONFIG['LOG_FILE_NAME']
 
-def extract_shot_name(file_path):
-    """
-    Extract shot name from file path.
-    Should work with different path formats.
-    """
-    # Try to find ME1_XXXX pattern in the path
-    match = re.search(r'(ME1_\d{4})', file_path)
-    if match:
-        return match.group(1)
-    return None
+# Log backend ("csv" or "sqlite")
+LOG_BACKEND = CONFIG['LOG_BACKEND']
+LEDGER_FILE_NAME = CONFIG['LEDGER_FILE_NAME']
 
-def extract_version(file_path):
+# Plate metadata from sidecars instead of CopyMetaData
+USE_SIDECAR_METADATA = CONFIG['USE_SIDECAR_METADATA']
+
+def get_ledger():
     """
-    Extract the version number from the file path if available.
-    Expected format: .../something_vXXX/... or .../something_vXXX.ext
+    Return the SQLite delivery ledger when the sqlite log backend is selected.
+    Returns None for the CSV backend.
     """
-    match = re.search(r'v(\d{3})', file_path)
-    if match:
-        return f"v{match.group(1)}"
-    return None
+    if LOG_BACKEND != "sqlite":
+        return None
+    return delivery_log.get_ledger(os.path.join(LOG_FILE_DIR, LEDGER_FILE_NAME))
 
 def get_latest_delivered_version(shot_name):
     """
     Check the log file to find the latest version delivered for a specific shot.
     Returns a tuple of (latest_version, version_info) or (None, None) if no delivery found.
     """
+    # Indexed lookup when the ledger is in use
+    ledger = get_ledger()
+    if ledger:
+        return ledger.get_latest_delivered_version(shot_name)
+    
     log_file_path = os.path.join(LOG_FILE_DIR, LOG_FILE_NAME)
     
-    # Check if the log file exists
-    if not os.path.exists(log_file_path):
-        # Create the directory if it doesn't exist
-        if not os.path.exists(LOG_FILE_DIR):
-            os.makedirs(LOG_FILE_DIR)
-            
-        # Create the log file with headers
-        with open(log_file_path, 'w', newline='') as csvfile:
-            fieldnames = ['timestamp', 'source_shot', 'delivery_shot', 'source_version', 'delivery_version', 'source_path', 'delivery_path']
-            writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-            writer.writeheader()
-        
-        return None, None
+    # Create the log file with headers if it doesn't exist
+    delivery_log.ensure_csv_log(log_file_path)
+    
+    # Only the rows appended since the previous lookup are parsed
+    return delivery_log.get_latest_delivered_version(log_file_path, shot_name)
+
+def log_delivery(source_shot, delivery_shot, source_version, delivery_version, source_path, delivery_path):
+    """
+    Log the delivery information to the CSV file or the SQLite ledger.
+    """
+    # Get the current timestamp
+    timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
     
-    # Read the log file to find the latest version
-    latest_version = None
-    version_info = None
+    row = {
+        'timestamp': timestamp,
+        'source_shot': source_shot,
+        'delivery_shot': delivery_shot,
+        'source_version': source_version,
+        'delivery_version': delivery_version,
+        'source_path': source_path,
+        'delivery_path': delivery_path
+    }
     
-    with open(log_file_path, 'r') as csvfile:
-        reader = csv.DictReader(csvfile)
-        for row in reader:
-            if row['delivery_shot'] == shot_name:
-                if latest_version is None or row['delivery_version'] > latest_version:
-                    latest_version = row['delivery_version']
-                    version_info = row
+    # Insert into the ledger when it is in use
+    ledger = get_ledger()
+    if ledger:
+        ledger.log_delivery(row)
+        return
     
-    return latest_version, version_info
+    # Append under the log lock (buffered while a delivery batch is open)
+    log_file_path = os.path.join(LOG_FILE_DIR, LOG_FILE_NAME)
+    delivery_log.log_delivery_row(log_file_path, row)
 
-def log_delivery(source_shot, delivery_shot, source_version, delivery_version, source_path, delivery_path):
+@contextlib.contextmanager
+def delivery_batch():
+    """
+    Collect the log rows of a whole batch and write them once at the end:
+    a single locked append for the CSV log, a single transaction for the ledger.
+    """
+    ledger = get_ledger()
+    if ledger:
+        with ledger.batch():
+            yield
+    else:
+        with delivery_log.DeliveryLogBatch(os.path.join(LOG_FILE_DIR, LOG_FILE_NAME)):
+            yield
+
+def import_csv_log_to_ledger():
     """
-    Log the delivery information to a CSV file.
+    One-time import of the existing CSV delivery log into the SQLite ledger.
     """
     log_file_path = os.path.join(LOG_FILE_DIR, LOG_FILE_NAME)
+    ledger_path = os.path.join(LOG_FILE_DIR, LEDGER_FILE_NAME)
     
-    # Create the directory if it doesn't exist
-    if not os.path.exists(LOG_FILE_DIR):
-        os.makedirs(LOG_FILE_DIR)
-    
-    # Check if the log file exists, create it with headers if not
     if not os.path.exists(log_file_path):
-        with open(log_file_path, 'w', newline='') as csvfile:
-            fieldnames = ['timestamp', 'source_shot', 'delivery_shot', 'source_version', 'delivery_version', 'source_path', 'delivery_path']
-            writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-            writer.writeheader()
+        nuke.message(f"CSV log not found: {log_file_path}")
+        return
+    if not nuke.ask(f"Import {log_file_path}\ninto {ledger_path}?"):
+        return
     
-    # Get the current timestamp
-    timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    try:
+        imported = delivery_log.get_ledger(ledger_path).import_csv(log_file_path)
+    except Exception as e:
+        nuke.message(f"Import failed: {str(e)}")
+        return
     
-    # Log the delivery
-    with open(log_file_path, 'a', newline='') as csvfile:
-        fieldnames = ['timestamp', 'source_shot', 'delivery_shot', 'source_version', 'delivery_version', 'source_path', 'delivery_path']
-        writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-        writer.writerow({
-            'timestamp': timestamp,
-            'source_shot': source_shot,
-            'delivery_shot': delivery_shot,
-            'source_version': source_version,
-            'delivery_version': delivery_version,
-            'source_path': source_path,
-            'delivery_path': delivery_path
-        })
+    nuke.message(f"Imported {imported} deliveries into {ledger_path}.\n\nSet 'Log Backend' to sqlite in the Plate Processor settings to use it.")
+
+def compact_delivery_log():
+    """
+    Move old rows of the CSV log into monthly archives and refresh the per-shot snapshot,
+    so lookups only read the snapshot plus the recent live rows.
+    """
+    if get_ledger():
+        nuke.message("The SQLite ledger is indexed and does not need compacting.")
+        return
+    
+    log_file_path = os.path.join(LOG_FILE_DIR, LOG_FILE_NAME)
+    keep_days = nuke.getInput("Keep deliveries from the last N days in the live log:", str(delivery_log.COMPACT_KEEP_DAYS))
+    if keep_days is None:
+        return  # User cancelled
+    
+    try:
+        archived, kept, shots = delivery_log.compact_log(log_file_path, int(keep_days))
+    except Exception as e:
+        nuke.message(f"Compaction failed: {str(e)}")
+        return
+    
+    nuke.message(f"Delivery log compacted.\n\nArchived rows: {archived}\nRows kept in live log: {kept}\nShots in snapshot: {shots}")
+
+def get_plate_warnings(read_node, plate_sequence):
+    """
+    Check the original plate sequence before it is used for a delivery.
+    
+    Args:
+        read_node: The comp Read node being delivered
+        plate_sequence: moloch_sequences.Sequence of the original plate
+        
+    Returns:
+        list: Warning messages (missing frames, comp range outside the plate range)
+    """
+    warnings = []
+    
+    # Missing frames inside the plate
+    if plate_sequence.holes:
+        warnings.append(f"original plate is missing {plate_sequence.missing} frames: "
+                        f"{format_frame_ranges(plate_sequence.holes)}")
+    
+    # Comp frames that have no original plate frame to copy metadata from
+    if 'first' in read_node.knobs() and 'last' in read_node.knobs():
+        comp_first = int(read_node['first'].value())
+        comp_last = int(read_node['last'].value())
+        if comp_first < plate_sequence.first or comp_last > plate_sequence.last:
+            warnings.append(f"comp range {comp_first}-{comp_last} is outside the original plate range "
+                            f"{plate_sequence.first}-{plate_sequence.last}")
+    return warnings
 
 def process_single_plate(read_node, batch_mode=False, version_choice_override=None):
     """
@@ -288,67 +292,104 @@ def process_single_plate(read_node, batch_mode=False, version_choice_override=No
         return False, f"Could not extract shot name from {file_path}", {}
     
     # Check if shot is in the mapping dictionary
-    if shot_name not in SHOT_MAPPING:
+    shot_id = ShotId.from_source(shot_name)
+    if not shot_id:
         if not batch_mode:
             nuke.message(f"Shot {shot_name} not found in the mapping dictionary.")
         return False, f"Shot {shot_name} not found in the mapping dictionary.", {}
     
     # Get the original shot name from the dictionary
-    original_shot = SHOT_MAPPING[shot_name]
+    original_shot = shot_id.client_name
     
-    # Construct the original plate path
+    # Look up the original plate folder in the raw material index
     # Format: Y:/MOLOCH_02426/sources/_raw_material/EP01_G_0230/EP01_G_0230.####.exr
-    # Need to add a leading zero to match the format in the original path
-    shot_number = original_shot.split('_')[-1]
-    original_shot_with_zero = f"{original_shot[:6]}_0{shot_number}"
-    original_plate_path = f"{SOURCE_PLATES_DIR}/{original_shot_with_zero}/{original_shot_with_zero}.####.exr"
-    
-    # Check if original plate directory exists
-    source_dir = os.path.dirname(original_plate_path.replace("####", "0001"))
-    if not os.path.exists(source_dir):
+    # The folder is listed once per session (and again when it changes), so a batch
+    # doesn't stat the network share for every shot
+    plate_folder = get_plate_index(SOURCE_PLATES_DIR).find_plate_folder(shot_id, layers=(None,))
+    if not plate_folder:
+        source_dir = f"{SOURCE_PLATES_DIR}/{shot_id.plate_folder}"
         if not batch_mode:
             nuke.message(f"Original plate directory not found: {source_dir}")
         return False, f"Original plate directory not found: {source_dir}", {}
-    
-    # Create a new Read node with the original plate path
-    original_read = nuke.createNode("Read")
-    
-    # Set the file path
-    original_read['file'].setValue(original_plate_path)
-    original_read['file_type'].setValue('exr')
-    
-    # Try to get frame range info from the source read node if available
-    if 'first' in read_node.knobs() and 'last' in read_node.knobs():
-        original_read['first'].setValue(read_node['first'].value())
-        original_read['last'].setValue(read_node['last'].value())
-        original_read['origfirst'].setValue(read_node['first'].value())
-        original_read['origlast'].setValue(read_node['last'].value())
+    original_plate_path = f"{SOURCE_PLATES_DIR}/{plate_folder}/{plate_folder}.####.exr"
+    
+    # Take the frame range from what is actually on disk and check it for holes
+    # before anything is rendered from it
+    plate_sequence = find_sequence(f"{SOURCE_PLATES_DIR}/{plate_folder}", f"{plate_folder}.####.exr")
+    if plate_sequence:
+        plate_warnings = get_plate_warnings(read_node, plate_sequence)
+    else:
+        # Deliver as before (frame range from the comp), but flag it
+        plate_warnings = [f"no frames matching {plate_folder}.####.exr found, using the comp frame range"]
+    for warning in plate_warnings:
+        print(f"WARNING: {shot_name}: {warning}")
+    
+    if USE_SIDECAR_METADATA and plate_sequence:
+        # Read the plate metadata from its sidecar (extracted from the EXR headers once)
+        plate_metadata_values = plate_metadata.get_plate_metadata(
+            plate_sequence, os.path.join(LOG_FILE_DIR, plate_metadata.SIDECAR_DIR_NAME))
+        if plate_metadata_values is None:
+            if not batch_mode:
+                nuke.message(f"Could not read metadata from original plate: {original_plate_path}")
+            return False, f"Could not read metadata from original plate: {original_plate_path}", {}
+        
+        # Inject it with a ModifyMetaData node, so the render only reads the comp frames
+        metadata_node = nuke.createNode("ModifyMetaData")
+        metadata_node['metadata'].fromScript(plate_metadata.modify_metadata_script(
+            *plate_metadata_values, plate_sequence.first, plate_sequence.last))
+        metadata_node.setInput(0, read_node)
         
-    # Set format if available from the original node
-    if 'format' in read_node.knobs():
-        original_read['format'].setValue(read_node['format'].value())
+        # Position and rename the node
+        metadata_node.setXYpos(read_node.xpos() + 100, read_node.ypos() + 50)
+        metadata_node.setName(f"PlateMetaData_{shot_name}")
+        metadata_nodes = {"plate_metadata": metadata_node}
+    else:
+        # Create a new Read node with the original plate path
+        original_read = nuke.createNode("Read")
+    
+        # Set the file path
+        original_read['file'].setValue(original_plate_path)
+        original_read['file_type'].setValue('exr')
+    
+        # Set the frame range of the original plate sequence (or of the comp if it wasn't found)
+        if plate_sequence:
+            original_read['first'].setValue(plate_sequence.first)
+            original_read['last'].setValue(plate_sequence.last)
+            original_read['origfirst'].setValue(plate_sequence.first)
+            original_read['origlast'].setValue(plate_sequence.last)
+        elif 'first' in read_node.knobs() and 'last' in read_node.knobs():
+            original_read['first'].setValue(read_node['first'].value())
+            original_read['last'].setValue(read_node['last'].value())
+            original_read['origfirst'].setValue(read_node['first'].value())
+            original_read['origlast'].setValue(read_node['last'].value())
         
-    # Set origset to true
-    original_read['origset'].setValue(True)
+        # Set format if available from the original node
+        if 'format' in read_node.knobs():
+            original_read['format'].setValue(read_node['format'].value())
+        
+        # Set origset to true
+        original_read['origset'].setValue(True)
+    
+        # Position the new node
+        original_read.setXYpos(read_node.xpos() + 100, read_node.ypos())
     
-    # Position the new node
-    original_read.setXYpos(read_node.xpos() + 100, read_node.ypos())
+        # Create a CopyMetaData node
+        metadata_node = nuke.createNode("CopyMetaData")
     
-    # Create a CopyMetaData node
-    copy_metadata = nuke.createNode("CopyMetaData")
+        # Connect the CopyMetaData node inputs:
+        # Input 0: Selected read node (that should receive the metadata)
+        # Input 1: Original plate read node (source of the metadata)
+        metadata_node.setInput(0, read_node)
+        metadata_node.setInput(1, original_read)
     
-    # Connect the CopyMetaData node inputs:
-    # Input 0: Selected read node (that should receive the metadata)
-    # Input 1: Original plate read node (source of the metadata)
-    copy_metadata.setInput(0, read_node)
-    copy_metadata.setInput(1, original_read)
+        # Position the CopyMetaData node
+        metadata_node.setXYpos(original_read.xpos() + 100, original_read.ypos() + 50)
     
-    # Position the CopyMetaData node
-    copy_metadata.setXYpos(original_read.xpos() + 100, original_read.ypos() + 50)
+        # Rename the nodes for clarity
+        original_read.setName(f"OriginalPlate_{shot_name}")
+        metadata_node.setName(f"CopyMetaData_{shot_name}")
     
-    # Rename the nodes for clarity
-    original_read.setName(f"OriginalPlate_{shot_name}")
-    copy_metadata.setName(f"CopyMetaData_{shot_name}")
+        metadata_nodes = {"original_read": original_read, "copy_metadata": metadata_node}
     
     # Extract the source version (for logging purposes)
     source_version = extract_version(file_path) or "unknown"
@@ -381,7 +422,7 @@ def process_single_plate(read_node, batch_mode=False, version_choice_override=No
         if version_choice == 0:  # Cancel
             if not batch_mode:
                 nuke.message("Delivery cancelled")
-            return False, "Delivery cancelled", {"original_read": original_read, "copy_metadata": copy_metadata}
+            return False, "Delivery cancelled", metadata_nodes
         elif version_choice == 1:  # Use new version
             delivery_version = next_version
         elif version_choice == 2:  # Overwrite v001
@@ -401,7 +442,7 @@ def process_single_plate(read_node, batch_mode=False, version_choice_override=No
     
     # Create the Write node and connect it to the CopyMetaData node
     write_node = nuke.createNode("Write")
-    write_node.setInput(0, copy_metadata)
+    write_node.setInput(0, metadata_node)
     
     # Set the Write node properties
     write_node['channels'].setValue("all")
@@ -413,7 +454,7 @@ def process_single_plate(read_node, batch_mode=False, version_choice_override=No
     write_node['create_directories'].setValue(True)
     
     # Position the Write node
-    write_node.setXYpos(copy_metadata.xpos(), copy_metadata.ypos() + 100)
+    write_node.setXYpos(metadata_node.xpos(), metadata_node.ypos() + 100)
     write_node.setName(f"Write_{original_shot}_{delivery_version}")
     
     # Log the delivery information
@@ -426,11 +467,11 @@ def process_single_plate(read_node, batch_mode=False, version_choice_override=No
         delivery_path=output_path
     )
     
-    return True, f"Successfully processed {shot_name} to {original_shot}", {
-        "original_read": original_read,
-        "copy_metadata": copy_metadata,
-        "write_node": write_node
-    }
+    # Report plate problems with the result so they show up in the summary
+    message = f"Successfully processed {shot_name} to {original_shot}"
+    if plate_warnings:
+        message += " (WARNING: " + "; ".join(plate_warnings) + ")"
+    return True, message, dict(metadata_nodes, write_node=write_node)
 
 def process_plate():
     """
@@ -464,9 +505,10 @@ def batch_process_plates():
     
     # Process each selected Read node
     results = []
-    for read_node in selected_nodes:
-        success, message, nodes = process_single_plate(read_node)
-        results.append((read_node.name(), success, message))
+    with delivery_batch():
+        for read_node in selected_nodes:
+            success, message, nodes = process_single_plate(read_node)
+            results.append((read_node.name(), success, message))
     
     # Show summary
     summary = "Batch Processing Results:\n\n"
@@ -529,51 +571,52 @@ def batch_process_from_list():
     progress_task = nuke.ProgressTask("Batch Processing")
     progress_task.setMessage("Setting up...")
     
-    try:
-        for i, shot in enumerate(selected_shots):
-            if progress_task.isCancelled():
-                nuke.message("Batch processing cancelled by user.")
-                break
+    with delivery_batch():
+        try:
+            for i, shot in enumerate(selected_shots):
+                if progress_task.isCancelled():
+                    nuke.message("Batch processing cancelled by user.")
+                    break
             
-            # Update progress
-            progress_task.setProgress(int((i / float(len(selected_shots))) * 100))
-            progress_task.setMessage(f"Processing {shot}...")
+                # Update progress
+                progress_task.setProgress(int((i / float(len(selected_shots))) * 100))
+                progress_task.setMessage(f"Processing {shot}...")
             
-            # Create a proper Read node for this shot
-            # Need to create a Read node with a file path that will extract to the correct shot name
-            dummy_read = nuke.createNode("Read", inpanel=False)
-            dummy_read['file'].setValue(f"/path/to/{shot}/dummy_filename.exr")
-            dummy_read.setName(f"DummyRead_{shot}")
+                # Create a proper Read node for this shot
+                # Need to create a Read node with a file path that will extract to the correct shot name
+                dummy_read = nuke.createNode("Read", inpanel=False)
+                dummy_read['file'].setValue(f"/path/to/{shot}/dummy_filename.exr")
+                dummy_read.setName(f"DummyRead_{shot}")
             
-            # Process the shot with batch mode enabled and version override
-            try:
-                success, message, nodes = process_single_plate(
-                    dummy_read, 
-                    batch_mode=True,
-                    version_choice_override=version_choice
-                )
-                results.append((shot, success, message))
-                processed_count += 1 if success else 0
+                # Process the shot with batch mode enabled and version override
+                try:
+                    success, message, nodes = process_single_plate(
+                        dummy_read, 
+                        batch_mode=True,
+                        version_choice_override=version_choice
+                    )
+                    results.append((shot, success, message))
+                    processed_count += 1 if success else 0
+                
+                    # If processing failed, clean up the nodes
+                    if not success:
+                        # Clean up the nodes
+                        for node in [dummy_read]:
+                            if node:
+                                nuke.delete(node)
+                            
+                except Exception as e:
+                    import traceback
+                    error_msg = traceback.format_exc()
+                    results.append((shot, False, f"Error: {str(e)}\n{error_msg}"))
                 
-                # If processing failed, clean up the nodes
-                if not success:
                     # Clean up the nodes
                     for node in [dummy_read]:
                         if node:
                             nuke.delete(node)
-                            
-            except Exception as e:
-                import traceback
-                error_msg = traceback.format_exc()
-                results.append((shot, False, f"Error: {str(e)}\n{error_msg}"))
-                
-                # Clean up the nodes
-                for node in [dummy_read]:
-                    if node:
-                        nuke.delete(node)
-    finally:
-        # Make sure to get rid of the progress bar
-        del progress_task
+        finally:
+            # Make sure to get rid of the progress bar
+            del progress_task
     
     # Show summary
     summary = f"Batch Processing Complete\n\n"
@@ -589,6 +632,8 @@ def batch_process_from_list():
 menu = nuke.menu('Nuke').addMenu('Plate Processor')
 menu.addCommand('Process Plate (Find, Copy Metadata, Create Write)', process_plate)
 menu.addCommand('Batch Process Multiple Plates', batch_process_plates)
+menu.addCommand('Import CSV Log into Ledger', import_csv_log_to_ledger)
+menu.addCommand('Compact Delivery Log', compact_delivery_log)
 menu.addCommand('Edit Settings', 'nuke.tab("Preferences").showPanel("PlateProcessor")', '')
 
 # If you want to run this when the script is directly executed
@@ -0,0 +1,605 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Delivery Log Backends
+Storage for the plate processor delivery log, shared by NukeDelivery.py and
+DeliveryNuke_v2.py. This module does not import nuke, so it can also be used
+from the command line.
+
+Backends:
+- CSV:    the original nuke_delivery_log.csv, read through an in-process cache
+          that only parses rows appended since the previous lookup
+- SQLite: an indexed ledger (nuke_delivery_log.sqlite) with one row per delivery
+
+Writes to the CSV log take an advisory lock on <log>.lock. Inside a batch
+(DeliveryLogBatch / DeliveryLedger.batch) rows are buffered and written once
+when the batch ends.
+
+The CSV log can be compacted: rows older than a few days are moved to
+monthly archive files (<log>_archive_YYYY-MM.csv) and the latest row per
+delivery_shot is kept in a snapshot (<log>_snapshot.csv). Lookups read the
+snapshot and then only the live log. A compaction writes all its files
+next to their targets first, lists them in a journal (<log>_compact.pending)
+and then moves them in place; whoever takes the log lock next finishes the
+moves of a compaction that was interrupted.
+
+Usage:
+    python delivery_log.py import-csv <log.csv> <ledger.sqlite>
+    python delivery_log.py compact <log.csv> [--keep-days 14]
+"""
+
+import io
+import os
+import sys
+import csv
+import glob
+import time
+import locale
+import datetime
+import sqlite3
+import shutil
+import argparse
+import contextlib
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+    import msvcrt
+
+LOG_FIELDNAMES = ['timestamp', 'source_shot', 'delivery_shot', 'source_version', 'delivery_version', 'source_path', 'delivery_path']
+# The snapshot also counts the archived deliveries of each shot
+SNAPSHOT_FIELDNAMES = LOG_FIELDNAMES + ['delivery_count']
+
+# Seconds a writer waits for another artist's transaction before giving up
+LEDGER_BUSY_TIMEOUT = 30
+# WAL mode for ledgers on a local disk; ledgers on a share always use the rollback journal
+LEDGER_WAL_ON_LOCAL_DISK = True
+LOG_LOCK_TIMEOUT = 30
+
+# Rows newer than this stay in the live log when it is compacted
+COMPACT_KEEP_DAYS = 14
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+def snapshot_path(log_file_path):
+    """Path of the per-shot snapshot written by compact_log()."""
+    base, ext = os.path.splitext(log_file_path)
+    return f"{base}_snapshot{ext}"
+
+
+def archive_path(log_file_path, month):
+    """Path of the archive file for a month ("YYYY-MM")."""
+    base, ext = os.path.splitext(log_file_path)
+    return f"{base}_archive_{month}{ext}"
+
+
+def archive_paths(log_file_path):
+    """Paths of all monthly archive files of a log, oldest month first."""
+    base, ext = os.path.splitext(log_file_path)
+    return sorted(glob.glob(f"{glob.escape(base)}_archive_[0-9][0-9][0-9][0-9]-[0-9][0-9]{glob.escape(ext)}"))
+
+
+def read_log_rows(log_file_path):
+    """
+    Every delivery row of a compacted or uncompacted log: the archived rows
+    (oldest month first) followed by the live log. Raises RuntimeError if the
+    archives hold fewer rows than the snapshot counts, i.e. some are missing.
+    """
+    def read_rows(path):
+        if not os.path.exists(path):
+            return []
+        with open(path, 'r', newline='') as csvfile:
+            return list(csv.DictReader(csvfile))
+
+    with lock_log(log_file_path):
+        rows = []
+        for path in archive_paths(log_file_path):
+            rows.extend(read_rows(path))
+        expected = sum(int(row.get('delivery_count') or 0) for row in read_rows(snapshot_path(log_file_path)))
+        if len(rows) < expected:
+            raise RuntimeError(f"The archives of {log_file_path} hold {len(rows)} rows but its snapshot "
+                               f"counts {expected} archived deliveries")
+        rows.extend(read_rows(log_file_path))
+    return rows
+
+
+def compact_journal_path(log_file_path):
+    """Path of the journal of a compaction whose files are not all moved in place yet."""
+    base, ext = os.path.splitext(log_file_path)
+    return f"{base}_compact.pending"
+
+
+def _finish_compaction(log_file_path):
+    """Move the files of an interrupted compaction in place (under the log lock)."""
+    journal = compact_journal_path(log_file_path)
+    if not os.path.exists(journal):
+        return
+    with open(journal, 'r', encoding='utf-8') as journal_file:
+        paths = [line.rstrip('\n') for line in journal_file if line.strip()]
+    for path in paths:
+        # Files moved before the interruption have no temp file left
+        if os.path.exists(path + '.tmp'):
+            os.replace(path + '.tmp', path)
+    os.remove(journal)
+
+
+def ensure_csv_log(log_file_path):
+    """
+    Create the CSV log (and its directory) with a header row if it doesn't exist.
+    Returns True if the file was created.
+    """
+    if os.path.exists(log_file_path):
+        return False
+    log_dir = os.path.dirname(log_file_path)
+    if log_dir and not os.path.exists(log_dir):
+        os.makedirs(log_dir)
+    with open(log_file_path, 'w', newline='') as csvfile:
+        csv.DictWriter(csvfile, fieldnames=LOG_FIELDNAMES).writeheader()
+    return True
+
+
+@contextlib.contextmanager
+def lock_log(log_file_path, timeout=LOG_LOCK_TIMEOUT):
+    """
+    Hold an exclusive advisory lock on <log_file_path>.lock.
+    Every writer of the CSV log goes through this lock, so rows written by
+    different artists never interleave.
+    """
+    log_dir = os.path.dirname(log_file_path)
+    if log_dir and not os.path.exists(log_dir):
+        os.makedirs(log_dir)
+    lock_file = open(log_file_path + '.lock', 'a+')
+    try:
+        deadline = time.time() + timeout
+        while True:
+            try:
+                if fcntl:
+                    fcntl.lockf(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+                else:
+                    lock_file.seek(0)
+                    msvcrt.locking(lock_file.fileno(), msvcrt.LK_NBLCK, 1)
+                break
+            except OSError:
+                if time.time() > deadline:
+                    raise RuntimeError(f"Timed out waiting for the delivery log lock: {log_file_path}.lock")
+                time.sleep(0.1)
+        try:
+            _finish_compaction(log_file_path)
+            yield
+        finally:
+            if fcntl:
+                fcntl.lockf(lock_file.fileno(), fcntl.LOCK_UN)
+            else:
+                lock_file.seek(0)
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+    finally:
+        lock_file.close()
+
+
+def append_rows(log_file_path, rows):
+    """
+    Append delivery rows to the CSV log under the log lock, in one write
+    followed by one fsync.
+    """
+    if not rows:
+        return
+    buffer = io.StringIO(newline='')
+    csv.DictWriter(buffer, fieldnames=LOG_FIELDNAMES).writerows(rows)
+    with lock_log(log_file_path):
+        ensure_csv_log(log_file_path)
+        with open(log_file_path, 'a', newline='') as csvfile:
+            csvfile.write(buffer.getvalue())
+            csvfile.flush()
+            os.fsync(csvfile.fileno())
+
+
+_ACTIVE_BATCHES = {}
+
+class DeliveryLogBatch(object):
+    """
+    Batch-scoped writer for the CSV log.
+    While the batch is open, log_delivery_row() buffers rows instead of
+    writing them; they are appended together when the batch closes.
+
+        with DeliveryLogBatch(log_file_path):
+            for shot in shots:
+                ...
+                log_delivery_row(log_file_path, row)
+    """
+
+    def __init__(self, log_file_path):
+        self.log_file_path = log_file_path
+        self.rows = []
+
+    def __enter__(self):
+        if self.log_file_path in _ACTIVE_BATCHES:
+            raise RuntimeError(f"A delivery batch is already open for {self.log_file_path}")
+        _ACTIVE_BATCHES[self.log_file_path] = self
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        del _ACTIVE_BATCHES[self.log_file_path]
+        # Rows are written even when the batch stops early: their Write nodes already exist
+        self.flush()
+        return False
+
+    def add(self, row):
+        self.rows.append(row)
+
+    def flush(self):
+        rows, self.rows = self.rows, []
+        append_rows(self.log_file_path, rows)
+
+
+def log_delivery_row(log_file_path, row):
+    """Write one delivery row, or buffer it if a batch is open for this log."""
+    batch = _ACTIVE_BATCHES.get(log_file_path)
+    if batch:
+        batch.add(row)
+    else:
+        append_rows(log_file_path, [row])
+
+
+def latest_row(rows, shot_name, current=None):
+    """Fold rows for shot_name into current and return the latest one."""
+    for row in rows:
+        if row['delivery_shot'] == shot_name:
+            if current is None or row['delivery_version'] > current['delivery_version']:
+                current = row
+    return current
+
+
+def get_latest_delivered_version(log_file_path, shot_name):
+    """
+    Return (latest_version, version_info) for a delivery shot from the CSV log,
+    including rows still buffered in an open batch.
+    """
+    cache = get_log_cache(log_file_path)
+    cache.refresh()
+    row = cache.latest.get(shot_name)
+    batch = _ACTIVE_BATCHES.get(log_file_path)
+    if batch:
+        row = latest_row(batch.rows, shot_name, row)
+    if row is None:
+        return None, None
+    return row['delivery_version'], dict(row)
+
+
+class DeliveryLogCache(object):
+    """
+    Incremental reader for the CSV delivery log.
+    Starts from the compaction snapshot (if any), then remembers how far into
+    the live log it has parsed (byte offset, size, mtime) and folds the rows
+    into a dictionary of the latest delivery row per delivery_shot. A refresh
+    with no new rows costs two stats; otherwise only the appended bytes are
+    parsed. If the log shrinks, is replaced or rewritten in place, or the
+    snapshot changes, everything is read again from the snapshot.
+    """
+
+    def __init__(self, log_file_path):
+        self.log_file_path = log_file_path
+        self.snapshot_path = snapshot_path(log_file_path)
+        self.encoding = locale.getpreferredencoding(False)
+        self.reset()
+
+    def reset(self):
+        self.fieldnames = None
+        self.offset = 0
+        self.size = None
+        self.mtime = None
+        self.inode = None
+        self.snapshot_stat = None
+        self.latest = {}
+
+    def refresh(self):
+        """Fold any rows appended since the last refresh into the cache."""
+        try:
+            stat = os.stat(self.log_file_path)
+        except OSError:
+            self.reset()
+            return
+        snapshot_stat = _stat_key(self.snapshot_path)
+        if stat.st_size == self.size and stat.st_mtime == self.mtime and stat.st_ino == self.inode and snapshot_stat == self.snapshot_stat:
+            return
+        if (snapshot_stat != self.snapshot_stat or stat.st_ino != self.inode or stat.st_size < self.offset
+                or (stat.st_size == self.offset and stat.st_mtime != self.mtime)):
+            self.reset()
+            self.snapshot_stat = snapshot_stat
+            if snapshot_stat:
+                self._load_snapshot()
+        with open(self.log_file_path, 'rb') as logfile:
+            logfile.seek(self.offset)
+            data = logfile.read()
+        # Only consume complete lines; a row still being written is picked up next time
+        end = data.rfind(b'\n') + 1
+        if end:
+            self._fold(data[:end].decode(self.encoding, 'replace'))
+            self.offset += end
+        self.size = stat.st_size
+        self.mtime = stat.st_mtime
+        self.inode = stat.st_ino
+
+    def _load_snapshot(self):
+        with open(self.snapshot_path, 'r', newline='') as csvfile:
+            for row in csv.DictReader(csvfile):
+                row.pop('delivery_count', None)
+                self.latest[row['delivery_shot']] = row
+
+    def _fold(self, text):
+        rows = csv.reader(io.StringIO(text, newline=''))
+        if self.fieldnames is None:
+            self.fieldnames = next(rows, None)
+            if self.fieldnames is None:
+                return
+        fieldnames = self.fieldnames
+        latest = self.latest
+        for values in rows:
+            if not values:
+                continue
+            row = dict(zip(fieldnames, values))
+            shot = row.get('delivery_shot')
+            current = latest.get(shot)
+            if current is None or row.get('delivery_version', '') > current.get('delivery_version', ''):
+                latest[shot] = row
+
+
+def _stat_key(path):
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_ino, stat.st_size, stat.st_mtime
+
+
+def _write_csv_temp(path, rows, fieldnames=LOG_FIELDNAMES, append=False):
+    """
+    Write rows to <path>.tmp and return its path. With append, the rows are
+    added to a copy of the existing file.
+    """
+    temp_path = path + '.tmp'
+    copy_existing = append and os.path.exists(path)
+    if copy_existing:
+        shutil.copyfile(path, temp_path)
+    with open(temp_path, 'a' if copy_existing else 'w', newline='') as csvfile:
+        writer = csv.DictWriter(csvfile, fieldnames=fieldnames, extrasaction='ignore')
+        if not copy_existing:
+            writer.writeheader()
+        writer.writerows(rows)
+        csvfile.flush()
+        os.fsync(csvfile.fileno())
+    return temp_path
+
+
+def _write_csv_atomically(path, rows, fieldnames=LOG_FIELDNAMES):
+    os.replace(_write_csv_temp(path, rows, fieldnames), path)
+
+
+def compact_log(log_file_path, keep_days=COMPACT_KEEP_DAYS, now=None):
+    """
+    Compact the CSV delivery log.
+    - Rows older than keep_days are appended to monthly archive files.
+    - The snapshot is updated with the latest row per delivery_shot and the
+      number of that shot's rows moved to the archives (delivery_count).
+    - The live log is rewritten with only the recent rows.
+    All files are written to temp files first and moved in place through a
+    journal, so a crash never archives the same rows twice.
+    Runs under the log lock. Returns (archived_rows, kept_rows, shots).
+    """
+    now = now or datetime.datetime.now()
+    cutoff = (now - datetime.timedelta(days=keep_days)).strftime(TIMESTAMP_FORMAT)
+    snapshot_file = snapshot_path(log_file_path)
+
+    with lock_log(log_file_path):
+        if not os.path.exists(log_file_path):
+            return 0, 0, 0
+        latest = {}
+        archived_counts = {}
+        if os.path.exists(snapshot_file):
+            with open(snapshot_file, 'r', newline='') as csvfile:
+                for row in csv.DictReader(csvfile):
+                    archived_counts[row['delivery_shot']] = int(row.pop('delivery_count', None) or 0)
+                    latest[row['delivery_shot']] = row
+
+        archived = {}
+        kept = []
+        with open(log_file_path, 'r', newline='') as csvfile:
+            for row in csv.DictReader(csvfile):
+                shot = row['delivery_shot']
+                current = latest.get(shot)
+                if current is None or row['delivery_version'] > current['delivery_version']:
+                    latest[shot] = row
+                timestamp = row.get('timestamp') or ''
+                # Rows without a parseable timestamp stay in the live log
+                if len(timestamp) >= 7 and timestamp < cutoff:
+                    archived.setdefault(timestamp[:7], []).append(row)
+                    archived_counts[shot] = archived_counts.get(shot, 0) + 1
+                else:
+                    kept.append(row)
+
+        if not archived:
+            return 0, len(kept), len(latest)
+
+        # Nothing is changed until every new file is complete
+        targets = []
+        for month, rows in sorted(archived.items()):
+            month_file = archive_path(log_file_path, month)
+            _write_csv_temp(month_file, rows, append=True)
+            targets.append(month_file)
+        snapshot_rows = [dict(latest[shot], delivery_count=archived_counts.get(shot, 0)) for shot in sorted(latest)]
+        _write_csv_temp(snapshot_file, snapshot_rows, SNAPSHOT_FIELDNAMES)
+        _write_csv_temp(log_file_path, kept)
+        targets += [snapshot_file, log_file_path]
+
+        # Once the journal is in place the compaction is committed: the moves are
+        # finished here, or by the next lock_log() after a crash
+        journal = compact_journal_path(log_file_path)
+        with open(journal + '.tmp', 'w', encoding='utf-8') as journal_file:
+            journal_file.write(''.join(f"{path}\n" for path in targets))
+            journal_file.flush()
+            os.fsync(journal_file.fileno())
+        os.replace(journal + '.tmp', journal)
+        _finish_compaction(log_file_path)
+
+    return sum(len(rows) for rows in archived.values()), len(kept), len(latest)
+
+
+_LOG_CACHES = {}
+
+def get_log_cache(log_file_path):
+    """Return the session-wide cache for a CSV delivery log."""
+    cache = _LOG_CACHES.get(log_file_path)
+    if cache is None:
+        cache = _LOG_CACHES[log_file_path] = DeliveryLogCache(log_file_path)
+    return cache
+
+
+def is_local_disk(path):
+    """
+    True if path is known to be on a local fixed disk (Windows drive type).
+    UNC paths, mapped network drives and paths on other platforms are not.
+    """
+    drive = os.path.splitdrive(os.path.abspath(path))[0]
+    if sys.platform != "win32" or not drive or drive.startswith(('\\\\', '//')):
+        return False
+    import ctypes
+    DRIVE_FIXED = 3
+    return ctypes.windll.kernel32.GetDriveTypeW(drive + "\\") == DRIVE_FIXED
+
+
+class DeliveryLedger(object):
+    """
+    SQLite delivery ledger.
+    Rows mirror the CSV columns. Lookups by delivery_shot use an index.
+    A ledger on a local disk runs in WAL mode so readers never block the writer.
+    WAL needs shared-memory locking that SMB can't give several hosts, so a
+    ledger on a share (Y:) keeps SQLite's rollback journal (journal_mode=DELETE),
+    which only relies on file locks.
+    """
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        db_dir = os.path.dirname(db_path)
+        if db_dir and not os.path.exists(db_dir):
+            os.makedirs(db_dir)
+        self.conn = sqlite3.connect(db_path, timeout=LEDGER_BUSY_TIMEOUT)
+        self.conn.row_factory = sqlite3.Row
+        self.pending = None
+        journal_mode = "WAL" if LEDGER_WAL_ON_LOCAL_DISK and is_local_disk(db_path) else "DELETE"
+        try:
+            self.conn.execute(f"PRAGMA journal_mode={journal_mode}")
+        except sqlite3.DatabaseError:
+            pass
+        self.conn.execute(f"PRAGMA busy_timeout={LEDGER_BUSY_TIMEOUT * 1000}")
+        self._create_schema()
+
+    def _create_schema(self):
+        columns = ", ".join(f"{name} TEXT" for name in LOG_FIELDNAMES)
+        with self.conn:
+            self.conn.execute(f"CREATE TABLE IF NOT EXISTS deliveries (id INTEGER PRIMARY KEY, {columns})")
+            self.conn.execute("CREATE INDEX IF NOT EXISTS idx_deliveries_shot ON deliveries (delivery_shot, delivery_version)")
+
+    def close(self):
+        self.conn.close()
+
+    def get_latest_delivered_version(self, shot_name):
+        """
+        Return (latest_version, version_info) for a delivery shot, or (None, None).
+        Versions compare as strings, the same way the CSV lookup does, and the
+        earliest row wins on ties.
+        """
+        row = self.conn.execute(
+            f"SELECT {', '.join(LOG_FIELDNAMES)} FROM deliveries WHERE delivery_shot = ? "
+            "ORDER BY delivery_version DESC, id ASC LIMIT 1",
+            (shot_name,)
+        ).fetchone()
+        version_info = dict(row) if row is not None else None
+        if self.pending:
+            version_info = latest_row(self.pending, shot_name, version_info)
+        if version_info is None:
+            return None, None
+        return version_info['delivery_version'], dict(version_info)
+
+    @contextlib.contextmanager
+    def batch(self):
+        """
+        Buffer log_delivery() rows and insert them in one transaction when the
+        block ends, so the database is only locked once per batch.
+        """
+        if self.pending is not None:
+            raise RuntimeError(f"A delivery batch is already open for {self.db_path}")
+        self.pending = []
+        try:
+            yield self
+        finally:
+            rows, self.pending = self.pending, None
+            if rows:
+                self.log_deliveries(rows)
+
+    def log_delivery(self, row):
+        """Insert one delivery row (a dict keyed by LOG_FIELDNAMES), or buffer it inside a batch."""
+        if self.pending is not None:
+            self.pending.append(row)
+        else:
+            self.log_deliveries([row])
+
+    def log_deliveries(self, rows):
+        """Insert several delivery rows in a single transaction."""
+        placeholders = ", ".join("?" for _ in LOG_FIELDNAMES)
+        with self.conn:
+            self.conn.executemany(
+                f"INSERT INTO deliveries ({', '.join(LOG_FIELDNAMES)}) VALUES ({placeholders})",
+                [tuple(row.get(name, '') for name in LOG_FIELDNAMES) for row in rows]
+            )
+
+    def count(self):
+        return self.conn.execute("SELECT COUNT(*) FROM deliveries").fetchone()[0]
+
+    def import_csv(self, log_file_path):
+        """
+        One-time import of an existing CSV delivery log, including the rows
+        compact_log() moved to its archives.
+        Refuses to run twice into a non-empty ledger so rows are not duplicated.
+        Returns the number of imported rows.
+        """
+        if self.count():
+            raise RuntimeError(f"Ledger {self.db_path} already contains deliveries, not importing {log_file_path}")
+        rows = read_log_rows(log_file_path)
+        self.log_deliveries(rows)
+        return len(rows)
+
+
+_LEDGERS = {}
+
+def get_ledger(db_path):
+    """Return a ledger connection for db_path, reused for the whole session."""
+    ledger = _LEDGERS.get(db_path)
+    if ledger is None:
+        ledger = _LEDGERS[db_path] = DeliveryLedger(db_path)
+    return ledger
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Plate processor delivery log tools")
+    subparsers = parser.add_subparsers(dest='command')
+    import_parser = subparsers.add_parser('import-csv', help="Import a CSV delivery log into a SQLite ledger")
+    import_parser.add_argument('csv_path')
+    import_parser.add_argument('ledger_path')
+    compact_parser = subparsers.add_parser('compact', help="Archive old rows and update the per-shot snapshot")
+    compact_parser.add_argument('csv_path')
+    compact_parser.add_argument('--keep-days', type=int, default=COMPACT_KEEP_DAYS, help="Days of deliveries kept in the live log")
+    args = parser.parse_args()
+
+    if args.command == 'import-csv':
+        ledger = DeliveryLedger(args.ledger_path)
+        imported = ledger.import_csv(args.csv_path)
+        print(f"Imported {imported} deliveries into {args.ledger_path}")
+    elif args.command == 'compact':
+        archived, kept, shots = compact_log(args.csv_path, args.keep_days)
+        print(f"Archived {archived} rows, kept {kept} in the live log, snapshot holds {shots} shots")
+    else:
+        parser.print_help()
+
+if __name__ == "__main__":
+    main()
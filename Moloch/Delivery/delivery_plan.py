@@ -0,0 +1,137 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Delivery Planner
+Works out a plate delivery as plain data, without touching nuke: the original
+plate and its frame range, the delivery shot and version, the output path and
+the delivery log row. The plate processor then only has to materialize the
+plans as nodes, so a batch can be planned (and checked) up front and built in
+one go, and the planning can be run and tested outside Nuke.
+
+The previously delivered version is looked up through a function passed in
+(shot -> (latest_version, info)), so the caller picks the CSV log or ledger.
+
+    plans, failures = plan_deliveries(sources, SOURCE_PLATES_DIR, OUTPUT_BASE_DIR, get_latest_delivered_version)
+"""
+
+import datetime
+from collections import namedtuple
+
+from moloch_shots import ShotId
+from moloch_paths import extract_shot_name, extract_version
+from moloch_plates import get_plate_index
+from moloch_sequences import find_sequence, format_frame_ranges
+
+_DeliveryPlan = namedtuple('DeliveryPlan', [
+    'source_shot', 'delivery_shot', 'source_path', 'source_version', 'delivery_version',
+    'plate_path', 'plate_sequence', 'output_path', 'latest_version', 'latest_info', 'warnings'
+])
+
+PlanFailure = namedtuple('PlanFailure', ['source_path', 'message'])
+
+
+class DeliveryPlan(_DeliveryPlan):
+    """Everything needed to build and log one plate delivery."""
+    __slots__ = ()
+
+    @property
+    def output_dir(self):
+        return self.output_path.rsplit('/', 1)[0]
+
+    @property
+    def log_fields(self):
+        """Keyword arguments for the plate processor's log_delivery()."""
+        return {
+            'source_shot': self.source_shot,
+            'delivery_shot': self.delivery_shot,
+            'source_version': self.source_version,
+            'delivery_version': self.delivery_version,
+            'source_path': self.source_path,
+            'delivery_path': self.output_path
+        }
+
+    def log_row(self, timestamp=None):
+        """The delivery log row for this plan (timestamp defaults to now)."""
+        row = {'timestamp': timestamp or datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")}
+        row.update(self.log_fields)
+        return row
+
+
+def get_plate_warnings(plate_sequence, comp_range=None):
+    """
+    Check the original plate sequence before it is used for a delivery:
+    missing frames inside the plate and comp frames (first, last) outside the plate range.
+    """
+    warnings = []
+    if plate_sequence.holes:
+        warnings.append(f"original plate is missing {plate_sequence.missing} frames: "
+                        f"{format_frame_ranges(plate_sequence.holes)}")
+    if comp_range:
+        comp_first, comp_last = comp_range
+        if comp_first < plate_sequence.first or comp_last > plate_sequence.last:
+            warnings.append(f"comp range {comp_first}-{comp_last} is outside the original plate range "
+                            f"{plate_sequence.first}-{plate_sequence.last}")
+    return warnings
+
+
+def plan_plate_delivery(source_path, source_plates_dir, output_base_dir, latest_version_lookup, comp_range=None,
+                        skip_delivered=False):
+    """
+    Plan the delivery of one comp render (raw plate shots).
+    Returns a DeliveryPlan, or a PlanFailure with the reason it can't be delivered.
+    A shot already delivered as the same version is planned again (overwriting it),
+    unless skip_delivered is set.
+    plate_sequence is None if the plate folder has no <folder>.####.exr frames (delivered anyway, with a warning).
+    """
+    shot_name = extract_shot_name(source_path)
+    if not shot_name:
+        return PlanFailure(source_path, f"Could not extract shot name from {source_path}")
+
+    shot_id = ShotId.from_source(shot_name)
+    if not shot_id:
+        return PlanFailure(source_path, f"Shot {shot_name} not found in the mapping dictionary.")
+
+    # Fall back to the L1 layer folder when the main plate folder is missing
+    plate_folder = get_plate_index(source_plates_dir).find_plate_folder(shot_id, layers=(None, 'L1'))
+    if not plate_folder:
+        source_dir = f"{source_plates_dir}/{shot_id.plate_folder}"
+        l1_source_dir = f"{source_plates_dir}/{shot_id.layer_folder('L1')}"
+        return PlanFailure(source_path, f"Original plate directory not found: {source_dir} or {l1_source_dir}")
+    plate_path = f"{source_plates_dir}/{plate_folder}/{plate_folder}.####.exr"
+
+    plate_sequence = find_sequence(f"{source_plates_dir}/{plate_folder}", f"{plate_folder}.####.exr")
+    if plate_sequence:
+        warnings = get_plate_warnings(plate_sequence, comp_range)
+    else:
+        warnings = [f"no frames matching {plate_folder}.####.exr found, using the comp frame range"]
+
+    delivery_shot = shot_id.client_name
+    source_version = extract_version(source_path) or "unknown"
+    # Use internal version as delivery version instead of converting to v001
+    delivery_version = source_version or "v001"
+    latest_version, latest_info = latest_version_lookup(delivery_shot)
+    if skip_delivered and latest_version == delivery_version:
+        return PlanFailure(source_path, f"{delivery_shot} was already delivered as {latest_version}, skipped")
+
+    # Folder structure: <output_base_dir>/<shot>/<version>/
+    output_path = f"{output_base_dir}/{delivery_shot}/{delivery_version}/{delivery_shot}_{delivery_version}.####.exr"
+
+    return DeliveryPlan(shot_name, delivery_shot, source_path, source_version, delivery_version,
+                        plate_path, plate_sequence, output_path, latest_version, latest_info, warnings)
+
+
+def plan_deliveries(source_paths, source_plates_dir, output_base_dir, latest_version_lookup, skip_delivered=False):
+    """
+    Plan many deliveries. Returns (plans, failures) in the order of source_paths.
+    """
+    plans = []
+    failures = []
+    for source_path in source_paths:
+        plan = plan_plate_delivery(source_path, source_plates_dir, output_base_dir, latest_version_lookup,
+                                   skip_delivered=skip_delivered)
+        if isinstance(plan, PlanFailure):
+            failures.append(plan)
+        else:
+            plans.append(plan)
+    return plans, failures
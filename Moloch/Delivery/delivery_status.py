@@ -0,0 +1,141 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Delivery Status
+Prints the latest delivered version of every shot without starting Nuke.
+
+Reads the plate processor delivery log (CSV log + compaction snapshot) or the
+SQLite ledger in one streaming pass, joins it with SHOT_MAPPING and prints one
+row per shot:
+    source_shot, delivery_shot, latest_version, source_version, timestamp, deliveries
+
+Usage:
+    python delivery_status.py Y:/MOLOCH_02426/sources/Users/MT/logs/nuke_delivery_log.csv
+    python delivery_status.py nuke_delivery_log.sqlite --format csv --output status.csv
+"""
+
+import os
+import sys
+import csv
+import json
+import sqlite3
+import argparse
+
+# moloch_shots.py lives one folder up, next to the other Moloch tools
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import delivery_log
+from moloch_shots import SHOT_MAPPING
+
+DEFAULT_LOG_PATH = "Y:/MOLOCH_02426/sources/Users/MT/logs/nuke_delivery_log.csv"
+LEDGER_EXTENSIONS = ('.sqlite', '.db')
+STATUS_FIELDNAMES = ['source_shot', 'delivery_shot', 'latest_version', 'source_version', 'timestamp', 'deliveries']
+
+
+def _fold_rows(rows, status):
+    """
+    Fold (delivery_shot, delivery_version, source_version, timestamp, source_shot, count)
+    tuples into status: delivery_shot -> [latest_version, source_version, timestamp, source_shot, deliveries]
+    """
+    for shot, version, source_version, timestamp, source_shot, count in rows:
+        entry = status.get(shot)
+        if entry is None:
+            status[shot] = [version, source_version, timestamp, source_shot, count]
+            continue
+        entry[4] += count
+        if version > entry[0]:
+            entry[0:4] = [version, source_version, timestamp, source_shot]
+    return status
+
+
+def _csv_tuples(csvfile, with_count=False):
+    reader = csv.reader(csvfile)
+    header = next(reader, None)
+    if not header:
+        return
+    shot, version, source_version, timestamp, source_shot = (header.index(name) for name in
+        ('delivery_shot', 'delivery_version', 'source_version', 'timestamp', 'source_shot'))
+    count = header.index('delivery_count') if with_count else None
+    for row in reader:
+        if row:
+            yield (row[shot], row[version], row[source_version], row[timestamp], row[source_shot],
+                   int(row[count] or 0) if with_count else 1)
+
+
+def read_csv_status(log_file_path):
+    """Status from the compaction snapshot (if any) plus the live CSV log."""
+    status = {}
+    snapshot_file = delivery_log.snapshot_path(log_file_path)
+    if os.path.exists(snapshot_file):
+        with open(snapshot_file, 'r', newline='') as csvfile:
+            _fold_rows(_csv_tuples(csvfile, with_count=True), status)
+    if os.path.exists(log_file_path):
+        with open(log_file_path, 'r', newline='') as csvfile:
+            _fold_rows(_csv_tuples(csvfile), status)
+    return status
+
+
+def read_ledger_status(db_path):
+    """Status from the SQLite ledger, opened read-only."""
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    try:
+        rows = conn.execute(
+            "SELECT delivery_shot, delivery_version, source_version, timestamp, source_shot, 1 "
+            "FROM deliveries ORDER BY id"
+        )
+        return _fold_rows(rows, {})
+    finally:
+        conn.close()
+
+
+def build_status_table(status, shot_mapping=SHOT_MAPPING):
+    """
+    Join the delivery status with the shot mapping.
+    Every mapped shot gets a row (empty if never delivered); delivered shots
+    missing from the mapping are listed after them.
+    """
+    table = []
+    mapped = set()
+    for source_shot in sorted(shot_mapping):
+        delivery_shot = shot_mapping[source_shot]
+        mapped.add(delivery_shot)
+        entry = status.get(delivery_shot)
+        if entry:
+            table.append([source_shot, delivery_shot, entry[0], entry[1], entry[2], entry[4]])
+        else:
+            table.append([source_shot, delivery_shot, '', '', '', 0])
+    for delivery_shot in sorted(set(status) - mapped):
+        entry = status[delivery_shot]
+        table.append([entry[3], delivery_shot, entry[0], entry[1], entry[2], entry[4]])
+    return [dict(zip(STATUS_FIELDNAMES, row)) for row in table]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Latest delivered version per shot")
+    parser.add_argument('log', nargs='?', default=DEFAULT_LOG_PATH, help="CSV delivery log or SQLite ledger (.sqlite/.db)")
+    parser.add_argument('--format', choices=['json', 'csv'], default='json')
+    parser.add_argument('--output', help="Write to this file instead of stdout")
+    args = parser.parse_args()
+
+    if args.log.lower().endswith(LEDGER_EXTENSIONS):
+        status = read_ledger_status(args.log)
+    else:
+        status = read_csv_status(args.log)
+    table = build_status_table(status)
+
+    output = open(args.output, 'w', newline='') if args.output else sys.stdout
+    try:
+        if args.format == 'json':
+            json.dump(table, output, indent=2)
+            output.write('\n')
+        else:
+            writer = csv.DictWriter(output, fieldnames=STATUS_FIELDNAMES)
+            writer.writeheader()
+            writer.writerows(table)
+    finally:
+        if args.output:
+            output.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,266 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+EXR Header Reader
+Reads OpenEXR headers in pure Python (no Nuke, no OpenEXR module) so delivery
+and QC tools can check channels, compression, data window and metadata such as
+timecode or camera info without building a Read node.
+
+The file is memory-mapped and only the pages holding the header are touched;
+the pixel data is never read. Single-part, tiled, deep and multi-part files are
+supported (one attribute dict per part). Known attribute types are decoded into
+Python values, unknown ones are returned as raw bytes.
+
+    header = read_header("EP01_G_0230.1001.exr")
+    header['compression'], header['dataWindow'], header['timeCode']
+    headers = read_headers_batch(paths)       # {path: [part dicts]} over a thread pool
+
+Usage:
+    python exr_header.py EP01_G_0230.1001.exr [more.exr ...]
+"""
+
+import sys
+import json
+import mmap
+import struct
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+EXR_MAGIC = 20000630
+TILED_FLAG = 0x200
+LONG_NAMES_FLAG = 0x400
+NON_IMAGE_FLAG = 0x800
+MULTIPART_FLAG = 0x1000
+
+COMPRESSION_NAMES = ['NONE', 'RLE', 'ZIPS', 'ZIP', 'PIZ', 'PXR24', 'B44', 'B44A', 'DWAA', 'DWAB']
+LINE_ORDER_NAMES = ['INCREASING_Y', 'DECREASING_Y', 'RANDOM_Y']
+PIXEL_TYPE_NAMES = ['UINT', 'HALF', 'FLOAT']
+ENVMAP_NAMES = ['LATLONG', 'CUBE']
+
+Box = namedtuple('Box', ['xmin', 'ymin', 'xmax', 'ymax'])
+Channel = namedtuple('Channel', ['name', 'pixel_type', 'linear', 'x_sampling', 'y_sampling'])
+Chromaticities = namedtuple('Chromaticities', ['red_x', 'red_y', 'green_x', 'green_y', 'blue_x', 'blue_y', 'white_x', 'white_y'])
+KeyCode = namedtuple('KeyCode', ['film_mfc_code', 'film_type', 'prefix', 'count', 'perf_offset', 'perfs_per_frame', 'perfs_per_count'])
+Rational = namedtuple('Rational', ['numerator', 'denominator'])
+TileDesc = namedtuple('TileDesc', ['x_size', 'y_size', 'level_mode', 'rounding_mode'])
+TimeCode = namedtuple('TimeCode', ['hours', 'minutes', 'seconds', 'frame', 'drop_frame', 'user_data'])
+Preview = namedtuple('Preview', ['width', 'height'])
+
+
+class ExrHeaderError(ValueError):
+    """Raised when a file is not a readable OpenEXR file."""
+
+
+def format_timecode(timecode):
+    """TimeCode -> 'HH:MM:SS:FF' (';' before the frame for drop frame)."""
+    separator = ';' if timecode.drop_frame else ':'
+    return f"{timecode.hours:02d}:{timecode.minutes:02d}:{timecode.seconds:02d}{separator}{timecode.frame:02d}"
+
+
+def _bcd(value, shift, tens_bits):
+    return ((value >> (shift + 4)) & ((1 << tens_bits) - 1)) * 10 + ((value >> shift) & 0xF)
+
+
+def _decode_timecode(data):
+    time_and_flags, user_data = struct.unpack('<II', data)
+    return TimeCode(_bcd(time_and_flags, 24, 2), _bcd(time_and_flags, 16, 3), _bcd(time_and_flags, 8, 3),
+                    _bcd(time_and_flags, 0, 2), bool(time_and_flags & 0x40), user_data)
+
+
+def _decode_string(data):
+    return data.decode('utf-8', 'replace')
+
+
+def _decode_chlist(data):
+    channels = []
+    pos = 0
+    while pos < len(data) and data[pos] != 0:
+        end = data.index(b'\0', pos)
+        name = _decode_string(data[pos:end])
+        pixel_type, linear, x_sampling, y_sampling = struct.unpack_from('<iB3xii', data, end + 1)
+        pixel_name = PIXEL_TYPE_NAMES[pixel_type] if 0 <= pixel_type < len(PIXEL_TYPE_NAMES) else pixel_type
+        channels.append(Channel(name, pixel_name, bool(linear), x_sampling, y_sampling))
+        pos = end + 17
+    return channels
+
+
+def _decode_stringvector(data):
+    strings = []
+    pos = 0
+    while pos + 4 <= len(data):
+        size, = struct.unpack_from('<i', data, pos)
+        strings.append(_decode_string(data[pos + 4:pos + 4 + size]))
+        pos += 4 + size
+    return strings
+
+
+def _decode_enum(names):
+    def decode(data):
+        value = data[0]
+        return names[value] if value < len(names) else value
+    return decode
+
+
+def _decode_struct(fmt, record=None):
+    unpack = struct.Struct(fmt).unpack
+    def decode(data):
+        values = unpack(data)
+        if record is not None:
+            return record(*values)
+        return values[0] if len(values) == 1 else values
+    return decode
+
+
+def _decode_tiledesc(data):
+    x_size, y_size, mode = struct.unpack('<IIB', data)
+    return TileDesc(x_size, y_size, mode & 0x0F, mode >> 4)
+
+
+ATTRIBUTE_DECODERS = {
+    'box2i': _decode_struct('<4i', Box),
+    'box2f': _decode_struct('<4f', Box),
+    'chlist': _decode_chlist,
+    'chromaticities': _decode_struct('<8f', Chromaticities),
+    'compression': _decode_enum(COMPRESSION_NAMES),
+    'double': _decode_struct('<d'),
+    'envmap': _decode_enum(ENVMAP_NAMES),
+    'float': _decode_struct('<f'),
+    'int': _decode_struct('<i'),
+    'keycode': _decode_struct('<7i', KeyCode),
+    'lineOrder': _decode_enum(LINE_ORDER_NAMES),
+    'm33f': _decode_struct('<9f'),
+    'm33d': _decode_struct('<9d'),
+    'm44f': _decode_struct('<16f'),
+    'm44d': _decode_struct('<16d'),
+    'preview': lambda data: Preview(*struct.unpack_from('<II', data)),
+    'rational': _decode_struct('<iI', Rational),
+    'string': _decode_string,
+    'stringvector': _decode_stringvector,
+    'tiledesc': _decode_tiledesc,
+    'timecode': _decode_timecode,
+    'v2i': _decode_struct('<2i'),
+    'v2f': _decode_struct('<2f'),
+    'v2d': _decode_struct('<2d'),
+    'v3i': _decode_struct('<3i'),
+    'v3f': _decode_struct('<3f'),
+    'v3d': _decode_struct('<3d'),
+}
+
+
+def _read_cstring(buffer, pos, path):
+    end = buffer.find(b'\0', pos)
+    if end < 0:
+        raise ExrHeaderError(f"Truncated EXR header: {path}")
+    return bytes(buffer[pos:end]).decode('latin-1'), end + 1
+
+
+def parse_headers(buffer, path=''):
+    """
+    Parse the header(s) from a bytes-like buffer holding at least the start
+    of an EXR file. Returns a list of attribute dicts, one per part.
+    """
+    if len(buffer) < 8:
+        raise ExrHeaderError(f"Not an EXR file: {path}")
+    magic, version = struct.unpack_from('<ii', buffer, 0)
+    if magic != EXR_MAGIC:
+        raise ExrHeaderError(f"Not an EXR file: {path}")
+
+    multipart = bool(version & MULTIPART_FLAG)
+    size = len(buffer)
+    parts = []
+    attributes = {}
+    pos = 8
+    while True:
+        if pos >= size:
+            raise ExrHeaderError(f"Truncated EXR header: {path}")
+        if buffer[pos] == 0:
+            # End of this header; multipart files end the list with an empty header
+            pos += 1
+            if attributes or not multipart:
+                parts.append(attributes)
+            if not multipart or not attributes:
+                break
+            attributes = {}
+            continue
+        name, pos = _read_cstring(buffer, pos, path)
+        type_name, pos = _read_cstring(buffer, pos, path)
+        if pos + 4 > size:
+            raise ExrHeaderError(f"Truncated EXR header: {path}")
+        value_size, = struct.unpack_from('<i', buffer, pos)
+        pos += 4
+        if value_size < 0 or pos + value_size > size:
+            raise ExrHeaderError(f"Truncated EXR header: {path}")
+        data = bytes(buffer[pos:pos + value_size])
+        pos += value_size
+        decoder = ATTRIBUTE_DECODERS.get(type_name)
+        try:
+            attributes[name] = decoder(data) if decoder else data
+        except (struct.error, ValueError, IndexError):
+            attributes[name] = data
+    return parts
+
+
+def read_headers(path):
+    """Return the attribute dicts of all parts of an EXR file."""
+    with open(path, 'rb') as exr_file:
+        try:
+            buffer = mmap.mmap(exr_file.fileno(), 0, access=mmap.ACCESS_READ)
+        except (ValueError, OSError):
+            # Empty files and file systems without mmap support
+            return parse_headers(exr_file.read(), path)
+        try:
+            return parse_headers(buffer, path)
+        finally:
+            buffer.close()
+
+
+def read_header(path, part=0):
+    """Return the attribute dict of one part (the first by default)."""
+    return read_headers(path)[part]
+
+
+def _read_headers_or_none(path):
+    try:
+        return read_headers(path)
+    except (OSError, ExrHeaderError) as e:
+        print(f"Could not read EXR header {path}: {str(e)}")
+        return None
+
+
+def read_headers_batch(paths, max_workers=None):
+    """
+    Read the headers of many files over a thread pool.
+    Returns {path: [part dicts]}; files that can't be read map to None.
+    """
+    paths = list(paths)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return dict(zip(paths, executor.map(_read_headers_or_none, paths)))
+
+
+def _json_value(value):
+    if isinstance(value, TimeCode):
+        return format_timecode(value)
+    if isinstance(value, tuple) and hasattr(value, '_asdict'):
+        return {key: _json_value(item) for key, item in value._asdict().items()}
+    if isinstance(value, dict):
+        return {key: _json_value(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_json_value(item) for item in value]
+    if isinstance(value, bytes):
+        return value.hex()
+    return value
+
+
+def main():
+    if len(sys.argv) < 2:
+        print(__doc__)
+        sys.exit(1)
+    headers = read_headers_batch(sys.argv[1:])
+    output = {path: [_json_value(part) for part in parts] if parts is not None else None
+              for path, parts in headers.items()}
+    json.dump(output, sys.stdout, indent=2)
+    sys.stdout.write('\n')
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Moloch Path Parser
+Shared parser for shot and version tokens in media paths, used by the Nuke
+delivery tools and the Resolve scripts instead of their own regexes.
+
+One compiled pattern scans a path once and picks up the first match of each
+token:
+- shot:        internal shot name, e.g. ME1_0050
+- client_shot: client shot name, e.g. EP01_G_050 or EP02_G_110
+- version:     v + three digits, e.g. v004
+- layer:       layer suffix, e.g. L1 from EP01_G_0230_L1
+- padding:     frame padding token, e.g. ####, %04d, $F4 or @@@@
+
+Results are memoized per path and nothing is printed, so parsing a timeline
+with thousands of clips stays in the millisecond range.
+
+    parse_path("Y:/.../ME1_0050_comp_v003.####.exr").shot     -> 'ME1_0050'
+    [p.version for p in parse_paths(paths)]
+"""
+
+import re
+import functools
+from collections import namedtuple
+
+ParsedPath = namedtuple('ParsedPath', ['path', 'shot', 'client_shot', 'version', 'layer', 'padding'])
+
+_TOKEN_PATTERN = re.compile(
+    r'(?P<shot>ME1_\d{4})'
+    r'|(?P<client_shot>EP\d+_[A-Z]_\d+)'
+    r'|_(?P<layer>L\d+)(?![A-Za-z0-9])'
+    r'|(?P<version>v\d{3})'
+    r'|(?P<padding>#+|%0?\d*d|\$F\d*|@+)'
+)
+_TOKEN_NAMES = ('shot', 'client_shot', 'layer', 'version', 'padding')
+
+
+@functools.lru_cache(maxsize=65536)
+def parse_path(path):
+    """Parse one path into a ParsedPath. Tokens that are not found are None."""
+    found = {}
+    for match in _TOKEN_PATTERN.finditer(path):
+        name = match.lastgroup
+        if name not in found:
+            found[name] = match.group(name)
+            if len(found) == len(_TOKEN_NAMES):
+                break
+    return ParsedPath(path, found.get('shot'), found.get('client_shot'), found.get('version'),
+                      found.get('layer'), found.get('padding'))
+
+
+def parse_paths(paths):
+    """Parse an iterable of paths; returns a list of ParsedPath in the same order."""
+    return [parse_path(path) for path in paths]
+
+
+def extract_shot_name(file_path):
+    """
+    Internal shot name (ME1_XXXX) in a path, or None. The first one in the
+    path wins, so pass os.path.basename(path) to ignore the parent folders.
+    """
+    return parse_path(file_path).shot
+
+
+def extract_client_shot_name(file_path):
+    """Client shot name (EPxx_X_nnn) in a path, or None."""
+    return parse_path(file_path).client_shot
+
+
+def extract_version(file_path):
+    """Version token (vXXX) in a path, or None."""
+    return parse_path(file_path).version
@@ -0,0 +1,96 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Moloch Plate Index
+Index of the raw plate folders in _raw_material, built with one os.scandir
+pass instead of an os.path.exists probe per shot and layer on the network
+share.
+
+Folders are keyed by ShotId, so 'EP01_G_0230', 'EP01_G_230' and their layer
+variants ('EP01_G_0230_L1', '_L2', ...) are all found for the same shot. The
+index is kept for the session and rebuilt when the directory's mtime changes;
+the mtime itself is checked at most every PLATE_INDEX_RECHECK_SECONDS.
+
+    index = get_plate_index("Y:/MOLOCH_02426/sources/_raw_material")
+    index.find_plate_folder(ShotId.from_source('ME1_0230'))   -> 'EP01_G_0230'
+"""
+
+import os
+import re
+import time
+
+from moloch_shots import ShotId
+
+PLATE_INDEX_RECHECK_SECONDS = 10
+PLATE_FOLDER_PATTERN = re.compile(r'^(EP\d+_[A-Z]_\d+)(?:_(L\d+))?$', re.IGNORECASE)
+
+
+class PlateIndex(object):
+    """
+    Plate folders under one root: ShotId -> {layer or None: [folder names]}.
+    """
+
+    def __init__(self, root):
+        self.root = root
+        self.mtime = None
+        self.checked = 0
+        self.folders = {}
+
+    def refresh(self, force=False):
+        """Rebuild the index if the root directory changed since the last scan."""
+        now = time.time()
+        if not force and self.mtime is not None and now - self.checked < PLATE_INDEX_RECHECK_SECONDS:
+            return
+        self.checked = now
+        try:
+            mtime = os.stat(self.root).st_mtime
+        except OSError:
+            self.mtime = None
+            self.folders = {}
+            return
+        if not force and mtime == self.mtime:
+            return
+        folders = {}
+        with os.scandir(self.root) as entries:
+            for entry in entries:
+                match = PLATE_FOLDER_PATTERN.match(entry.name)
+                if not match or not entry.is_dir():
+                    continue
+                shot_id = ShotId.parse(match.group(1))
+                layer = match.group(2).upper() if match.group(2) else None
+                folders.setdefault(shot_id, {}).setdefault(layer, []).append(entry.name)
+        self.folders = folders
+        self.mtime = mtime
+
+    def layers(self, shot_id):
+        """Layers present for a shot: None for the main plate, 'L1', 'L2', ..."""
+        self.refresh()
+        return sorted(self.folders.get(shot_id, {}), key=lambda layer: layer or '')
+
+    def find_plate_folder(self, shot_id, layers=(None, 'L1')):
+        """
+        Folder name of the first available layer in layers (None = main plate).
+        The conventional name (ShotId.plate_folder / layer_folder) wins when a
+        shot has folders with different paddings. Returns None if not found.
+        """
+        self.refresh()
+        shot_folders = self.folders.get(shot_id)
+        if not shot_folders:
+            return None
+        for layer in layers:
+            names = shot_folders.get(layer)
+            if names:
+                preferred = shot_id.layer_folder(layer) if layer else shot_id.plate_folder
+                return preferred if preferred in names else sorted(names)[0]
+        return None
+
+
+_PLATE_INDEXES = {}
+
+def get_plate_index(root):
+    """Return the session-wide plate index for a raw material directory."""
+    index = _PLATE_INDEXES.get(root)
+    if index is None:
+        index = _PLATE_INDEXES[root] = PlateIndex(root)
+    return index
@@ -0,0 +1,135 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Moloch Sequence Inventory
+Lists the frame sequences in a folder with a single os.scandir pass and
+collapses numbered files (name.####.exr, name_####.tif, ...) into ranges.
+
+Every Sequence reports its first/last frame, the missing frames as ranges
+(holes) and the total size in bytes. Results are cached per directory and
+reused until the directory's mtime changes (files added, removed or renamed).
+
+    seq = find_sequence("Y:/.../_raw_material/EP01_G_0230", "EP01_G_0230.####.exr")
+    seq.first, seq.last, seq.holes, seq.size
+    format_frame_ranges(seq.holes)   -> '1012-1014, 1050'
+"""
+
+import os
+import re
+from collections import namedtuple
+
+FRAME_FILE_PATTERN = re.compile(r'^(?P<head>.*?[._])(?P<frame>\d+)(?P<tail>\.[A-Za-z0-9]+)$')
+PADDING_PATTERN = re.compile(r'#+|%0?(\d*)d')
+
+_Sequence = namedtuple('Sequence', ['directory', 'head', 'padding', 'tail', 'first', 'last', 'frames', 'holes', 'size'])
+
+
+class Sequence(_Sequence):
+    """
+    One frame sequence. frames is the number of frames on disk, holes a list
+    of (start, end) ranges of missing frames between first and last.
+    """
+    __slots__ = ()
+
+    @property
+    def pattern(self):
+        """File name with the frame number as #### padding."""
+        return f"{self.head}{'#' * self.padding}{self.tail}"
+
+    @property
+    def path(self):
+        return f"{self.directory}/{self.pattern}"
+
+    @property
+    def missing(self):
+        """Number of missing frames between first and last."""
+        return sum(end - start + 1 for start, end in self.holes)
+
+    def frame_path(self, frame):
+        """Full path of one frame."""
+        return f"{self.directory}/{self.head}{frame:0{self.padding}d}{self.tail}"
+
+    def frame_numbers(self):
+        """Frame numbers on disk, in order."""
+        frames = []
+        start = self.first
+        for hole_start, hole_end in self.holes:
+            frames.extend(range(start, hole_start))
+            start = hole_end + 1
+        frames.extend(range(start, self.last + 1))
+        return frames
+
+
+_SEQUENCE_CACHE = {}
+
+def _collapse(frames):
+    """Sorted frame numbers -> (first, last, holes)."""
+    holes = []
+    previous = frames[0]
+    for frame in frames[1:]:
+        if frame > previous + 1:
+            holes.append((previous + 1, frame - 1))
+        previous = frame
+    return frames[0], frames[-1], holes
+
+
+def scan_sequences(directory):
+    """
+    Return {pattern: Sequence} for every frame sequence in directory
+    ({} if the folder doesn't exist). Cached until the folder's mtime changes.
+    """
+    try:
+        mtime = os.stat(directory).st_mtime
+    except OSError:
+        _SEQUENCE_CACHE.pop(directory, None)
+        return {}
+    cached = _SEQUENCE_CACHE.get(directory)
+    if cached and cached[0] == mtime:
+        return cached[1]
+
+    found = {}
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            match = FRAME_FILE_PATTERN.match(entry.name)
+            if not match:
+                continue
+            frame = match.group('frame')
+            key = (match.group('head'), len(frame), match.group('tail'))
+            files = found.get(key)
+            if files is None:
+                files = found[key] = [[], 0]
+            files[0].append(int(frame))
+            try:
+                files[1] += entry.stat().st_size
+            except OSError:
+                pass
+
+    sequences = {}
+    for (head, padding, tail), (frames, size) in found.items():
+        frames.sort()
+        first, last, holes = _collapse(frames)
+        sequence = Sequence(directory, head, padding, tail, first, last, len(frames), holes, size)
+        sequences[sequence.pattern] = sequence
+    _SEQUENCE_CACHE[directory] = (mtime, sequences)
+    return sequences
+
+
+def find_sequence(directory, pattern):
+    """
+    Find one sequence by file name pattern, e.g. 'EP01_G_0230.####.exr' or
+    'EP01_G_0230.%04d.exr'. Returns a Sequence or None.
+    """
+    sequences = scan_sequences(directory)
+    match = PADDING_PATTERN.search(pattern)
+    if not match:
+        return None
+    if match.group(0).startswith('%'):
+        padding = int(match.group(1) or 1)
+        pattern = pattern[:match.start()] + '#' * padding + pattern[match.end():]
+    return sequences.get(pattern)
+
+
+def format_frame_ranges(ranges):
+    """[(1012, 1014), (1050, 1050)] -> '1012-1014, 1050'"""
+    return ", ".join(f"{start}-{end}" if end != start else f"{start}" for start, end in ranges)
@@ -0,0 +1,375 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Moloch Shot Registry
+Single source of the internal shot name (ME1_XXXX) to client shot name
+(EP01_X_XXX) mapping, shared by the Nuke tools, the Resolve scripts and
+command line tools. Plain Python with no nuke/Resolve imports.
+
+Client names appear with two paddings: 'EP01_G_050' (delivery/log names) and
+'EP01_G_0050' (dailies, burn-ins, raw plate folders). Lookups accept either.
+
+    get_client_shot('ME1_0050')         -> 'EP01_G_050'
+    get_padded_client_shot('ME1_0050')  -> 'EP01_G_0050'
+    get_source_shot('EP01_G_0050')      -> 'ME1_0050'
+
+ShotId is the interned value type for one shot, with every naming convention
+the tools need:
+
+    shot = ShotId.from_source('ME1_0230')
+    shot.client_name     -> 'EP01_G_230'
+    shot.plate_folder    -> 'EP01_G_0230'
+    shot.layer_folder()  -> 'EP01_G_0230_L1'
+    shot.burnin_label    -> 'EP01_G_0230'
+
+The mapping is loaded from a shot table on the project share (CSV with
+source_shot,client_shot columns, or a JSON object). A compiled copy is kept on
+the workstation, keyed by the table's size and mtime, so importing this module
+costs one stat on the network plus a local marshal load. If the share is not
+reachable the last compiled copy is used, and failing that the built-in table
+below.
+
+Usage (write the current table to the share, e.g. to seed it):
+    python moloch_shots.py export Y:/MOLOCH_02426/sources/Users/MT/shots/moloch_shots.csv
+"""
+
+import os
+import re
+import csv
+import sys
+import json
+import zlib
+import marshal
+
+SHOT_TABLE_PATH = os.environ.get('MOLOCH_SHOT_TABLE', "Y:/MOLOCH_02426/sources/Users/MT/shots/moloch_shots.csv")
+SHOT_CACHE_DIR = os.environ.get('MOLOCH_CACHE_DIR') or os.path.join(
+    os.environ.get('LOCALAPPDATA') or os.path.expanduser('~'), '.moloch_cache')
+SHOT_CACHE_VERSION = 1
+
+# Built-in fallback, used only when neither the shot table nor a cached copy is available
+BUILTIN_SHOT_MAPPING = {
+    'ME1_0050': 'EP01_G_050',
+    'ME1_0060': 'EP01_G_060',
+    'ME1_0070': 'EP01_G_070',
+    'ME1_0080': 'EP01_G_080',
+    'ME1_0090': 'EP01_G_090',
+    'ME1_0100': 'EP01_D_100',
+    'ME1_0110': 'EP01_G_110',
+    'ME1_0120': 'EP01_D_120',
+    'ME1_0130': 'EP01_D_130',
+    'ME1_0140': 'EP01_D_140',
+    'ME1_0150': 'EP01_D_150',
+    'ME1_0160': 'EP01_D_160',
+    'ME1_0170': 'EP01_D_170',
+    'ME1_0180': 'EP01_D_180',
+    'ME1_0190': 'EP01_D_190',
+    'ME1_0200': 'EP01_D_200',
+    'ME1_0210': 'EP01_D_210',
+    'ME1_0220': 'EP01_G_220',
+    'ME1_0230': 'EP01_G_230',
+    'ME1_0240': 'EP01_G_240',
+    'ME1_0250': 'EP01_G_250',
+    'ME1_0260': 'EP01_G_260',
+    'ME1_0270': 'EP01_G_270',
+    'ME1_0275': 'EP01_G_275',  # New mapping added
+    'ME1_0280': 'EP01_G_280',
+    'ME1_0290': 'EP01_G_290',
+    'ME1_0300': 'EP01_G_300',
+    'ME1_0310': 'EP01_G_310',
+    'ME1_0320': 'EP01_G_320',
+    'ME1_0330': 'EP01_G_330',
+    'ME1_0340': 'EP01_G_340',
+    'ME1_0350': 'EP01_G_350',
+    'ME1_0360': 'EP01_D_360',
+    'ME1_0370': 'EP01_D_370',
+    'ME1_0380': 'EP01_D_380',
+    'ME1_0390': 'EP01_D_390',
+    'ME1_0400': 'EP01_D_400',
+    'ME1_0410': 'EP01_D_410',
+    'ME1_0420': 'EP01_D_420',
+    'ME1_0430': 'EP01_D_430',
+    'ME1_0440': 'EP01_G_440',
+    'ME1_0450': 'EP01_D_450',  # New mapping added for ME1_0450
+    'ME1_0460': 'EP01_D_460',
+    'ME1_0470': 'EP01_D_470',
+    'ME1_0480': 'EP01_D_480',
+    'ME1_0490': 'EP01_D_490',
+    'ME1_0500': 'EP01_G_500',
+    'ME1_0510': 'EP01_D_510',
+    'ME1_0520': 'EP01_D_520',
+    'ME1_0560': 'EP01_G_560',
+    'ME1_0570': 'EP01_G_570',
+    'ME1_0580': 'EP01_D_580',
+    'ME1_0590': 'EP01_G_590',
+    'ME1_0591': 'EP01_G_591',
+    'ME1_0595': 'EP01_G_595',
+    'ME1_0630': 'EP01_G_630',  # New mapping added
+    'ME1_0640': 'EP01_G_640',  # New mapping added
+    'ME1_0650': 'EP01_G_650',  # New mapping added
+    'ME1_0660': 'EP01_D_660',  # New mapping added
+    'ME1_0670': 'EP01_D_670',  # New mapping added
+    'ME1_0680': 'EP01_D_680',  # New mapping added
+    'ME1_0700': 'EP01_G_700',
+    'ME1_0710': 'EP01_G_710',
+    'ME1_0715': 'EP01_D_715',
+    'ME1_0720': 'EP01_G_720',
+    'ME1_0730': 'EP01_D_730',
+    'ME1_0740': 'EP01_D_740',
+    'ME1_0750': 'EP01_G_750',
+    'ME1_0760': 'EP01_G_760',
+    'ME1_0770': 'EP01_G_770',
+    'ME1_0780': 'EP01_G_780',
+    'ME1_0790': 'EP01_D_790',
+    'ME1_0800': 'EP01_D_800',
+    'ME1_0810': 'EP01_D_810',
+    'ME1_0820': 'EP01_D_820',
+    'ME1_0830': 'EP01_D_830',
+    'ME1_0832': 'EP01_D_832',
+    'ME1_0840': 'EP01_D_840',
+    'ME1_0850': 'EP01_G_850',
+    'ME1_0860': 'EP01_G_860',
+    'ME1_0870': 'EP01_G_870',
+    'ME1_0880': 'EP01_G_880',
+    'ME1_0890': 'EP01_G_890',
+    'ME1_0900': 'EP01_G_900',
+    'ME1_0910': 'EP01_G_910',
+    'ME1_0920': 'EP01_G_920',
+    'ME1_0930': 'EP01_G_930',
+    'ME1_0940': 'EP01_F_940',
+    'ME1_0950': 'EP01_F_950',
+    'ME1_0960': 'EP01_F_960',
+    'ME1_0970': 'EP01_F_970',
+    'ME1_0980': 'EP01_F_980',
+    'ME1_0990': 'EP01_D_990',
+    'ME1_1000': 'EP01_D_1000',
+    'ME1_1010': 'EP01_D_1010',
+    'ME1_1020': 'EP01_D_1020',
+    'ME1_1030': 'EP01_D_1030',
+    'ME1_1040': 'EP01_D_1040',
+    'ME1_1050': 'EP01_G_1050',
+    'ME1_1060': 'EP01_G_1060',
+    'ME1_9990': 'EP01_G_9990'
+}
+
+
+def read_shot_table(table_path):
+    """Parse a shot table: CSV (source_shot,client_shot) or JSON ({source: client})."""
+    if table_path.lower().endswith('.json'):
+        with open(table_path, 'r', encoding='utf-8') as table_file:
+            return {str(source): str(client) for source, client in json.load(table_file).items()}
+    with open(table_path, 'r', newline='', encoding='utf-8') as table_file:
+        return {row['source_shot'].strip(): row['client_shot'].strip()
+                for row in csv.DictReader(table_file) if row.get('source_shot')}
+
+
+def write_shot_table(table_path, mapping):
+    """Write a mapping as a CSV shot table."""
+    with open(table_path, 'w', newline='', encoding='utf-8') as table_file:
+        writer = csv.writer(table_file)
+        writer.writerow(['source_shot', 'client_shot'])
+        for source_shot in sorted(mapping):
+            writer.writerow([source_shot, mapping[source_shot]])
+
+
+def _cache_path(table_path):
+    key = zlib.crc32(os.path.normcase(os.path.abspath(table_path)).encode('utf-8'))
+    return os.path.join(SHOT_CACHE_DIR, f"shot_table_{key:08x}.marshal")
+
+
+def load_shot_mapping(table_path=SHOT_TABLE_PATH):
+    """
+    Return the shot mapping from table_path via the local compiled cache.
+    The cache is rebuilt whenever the table's size or mtime changes.
+    """
+    cache_path = _cache_path(table_path)
+    cached = None
+    try:
+        with open(cache_path, 'rb') as cache_file:
+            cached = marshal.load(cache_file)
+        if cached[0] != SHOT_CACHE_VERSION or cached[1] != table_path:
+            cached = None
+    except (OSError, EOFError, ValueError, TypeError, IndexError):
+        cached = None
+
+    try:
+        stat = os.stat(table_path)
+    except OSError:
+        # Share not reachable: last compiled copy, then the built-in table
+        return cached[4] if cached else dict(BUILTIN_SHOT_MAPPING)
+
+    if cached and cached[2] == stat.st_size and cached[3] == stat.st_mtime_ns:
+        return cached[4]
+
+    try:
+        mapping = read_shot_table(table_path)
+    except (OSError, ValueError, KeyError) as e:
+        print(f"Could not read shot table {table_path}: {e}")
+        return cached[4] if cached else dict(BUILTIN_SHOT_MAPPING)
+
+    try:
+        if not os.path.exists(SHOT_CACHE_DIR):
+            os.makedirs(SHOT_CACHE_DIR)
+        temp_path = f"{cache_path}.{os.getpid()}.tmp"
+        with open(temp_path, 'wb') as cache_file:
+            marshal.dump((SHOT_CACHE_VERSION, table_path, stat.st_size, stat.st_mtime_ns, mapping), cache_file)
+        os.replace(temp_path, cache_path)
+    except OSError as e:
+        print(f"Could not write shot table cache {cache_path}: {e}")
+    return mapping
+
+
+# Shot name mapping dictionary
+SHOT_MAPPING = load_shot_mapping()
+
+CLIENT_PADDING = 4
+CLIENT_SHOT_PATTERN = re.compile(r'^(EP\d+)_([A-Z])_(\d+)$', re.IGNORECASE)
+
+
+def client_shot_key(client_shot):
+    """
+    Normalize a client shot name to (episode, sequence, number), so that
+    'EP01_G_050', 'EP01_G_0050' and 'ep01_g_50' share a key.
+    Returns None for names that don't follow the EPxx_X_nnn pattern.
+    """
+    match = CLIENT_SHOT_PATTERN.match(client_shot)
+    if not match:
+        return None
+    return match.group(1).upper(), match.group(2).upper(), int(match.group(3))
+
+
+def pad_client_shot(client_shot, digits=CLIENT_PADDING):
+    """'EP01_G_050' -> 'EP01_G_0050'. Names that don't parse are returned unchanged."""
+    key = client_shot_key(client_shot)
+    if key is None:
+        return client_shot
+    return f"{key[0]}_{key[1]}_{key[2]:0{digits}d}"
+
+
+# Reverse indexes, built once at import
+CLIENT_TO_SOURCE = {client: source for source, client in SHOT_MAPPING.items()}
+PADDED_MAPPING = {source: pad_client_shot(client) for source, client in SHOT_MAPPING.items()}
+_CLIENT_KEY_TO_SOURCE = {client_shot_key(client): source for source, client in SHOT_MAPPING.items()}
+
+
+def get_client_shot(source_shot):
+    """ME1_XXXX -> client name as used for deliveries (e.g. 'EP01_G_050'), or None."""
+    return SHOT_MAPPING.get(source_shot)
+
+
+def get_padded_client_shot(source_shot):
+    """ME1_XXXX -> zero-padded client name (e.g. 'EP01_G_0050'), or None."""
+    return PADDED_MAPPING.get(source_shot)
+
+
+def get_source_shot(client_shot):
+    """Client name in any padding -> ME1_XXXX, or None."""
+    source_shot = CLIENT_TO_SOURCE.get(client_shot)
+    if source_shot is None:
+        key = client_shot_key(client_shot)
+        if key is not None:
+            source_shot = _CLIENT_KEY_TO_SOURCE.get(key)
+    return source_shot
+
+
+class ShotId(object):
+    """
+    Canonical shot identifier: episode ('EP01'), sequence letter ('G') and
+    shot number (230).
+    Instances are interned, so each shot exists once per session and can be
+    compared with 'is'. Names are formatted on first use and then kept.
+    """
+    __slots__ = ('episode', 'sequence', 'number', '_source_shot', '_client_name', '_padded_name', '_plate_folder',
+                 '_layer_folders')
+
+    _interned = {}
+
+    def __new__(cls, episode, sequence, number):
+        key = (episode.upper(), sequence.upper(), int(number))
+        shot = cls._interned.get(key)
+        if shot is None:
+            shot = object.__new__(cls)
+            shot.episode, shot.sequence, shot.number = key
+            shot._source_shot = shot._client_name = shot._padded_name = shot._plate_folder = None
+            shot._layer_folders = {}
+            cls._interned[key] = shot
+        return shot
+
+    @classmethod
+    def parse(cls, client_shot):
+        """ShotId from a client name in any padding ('EP01_G_050', 'EP01_G_0050'), or None."""
+        key = client_shot_key(client_shot)
+        return cls(*key) if key else None
+
+    @classmethod
+    def from_source(cls, source_shot):
+        """ShotId for an internal shot name (ME1_XXXX), or None if it is not in the registry."""
+        client_shot = SHOT_MAPPING.get(source_shot)
+        return cls.parse(client_shot) if client_shot else None
+
+    @property
+    def key(self):
+        return self.episode, self.sequence, self.number
+
+    @property
+    def source_shot(self):
+        """Internal shot name, e.g. 'ME1_0230' (None if the shot is not in the registry)."""
+        if self._source_shot is None:
+            self._source_shot = _CLIENT_KEY_TO_SOURCE.get(self.key)
+        return self._source_shot
+
+    @property
+    def client_name(self):
+        """Client delivery name, e.g. 'EP01_G_230'. Used for delivery folders and the log."""
+        if self._client_name is None:
+            self._client_name = f"{self.episode}_{self.sequence}_{self.number:03d}"
+        return self._client_name
+
+    @property
+    def padded_name(self):
+        """Zero-padded client name, e.g. 'EP01_G_0230'."""
+        if self._padded_name is None:
+            self._padded_name = f"{self.episode}_{self.sequence}_{self.number:0{CLIENT_PADDING}d}"
+        return self._padded_name
+
+    @property
+    def plate_folder(self):
+        """Raw material folder name: the client name with a leading zero, e.g. 'EP01_G_0230'."""
+        if self._plate_folder is None:
+            self._plate_folder = f"{self.episode}_{self.sequence}_0{self.number:03d}"
+        return self._plate_folder
+
+    def layer_folder(self, layer='L1'):
+        """Raw material folder of a plate layer, e.g. 'EP01_G_0230_L1'."""
+        folder = self._layer_folders.get(layer)
+        if folder is None:
+            folder = self._layer_folders[layer] = f"{self.plate_folder}_{layer}"
+        return folder
+
+    @property
+    def burnin_label(self):
+        """Name shown in dailies burn-ins, e.g. 'EP01_G_0230'."""
+        return self.padded_name
+
+    def __lt__(self, other):
+        return self.key < other.key
+
+    def __repr__(self):
+        return f"ShotId({self.client_name!r})"
+
+    def __str__(self):
+        return self.client_name
+
+    def __reduce__(self):
+        return ShotId, self.key
+
+
+def main():
+    if len(sys.argv) == 3 and sys.argv[1] == 'export':
+        write_shot_table(sys.argv[2], SHOT_MAPPING)
+        print(f"Wrote {len(SHOT_MAPPING)} shots to {sys.argv[2]}")
+    else:
+        print("Usage: python moloch_shots.py export <table.csv>")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,194 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Plate Metadata Sidecars
+Extracts the per-frame metadata of an original plate once and keeps it in a
+JSON lines sidecar, so delivery renders can inject it with a ModifyMetaData
+node instead of reading every plate frame again through a second Read and
+CopyMetaData.
+
+The EXR headers are read with exr_header (no Nuke needed). Keys are named the
+way Nuke's EXR reader names them (exr/<attribute>, input/timecode) and split
+into constant keys, stored once, and keys that change per frame.
+
+Sidecar layout (one file per plate, e.g. <log dir>/plate_metadata/EP01_G_0230.jsonl):
+    {"version": 1, "plate": ..., "first": 1001, "last": 1100, "frames": 100, "size": ..., "constant": {...}}
+    {"frame": 1001, "metadata": {"input/timecode": "01:00:00:00", ...}}
+    ...
+The sidecar is re-extracted when the plate sequence changes (range, frame
+count or total size).
+"""
+
+import os
+import json
+import tempfile
+
+import exr_header
+
+SIDECAR_VERSION = 1
+SIDECAR_DIR_NAME = "plate_metadata"
+
+# Header attributes that describe the image layout rather than metadata
+SKIPPED_ATTRIBUTES = ('channels', 'preview')
+
+
+def _metadata_value(value):
+    if isinstance(value, exr_header.TimeCode):
+        return exr_header.format_timecode(value)
+    if isinstance(value, (list, tuple)):
+        return " ".join(_metadata_value(item) for item in value)
+    if isinstance(value, bytes):
+        return value.hex()
+    return str(value)
+
+
+def metadata_from_header(attributes):
+    """EXR header attributes -> {nuke metadata key: string value}."""
+    metadata = {}
+    for name, value in attributes.items():
+        if name in SKIPPED_ATTRIBUTES:
+            continue
+        metadata[f"exr/{name}"] = _metadata_value(value)
+        if name == 'timeCode':
+            metadata['input/timecode'] = metadata[f"exr/{name}"]
+    return metadata
+
+
+def extract_sequence_metadata(sequence, max_workers=None):
+    """Read the header of every frame of a moloch_sequences.Sequence: {frame: metadata}."""
+    frames = sequence.frame_numbers()
+    headers = exr_header.read_headers_batch([sequence.frame_path(frame) for frame in frames], max_workers)
+    metadata = {}
+    for frame in frames:
+        parts = headers[sequence.frame_path(frame)]
+        if parts:
+            metadata[frame] = metadata_from_header(parts[0])
+    return metadata
+
+
+def split_constant(frame_metadata):
+    """
+    {frame: metadata} -> (constant, varying): constant holds keys with the same
+    value on every frame, varying {frame: {key: value}} the rest.
+    """
+    frames = sorted(frame_metadata)
+    if not frames:
+        return {}, {}
+    constant = dict(frame_metadata[frames[0]])
+    for frame in frames[1:]:
+        metadata = frame_metadata[frame]
+        for key in list(constant):
+            if metadata.get(key) != constant[key]:
+                del constant[key]
+    varying = {}
+    for frame in frames:
+        varying[frame] = {key: value for key, value in frame_metadata[frame].items() if key not in constant}
+    return constant, varying
+
+
+def sidecar_path(cache_dir, sequence):
+    return os.path.join(cache_dir, f"{sequence.head.rstrip('._')}.jsonl")
+
+
+def _sidecar_header(sequence):
+    return {
+        "version": SIDECAR_VERSION,
+        "plate": sequence.path,
+        "first": sequence.first,
+        "last": sequence.last,
+        "frames": sequence.frames,
+        "size": sequence.size
+    }
+
+
+def load_sidecar(path, sequence):
+    """Return (constant, varying) from a sidecar, or None if it is missing or out of date."""
+    try:
+        with open(path, 'r', encoding='utf-8') as sidecar:
+            header = json.loads(sidecar.readline())
+            constant = header.pop("constant", {})
+            if header != _sidecar_header(sequence):
+                return None
+            varying = {}
+            for line in sidecar:
+                if line.strip():
+                    record = json.loads(line)
+                    varying[record["frame"]] = record["metadata"]
+    except (OSError, ValueError, KeyError):
+        return None
+    return constant, varying
+
+
+def write_sidecar(path, sequence, constant, varying):
+    """Write the sidecar atomically (temp file + rename)."""
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    header = _sidecar_header(sequence)
+    header["constant"] = constant
+    fd, temp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as sidecar:
+            sidecar.write(json.dumps(header) + "\n")
+            for frame in sorted(varying):
+                sidecar.write(json.dumps({"frame": frame, "metadata": varying[frame]}) + "\n")
+        os.replace(temp_path, path)
+    except Exception:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+def get_plate_metadata(sequence, cache_dir):
+    """
+    Return (constant, varying) metadata for a plate sequence, from its sidecar
+    if it is up to date, otherwise extracted from the EXR headers and cached.
+    Returns None if no frame header could be read.
+    """
+    path = sidecar_path(cache_dir, sequence)
+    cached = load_sidecar(path, sequence)
+    if cached is not None:
+        return cached
+    frame_metadata = extract_sequence_metadata(sequence)
+    if not frame_metadata:
+        return None
+    constant, varying = split_constant(frame_metadata)
+    try:
+        write_sidecar(path, sequence, constant, varying)
+    except OSError as e:
+        print(f"Could not write plate metadata sidecar {path}: {str(e)}")
+    return constant, varying
+
+
+# Knob scripts are parsed twice: once as a script (like a .nk file) and again
+# when the value is evaluated per frame, so literal values are escaped for both
+_VALUE_SPECIAL = '\\[]$'
+_LIST_SPECIAL = '\\[]{}$"; \t'
+_SCRIPT_SPECIAL = '\\[]{}$"'
+
+def _escape(value, special):
+    return "".join("\\" + char if char in special else char for char in value.replace("\n", " "))
+
+
+def _knob_word(expression):
+    """Quote an evaluated value expression for the metadata knob script."""
+    return f'"{_escape(expression, _SCRIPT_SPECIAL)}"'
+
+
+def modify_metadata_script(constant, varying, first, last):
+    """
+    Script for the 'metadata' knob of a ModifyMetaData node (knob.fromScript).
+    Constant keys are set directly; varying keys look up the current frame in
+    a per-frame Tcl list (frames missing from the plate hold the previous value).
+    """
+    lines = [f"{{set {key} {_knob_word(_escape(value, _VALUE_SPECIAL))}}}" for key, value in sorted(constant.items())]
+    keys = sorted({key for metadata in varying.values() for key in metadata})
+    for key in keys:
+        values = []
+        current = ""
+        for frame in range(first, last + 1):
+            current = varying.get(frame, {}).get(key, current)
+            values.append(_escape(current, _LIST_SPECIAL) or "{}")
+        expression = f"[lindex {{{' '.join(values)}}} [expr {{[frame]-{first}}}]]"
+        lines.append(f"{{set {key} {_knob_word(expression)}}}")
+    return "\n".join(lines)
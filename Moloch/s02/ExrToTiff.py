@@ -1,6 +1,13 @@
 import nuke
 import os
 from datetime import datetime
+import sys
+
+# The shared Moloch modules (moloch_shots.py, ...) sit one folder up
+if '__file__' in globals():
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from nuke_graph import GraphBuilder
 
 def create_write_nodes_for_selected_reads():
     # Get current date in YYYYMMDD format for the conversion folder
@@ -17,6 +24,9 @@ def create_write_nodes_for_selected_reads():
         nuke.message("No Read nodes selected. Please select at least one Read node.")
         return
     
+    # Collect the Write nodes and create them all with one paste
+    builder = GraphBuilder()
+    
     for read in selected_reads:
         # Get the file path from the Read node
         read_path = read['file'].value()
@@ -48,26 +58,20 @@ def create_write_nodes_for_selected_reads():
         # Create the complete output path
         output_path = f"{output_dir}/{filename}"
         
-        # Create Write node
-        write = nuke.createNode("Write", inpanel=False)
-        
-        # Connect the Write to the Read
-        write.setInput(0, read)
-        
-        # Set Write node parameters
-        write['file'].setValue(output_path)
-        write['colorspace'].setValue("color_picking")  # sRGB conversion
-        write['file_type'].setValue("tiff")
-        write['datatype'].setValue("16 bit")
-        write['checkHashOnRead'].setValue(False)
-        write['create_directories'].setValue(True)  # Enable directory creation
-        
-        # Position the Write node below the Read
-        read_pos = (read.xpos(), read.ypos())
-        write.setXYpos(read_pos[0] + 5, read_pos[1] + 132)  # Position slightly offset and below
+        # Add a Write node below the Read, slightly offset
+        builder.add("Write", [
+            ('file', output_path),
+            ('colorspace', "color_picking"),  # sRGB conversion
+            ('file_type', "tiff"),
+            ('datatype', "16 bit"),
+            ('checkHashOnRead', False),
+            ('create_directories', True)  # Enable directory creation
+        ], inputs=[read], position=(read.xpos() + 5, read.ypos() + 132))
         
         print(f"Created Write node for {read.name()} -> {output_path}")
         print(f"Output directory: {output_dir}")
+    
+    builder.build()
 
 # Run the function
 create_write_nodes_for_selected_reads()
@@ -1,10 +1,12 @@
 #!/usr/bin/env python
 import os
 import sys
-import re
-
 
+# The shared Moloch modules (moloch_shots.py, ...) sit one folder up
+if '__file__' in globals():
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+from moloch_paths import extract_client_shot_name
 
 # Initialize DaVinci Resolve
 resolve = app.GetResolve()
@@ -13,30 +15,6 @@ project = projectManager.GetCurrentProject()
 
 
 
-def extract_shot_name(file_path):
-    """Extract shot name (like 'EP02_G_110') from file path."""
-    try:
-        # Handle pattern like: /shots/S01E02/sqB/EP02_G_110 renderCompositingMain v004 (exr)
-        # Extract only the shot name (EP02_G_110)
-        match = re.search(r'/shots/[^/]+/[^/]+/([^\s]+)\s+renderCompositingMain', file_path)
-        if match:
-            shot_name = match.group(1)
-            print(f"Found shot name: {shot_name} in {file_path}")
-            return shot_name
-        
-        # Fallback: Try to extract just the shot name pattern (e.g., EP02_G_110)
-        match = re.search(r'(EP\d+_[A-Z]_\d+)', file_path)
-        if match:
-            shot_name = match.group(1)
-            print(f"Found shot name using fallback: {shot_name} in {file_path}")
-            return shot_name
-            
-        print(f"No shot name pattern found in: {file_path}")
-        return None
-    except Exception as e:
-        print(f"Error extracting shot name: {e}")
-        return None
-
 def replace_clip_name(item):
     """Update the clip name with the clean shot name (e.g., EP02_G_110)."""
     try:
@@ -57,8 +35,8 @@ def replace_clip_name(item):
             print("Could not get clip properties")
             return False
 
-        # Extract shot name directly from path
-        shot_name = extract_shot_name(file_path)
+        # Extract shot name (e.g. EP02_G_110) directly from path
+        shot_name = extract_client_shot_name(file_path)
         if not shot_name:
             print(f"No shot name found in: {clip_name}")
             return False
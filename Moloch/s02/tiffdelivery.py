@@ -16,6 +16,13 @@ This script processes selected Read nodes containing TIFF files (full CG shots):
 import nuke
 import os
 import re
+import sys
+
+# The shared Moloch modules (moloch_shots.py, ...) sit one folder up
+if '__file__' in globals():
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from nuke_graph import GraphBuilder
 
 # Default output directory
 OUTPUT_DIR = "Y:/MOLOCH_02426/sources/Users/MT/s02_temp_forpublish"
@@ -47,13 +54,14 @@ def sanitize_node_name(name):
         sanitized = "N_" + sanitized
     return sanitized
 
-def generate_unique_node_name(base_name):
+def generate_unique_node_name(base_name, taken=()):
     """
-    Generate a unique node name by appending a numeric suffix if the name already exists.
+    Generate a unique node name by appending a numeric suffix if the name already exists
+    (in the script or in taken, the names of nodes that are about to be created).
     """
     node_name = base_name
     counter = 1
-    while nuke.exists(node_name):
+    while node_name in taken or nuke.exists(node_name):
         node_name = f"{base_name}_{counter}"
         counter += 1
     return node_name
@@ -71,6 +79,8 @@ def process_tiff_files():
         return
 
     results = []
+    builder = GraphBuilder()
+    taken_names = set()
     for read_node in selected_nodes:
         file_path = read_node['file'].value()
 
@@ -95,42 +105,41 @@ def process_tiff_files():
         # The output file will use the "####" notation for frame numbers.
         output_path = os.path.join(subfolder, f"{shot_name}.####.exr")
 
-        # Create the Shuffle node after the Read node
-        shuffle_node = nuke.createNode("Shuffle", inpanel=False)
-        shuffle_node.setInput(0, read_node)
-        shuffle_node.setXYpos(read_node.xpos(), read_node.ypos() + 50)
-        
-        # Configure the Shuffle node:
+        # Add the Shuffle node after the Read node:
         #  - Map the input channels as is (rgba)
         #  - Set alpha channel to white
         #  - Set a label to identify it as the specific Shuffle node.
-        shuffle_node["in"].setValue("rgba")
-        shuffle_node["in2"].setValue("none")
-        shuffle_node["red"].setValue("red")
-        shuffle_node["green"].setValue("green")
-        shuffle_node["blue"].setValue("blue")
-        shuffle_node["alpha"].setValue("white")
-        shuffle_node["label"].setValue("Specific Shuffle Node")
-
-        # Create the Write node and connect it to the Shuffle node output
-        write_node = nuke.createNode("Write", inpanel=False)
-        write_node.setInput(0, shuffle_node)
-        write_node['channels'].setValue("all")
-        write_node['file'].setValue(output_path)
-        write_node['file_type'].setValue("exr")
-        write_node['compression'].setValue("PIZ Wavelet (32 scanlines)")
-        write_node['metadata'].setValue("all metadata")
-        write_node['first_part'].setValue("rgba")
-        write_node['create_directories'].setValue(True)
-        write_node.setXYpos(read_node.xpos(), read_node.ypos() + 100)
+        shuffle_node = builder.add("Shuffle", [
+            ("in", "rgba"),
+            ("in2", "none"),
+            ("red", "red"),
+            ("green", "green"),
+            ("blue", "blue"),
+            ("alpha", "white"),
+            ("label", "Specific Shuffle Node")
+        ], inputs=[read_node], position=(read_node.xpos(), read_node.ypos() + 50))
 
         # Sanitize and generate a unique name for the Write node
         base_node_name = "Write_" + sanitize_node_name(shot_name)
-        unique_node_name = generate_unique_node_name(base_node_name)
-        write_node.setName(unique_node_name)
+        unique_node_name = generate_unique_node_name(base_node_name, taken_names)
+        taken_names.add(unique_node_name)
+
+        # Add the Write node connected to the Shuffle node output
+        builder.add("Write", [
+            ('channels', "all"),
+            ('file', output_path),
+            ('file_type', "exr"),
+            ('compression', "PIZ Wavelet (32 scanlines)"),
+            ('metadata', "all metadata"),
+            ('first_part', "rgba"),
+            ('create_directories', True)
+        ], inputs=[shuffle_node], name=unique_node_name, position=(read_node.xpos(), read_node.ypos() + 100))
 
         results.append((read_node.name(), True, f"Successfully processed {shot_name}"))
 
+    # Create all Shuffle and Write nodes with one paste
+    builder.build()
+
     # Prepare and display a summary of the processing results
     summary = "Processing Results:\n\n"
     for node_name, success, message in results:
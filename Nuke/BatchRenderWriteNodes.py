@@ -1,27 +1,47 @@
-# BatchRenderWriteNodes.py v1.3
+# BatchRenderWriteNodes.py v1.4
 #
 # This script renders selected Write nodes and shows progress in a single window.
+# The script is saved and rendered by parallel headless Nuke workers (see render_queue.py),
+# so the GUI session stays responsive.
 # Usage: Select Write nodes in Nuke's node graph, run the script.
 # Click 'Go' to start rendering after reviewing the nodes to be rendered.
 #
 # Features:
 # - Single window interface
 # - Shows all Write nodes to be rendered
-# - Progress updates in real-time
+# - Progress updates in real-time (per frame)
+# - Parallel frame-chunk rendering across worker processes sized to the machine
+# - Resume mode: only renders frames that are missing or truncated on disk
+# - Chunks queued longest-first by estimated cost (output size, channels, past timings)
+# - Writes sharing upstream nodes and frame ranges render together (nuke.executeMultiple)
+# - Live fps, MB/s and ETA per Write and for the batch; per-frame timings go to a trace
+#   (render_traces/<script>.jsonl next to the script, see render_telemetry.py)
 # - Go button to start rendering
 # - Error handling
 #
 # Author: Claude
-# Last Updated: 2024-11-29
+# Last Updated: 2026-10-18
+
+import os
+import sys
 
 import nuke
 from PySide2 import QtWidgets, QtCore
-import re
+
+# render_queue.py and render_telemetry.py sit next to this script
+if '__file__' in globals():
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import render_queue
+import render_telemetry
 
 # User Variables 
 WINDOW_WIDTH = 400
 WINDOW_HEIGHT = 300
 WINDOW_TITLE = "Batch Render Progress"
+CHUNK_SIZE = render_queue.CHUNK_SIZE  # Frames per worker job
+POLL_INTERVAL_MS = 250
+RESUME_BY_DEFAULT = False
 
 class RenderWindow(QtWidgets.QDialog):
     def __init__(self, write_nodes):
@@ -29,6 +49,17 @@ class RenderWindow(QtWidgets.QDialog):
         
         self.write_nodes = write_nodes
         self.completed_renders = 0
+        self.scheduler = None
+        self.frames_done = 0
+        self.frames_total = 0
+        self.remaining_frames = {}
+        self.errors = []
+        self.trace = None
+        self.meters = {}
+        self.batch_meter = None
+        self.write_info = {}
+        self.poll_timer = QtCore.QTimer(self)
+        self.poll_timer.timeout.connect(self.poll_render)
         
         self.setup_ui()
         
@@ -75,6 +106,17 @@ class RenderWindow(QtWidgets.QDialog):
         self.current_render_label = QtWidgets.QLabel("Waiting to start...")
         layout.addWidget(self.current_render_label)
         
+        # Throughput (fps, MB/s, ETA)
+        self.stats_label = QtWidgets.QLabel("")
+        layout.addWidget(self.stats_label)
+        
+        # Resume options
+        self.resume_checkbox = QtWidgets.QCheckBox("Resume (skip frames already on disk)")
+        self.resume_checkbox.setChecked(RESUME_BY_DEFAULT)
+        layout.addWidget(self.resume_checkbox)
+        self.header_check_checkbox = QtWidgets.QCheckBox("Also check file headers when resuming")
+        layout.addWidget(self.header_check_checkbox)
+        
         # Go button
         self.go_button = QtWidgets.QPushButton("Go")
         self.go_button.clicked.connect(self.start_render)
@@ -85,47 +127,156 @@ class RenderWindow(QtWidgets.QDialog):
     def update_progress(self, node_name):
         """Update progress display"""
         self.completed_renders += 1
-        self.progress_bar.setValue(self.completed_renders)
         self.progress_label.setText(f"Completed: {self.completed_renders}/{len(self.write_nodes)} renders")
-        self.current_render_label.setText(f"Current: {node_name}")
+        self.current_render_label.setText(f"Finished: {node_name}")
         
-        # Process events to show updates
-        QtWidgets.QApplication.processEvents()
+    def frame_rendered(self, node_name, frame, event=None):
+        """Advance the progress bar by one frame and record its telemetry"""
+        if event is not None:
+            self.meters[node_name].add(event.seconds, event.bytes, event.peak_memory_mb)
+            self.batch_meter.add(event.seconds, event.bytes, event.peak_memory_mb)
+            self.trace.record(node_name, frame, event.seconds, event.bytes, event.peak_memory_mb,
+                              **self.write_info[node_name])
+        self.frames_done += 1
+        self.progress_bar.setValue(self.frames_done)
+        self.current_render_label.setText(f"Rendering: {node_name} (frame {frame})")
+        self.remaining_frames[node_name] -= 1
+        if self.remaining_frames[node_name] == 0:
+            self.update_progress(node_name)
+        
+    def update_stats(self):
+        """Show fps, MB/s and ETA for the batch and the Writes that are rendering"""
+        lines = [f"Batch: {self.batch_meter.summary()}"]
+        for node_name, meter in self.meters.items():
+            if meter.frames and meter.remaining:
+                lines.append(f"{node_name}: {meter.summary()}")
+        self.stats_label.setText("\n".join(lines))
         
     def start_render(self):
-        """Start the rendering process"""
+        """Save the script and start the render workers"""
+        if nuke.root().name() == "Root":
+            nuke.message("Please save the script before rendering.")
+            return
+        nuke.scriptSave()
+        
+        resume = self.resume_checkbox.isChecked()
+        check_header = self.header_check_checkbox.isChecked()
+        jobs = []
+        skipped_total = 0
+        for node in self.write_nodes:
+            start = int(node['first'].value())
+            end = int(node['last'].value())
+            if resume:
+                # Only render the frames that are missing or truncated on disk
+                node_jobs, skipped = render_queue.resume_jobs(node.fullName(), nuke.filename(node), start, end, check_header)
+                skipped_total += skipped
+                print(f"Queued {node.name()} frames {start}-{end} ({skipped} already on disk)")
+            else:
+                node_jobs = [(node.fullName(), start, end)]
+                print(f"Queued {node.name()} frames {start}-{end}")
+            jobs.extend(node_jobs)
+            self.remaining_frames[node.fullName()] = sum(job_end - job_start + 1 for _, job_start, job_end in node_jobs)
+            self.meters[node.fullName()] = render_telemetry.ThroughputMeter(self.remaining_frames[node.fullName()])
+            self.write_info[node.fullName()] = get_write_info(node)
+            if not node_jobs:
+                self.update_progress(node.name())
+        self.frames_total = sum(self.remaining_frames.values())
+        self.batch_meter = render_telemetry.ThroughputMeter(self.frames_total)
+        self.trace = render_telemetry.RenderTrace(render_telemetry.trace_path(nuke.root().name()), nuke.root().name())
+        self.progress_bar.setMaximum(max(self.frames_total, 1))
+        if skipped_total:
+            self.info_text.append(f"Resuming: skipping {skipped_total} frames already on disk")
+        if not jobs:
+            self.progress_bar.setValue(1)
+            self.go_button.setEnabled(False)
+            self.go_button.setText("Complete!")
+            self.current_render_label.setText("All frames are already on disk.")
+            return
+        
+        workers, threads = render_queue.worker_layout()
+        # Writes fed by the same upstream nodes render together, so each source frame is read once
+        upstream = {node.fullName(): get_upstream_nodes(node) for node in self.write_nodes}
+        jobs = render_queue.group_jobs(jobs, upstream)
+        for writes, _, _ in jobs:
+            if len(writes) > 1:
+                print(f"Rendering together (shared upstream): {', '.join(writes)}")
+        chunks = render_queue.plan_chunks(jobs, CHUNK_SIZE)
+        # Longest chunks first, from the output sizes and the timings of earlier renders
+        costs = render_queue.frame_costs(self.write_info, render_telemetry.load_trace(self.trace.path))
+        selection_makespan = render_queue.estimate_makespan(chunks, costs, workers)
+        chunks = render_queue.order_chunks(chunks, costs)
+        makespan = render_queue.estimate_makespan(chunks, costs, workers)
+        print(f"Estimated render time {render_telemetry.format_eta(makespan)} "
+              f"(selection order: {render_telemetry.format_eta(selection_makespan)})")
+        self.scheduler = render_queue.RenderScheduler(nuke.EXE_PATH, nuke.root().name(), chunks, workers, threads)
+        
         self.go_button.setEnabled(False)
         self.go_button.setText("Rendering...")
+        self.progress_label.setText(f"Rendering {len(chunks)} chunks on {workers} workers ({threads} threads each)")
+        self.scheduler.start()
+        self.poll_timer.start(POLL_INTERVAL_MS)
         
-        try:
-            # Store original ranges
-            original_ranges = {}
-            
-            for node in self.write_nodes:
-                try:
-                    # Store original range
-                    original_ranges[node] = (int(node['first'].value()), int(node['last'].value()))
-                    
-                    # Execute render
-                    start = int(node['first'].value())
-                    end = int(node['last'].value())
-                    print(f"Rendering {node.name()} frames {start}-{end}")
-                    
-                    self.current_render_label.setText(f"Rendering: {node.name()}")
-                    nuke.execute(node, start, end)
-                    self.update_progress(node.name())
-                    
-                except Exception as e:
-                    nuke.message(f"Error rendering {node.name()}: {str(e)}")
-                    
-        finally:
-            # Restore original ranges
-            for node, (start, end) in original_ranges.items():
-                node['first'].setValue(start)
-                node['last'].setValue(end)
-            
+    def poll_render(self):
+        """Collect worker progress (runs on a timer, never blocks the UI)"""
+        events = self.scheduler.poll()
+        for event in events:
+            if event.kind == 'frame':
+                if event.write in self.remaining_frames:
+                    self.frame_rendered(event.write, event.frame, event)
+            elif event.returncode != 0 and not self.scheduler.stopped:
+                error = (f"Error rendering {', '.join(event.chunk.writes)} frames "
+                         f"{event.chunk.first}-{event.chunk.last}:\n{event.output}")
+                print(error)
+                self.errors.append(error)
+        if events:
+            self.trace.flush()
+            self.update_stats()
+        if self.scheduler.finished:
+            self.render_finished()
+        
+    def render_finished(self):
+        """Stop polling and show the result"""
+        self.poll_timer.stop()
+        self.trace.flush()
+        print(f"Render trace written to {self.trace.path}")
+        if self.errors:
+            self.go_button.setText("Finished with errors")
+            self.current_render_label.setText(f"{len(self.errors)} chunks failed")
+            nuke.message("\n\n".join(self.errors[:5]))
+        else:
             self.go_button.setText("Complete!")
             self.current_render_label.setText("All renders completed!")
+        
+    def closeEvent(self, event):
+        """Kill the workers if the window is closed during a render"""
+        if self.scheduler and not self.scheduler.finished:
+            self.poll_timer.stop()
+            self.scheduler.stop()
+            self.trace.flush()
+        super().closeEvent(event)
+
+def get_upstream_nodes(node):
+    """Full names of all nodes upstream of a node"""
+    upstream = set()
+    stack = [node]
+    while stack:
+        for dependency in stack.pop().dependencies(nuke.INPUTS | nuke.HIDDEN_INPUTS):
+            if dependency.fullName() not in upstream:
+                upstream.add(dependency.fullName())
+                stack.append(dependency)
+    return upstream
+
+def get_write_info(node):
+    """Output size and channel count of a Write, kept with its frames in the render trace"""
+    layer = node['channels'].value()
+    channels = node.channels()
+    if layer == "rgb":
+        channel_count = 3
+    elif layer == "all":
+        channel_count = len(channels)
+    else:
+        channel_count = len([channel for channel in channels if channel.split('.')[0] == layer])
+    return {'width': node.width(), 'height': node.height(), 'channels': channel_count or 4}
 
 def render_write_nodes():
     """Main function to handle Write node rendering."""
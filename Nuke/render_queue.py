@@ -0,0 +1,451 @@
+"""
+Render Queue
+Local parallel render scheduler for BatchRenderWriteNodes.
+
+The saved script is rendered by N long-lived headless worker processes
+(nuke -t render_worker.py <script>) instead of calling nuke.execute serially
+in the GUI session. Each worker opens the script and checks out its licence
+once, then renders one frame chunk after the other: the scheduler keeps the
+chunk queue and writes the next chunk to a worker's stdin as soon as it
+reports the previous one done. The number of workers is sized from the
+machine's cores and RAM, and every worker gets an equal share of the render
+threads.
+
+Workers report every rendered frame and finished chunk on stdout;
+RenderScheduler.poll() hands those to the caller (the render window) without
+blocking, so Nuke stays responsive while the queue runs. A worker that dies
+fails its current chunk and is replaced for the rest of the queue.
+
+Chunks are handed out longest-first, with costs estimated from the output
+size and channel count of each Write and its timings in the render trace, so
+a 4K full-CG Write doesn't start last and hold up the end of the queue.
+
+Writes that share upstream nodes (typically the same plate Read feeding an
+EXR delivery, the dailies and a PNG) and have the same frame range are
+grouped into one job and rendered with nuke.executeMultiple, so every source
+frame is read and processed once for all of them.
+
+Each worker uses a Nuke render licence.
+
+Usage (inside Nuke):
+    jobs = group_jobs([(write.fullName(), first, last) for write in writes], upstream)
+    chunks = plan_chunks(jobs, CHUNK_SIZE)
+    chunks = order_chunks(chunks, frame_costs(write_info, render_telemetry.load_trace(trace_path)))
+    workers, threads = worker_layout()
+    scheduler = RenderScheduler(nuke.EXE_PATH, nuke.root().name(), chunks, workers, threads)
+    scheduler.start()
+    events = scheduler.poll()     # call from a timer
+"""
+
+import os
+import re
+import sys
+import heapq
+import queue
+import threading
+import subprocess
+from collections import deque, namedtuple
+
+WORKER_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "render_worker.py")
+PROGRESS_PREFIX = "MOLOCH_RENDER"
+
+# Frames per chunk, and the resources one worker process needs
+CHUNK_SIZE = 10
+MIN_THREADS_PER_WORKER = 4
+RAM_PER_WORKER_GB = 8
+MAX_WORKERS = 8
+# Most Writes rendered together by one executeMultiple (they share the worker's memory)
+MAX_WRITES_PER_JOB = 4
+
+# Resume: frames smaller than this (or than RESUME_SIZE_RATIO of the median frame) are re-rendered
+MIN_FRAME_BYTES = 1024
+RESUME_SIZE_RATIO = 0.1
+FILE_MAGIC = {
+    '.exr': (b'\x76\x2f\x31\x01',),
+    '.png': (b'\x89PNG',),
+    '.tif': (b'II*\x00', b'MM\x00*'),
+    '.tiff': (b'II*\x00', b'MM\x00*'),
+    '.jpg': (b'\xff\xd8',),
+    '.jpeg': (b'\xff\xd8',),
+    '.dpx': (b'SDPX', b'XPDS'),
+}
+PADDING_PATTERN = re.compile(r'#+|%0?(\d*)d')
+
+# Cost model for Writes without past timings: seconds per frame for one
+# megapixel channel (scaled by the machine's own past renders when there are any)
+DEFAULT_SECONDS_PER_MEGAPIXEL_CHANNEL = 0.15
+# Past timings of a Write are only used while its output size is unchanged
+TRACE_HISTORY_FRAMES = 200
+
+RenderChunk = namedtuple('RenderChunk', ['writes', 'first', 'last'])
+
+# Scheduler events returned by poll():
+#   ('frame', write, frame, seconds, bytes, peak_memory_mb)
+#                                        a frame of write finished (telemetry is None if unknown)
+#   ('chunk', chunk, returncode, output) a chunk finished (returncode 0 = success)
+FrameEvent = namedtuple('FrameEvent', ['kind', 'write', 'frame', 'seconds', 'bytes', 'peak_memory_mb'])
+ChunkEvent = namedtuple('ChunkEvent', ['kind', 'chunk', 'returncode', 'output'])
+
+
+def split_range(first, last, chunk_size=CHUNK_SIZE):
+    """Split first-last into (start, end) chunks of at most chunk_size frames."""
+    return [(start, min(start + chunk_size - 1, last)) for start in range(first, last + 1, chunk_size)]
+
+
+def plan_chunks(jobs, chunk_size=CHUNK_SIZE):
+    """
+    jobs: list of (write name or tuple of write names, first, last).
+    Returns RenderChunks in job order.
+    """
+    chunks = []
+    for writes, first, last in jobs:
+        writes = writes if isinstance(writes, tuple) else (writes,)
+        for start, end in split_range(first, last, chunk_size):
+            chunks.append(RenderChunk(writes, start, end))
+    return chunks
+
+
+def group_jobs(jobs, upstream, max_writes=MAX_WRITES_PER_JOB):
+    """
+    Merge jobs of Writes that share upstream nodes and have the same frame range.
+    jobs: list of (write, first, last); upstream: {write: set of upstream node names}.
+    Returns jobs of (tuple of writes, first, last), in the order of the first Write of each group.
+    """
+    groups = []
+    for write, first, last in jobs:
+        nodes = upstream.get(write, set())
+        for group in groups:
+            if (group['range'] == (first, last) and len(group['writes']) < max_writes
+                    and not group['nodes'].isdisjoint(nodes)):
+                group['writes'].append(write)
+                group['nodes'] |= nodes
+                break
+        else:
+            groups.append({'writes': [write], 'range': (first, last), 'nodes': set(nodes)})
+    return [(tuple(group['writes']),) + group['range'] for group in groups]
+
+
+def _median(values):
+    ordered = sorted(values)
+    return ordered[len(ordered) // 2]
+
+
+def frame_costs(write_info, trace_records=()):
+    """
+    Estimate the render seconds per frame of each Write.
+    write_info: {write: {'width', 'height', 'channels'}}; trace_records: past
+    render_telemetry records. A Write's own timings (its last TRACE_HISTORY_FRAMES
+    frames at the same output size) are used when there are any; other Writes
+    are estimated from pixel count x channels, at the rate the traced Writes
+    rendered at (or DEFAULT_SECONDS_PER_MEGAPIXEL_CHANNEL).
+    """
+    history = {}
+    rates = []
+    for record in trace_records:
+        if record.get('seconds') is None:
+            continue
+        megapixel_channels = record.get('width', 0) * record.get('height', 0) * record.get('channels', 0) / 1e6
+        if megapixel_channels:
+            rates.append(record['seconds'] / megapixel_channels)
+        info = write_info.get(record.get('write'))
+        if info and (record.get('width'), record.get('height')) == (info['width'], info['height']):
+            history.setdefault(record['write'], []).append(record['seconds'])
+    rate = _median(rates) if rates else DEFAULT_SECONDS_PER_MEGAPIXEL_CHANNEL
+
+    costs = {}
+    for write, info in write_info.items():
+        if write in history:
+            costs[write] = _median(history[write][-TRACE_HISTORY_FRAMES:])
+        else:
+            costs[write] = rate * info['width'] * info['height'] * max(info['channels'], 1) / 1e6
+    return costs
+
+
+def chunk_cost(chunk, costs):
+    """Estimated seconds to render a chunk (all of its Writes)."""
+    frames = chunk.last - chunk.first + 1
+    return sum(costs.get(write, 0.0) for write in chunk.writes) * frames
+
+
+def order_chunks(chunks, costs):
+    """Longest chunks first (LPT), so the expensive Writes don't end up as the tail of the queue."""
+    return sorted(chunks, key=lambda chunk: chunk_cost(chunk, costs), reverse=True)
+
+
+def estimate_makespan(chunks, costs, workers):
+    """Seconds until the last worker finishes, if chunks are handed out in this order."""
+    slots = [0.0] * max(workers, 1)
+    for chunk in chunks:
+        heapq.heapreplace(slots, slots[0] + chunk_cost(chunk, costs))
+    return max(slots)
+
+
+def frame_ranges(frames):
+    """Sorted frame numbers -> contiguous (start, end) ranges."""
+    ranges = []
+    for frame in frames:
+        if ranges and frame == ranges[-1][1] + 1:
+            ranges[-1][1] = frame
+        else:
+            ranges.append([frame, frame])
+    return [tuple(frame_range) for frame_range in ranges]
+
+
+def _has_valid_header(path, extension):
+    magic = FILE_MAGIC.get(extension)
+    if not magic:
+        return True
+    try:
+        with open(path, 'rb') as image_file:
+            return image_file.read(4).startswith(magic)
+    except OSError:
+        return False
+
+
+def frames_on_disk(file_pattern, first, last, check_header=False):
+    """
+    Frames of first-last that are already rendered for an output pattern
+    ('/path/name.####.exr' or '/path/name.%04d.exr'), from one directory listing.
+    A frame counts as done if its size is at least MIN_FRAME_BYTES and
+    RESUME_SIZE_RATIO of the median frame size (so truncated frames are
+    rendered again) and, with check_header, its file starts with the magic
+    bytes of its format.
+    """
+    directory, file_name = os.path.split(file_pattern)
+    match = PADDING_PATTERN.search(file_name)
+    if not match:
+        return set()
+    padding = len(match.group(0)) if match.group(0).startswith('#') else int(match.group(1) or 1)
+    head, tail = file_name[:match.start()], file_name[match.end():]
+    frame_pattern = re.compile(re.escape(head) + r'(-?\d+)' + re.escape(tail) + '$')
+
+    sizes = {}
+    try:
+        with os.scandir(directory or '.') as entries:
+            for entry in entries:
+                frame_match = frame_pattern.match(entry.name)
+                if not frame_match or len(frame_match.group(1).lstrip('-')) < padding:
+                    continue
+                frame = int(frame_match.group(1))
+                if first <= frame <= last:
+                    sizes[frame] = (entry.stat().st_size, entry.path)
+    except OSError:
+        return set()
+    if not sizes:
+        return set()
+
+    ordered = sorted(size for size, path in sizes.values())
+    threshold = max(MIN_FRAME_BYTES, ordered[len(ordered) // 2] * RESUME_SIZE_RATIO)
+    extension = os.path.splitext(tail)[1].lower()
+    return {frame for frame, (size, path) in sizes.items()
+            if size >= threshold and (not check_header or _has_valid_header(path, extension))}
+
+
+def resume_jobs(write, file_pattern, first, last, check_header=False):
+    """
+    Jobs (write, start, end) for the frames of first-last that are not on disk yet.
+    Returns (jobs, number of frames skipped).
+    """
+    done = frames_on_disk(file_pattern, first, last, check_header)
+    missing = [frame for frame in range(first, last + 1) if frame not in done]
+    return [(write, start, end) for start, end in frame_ranges(missing)], len(done)
+
+
+def machine_resources():
+    """Return (cpu cores, physical RAM in bytes); RAM is None if it can't be read."""
+    cores = os.cpu_count() or 1
+    try:
+        if sys.platform == "win32":
+            import ctypes
+
+            class MEMORYSTATUSEX(ctypes.Structure):
+                _fields_ = [('dwLength', ctypes.c_ulong), ('dwMemoryLoad', ctypes.c_ulong),
+                            ('ullTotalPhys', ctypes.c_ulonglong), ('ullAvailPhys', ctypes.c_ulonglong),
+                            ('ullTotalPageFile', ctypes.c_ulonglong), ('ullAvailPageFile', ctypes.c_ulonglong),
+                            ('ullTotalVirtual', ctypes.c_ulonglong), ('ullAvailVirtual', ctypes.c_ulonglong),
+                            ('ullAvailExtendedVirtual', ctypes.c_ulonglong)]
+
+            status = MEMORYSTATUSEX()
+            status.dwLength = ctypes.sizeof(MEMORYSTATUSEX)
+            ctypes.windll.kernel32.GlobalMemoryStatusEx(ctypes.byref(status))
+            ram = status.ullTotalPhys
+        else:
+            ram = os.sysconf('SC_PAGE_SIZE') * os.sysconf('SC_PHYS_PAGES')
+    except (AttributeError, ValueError, OSError):
+        ram = None
+    return cores, ram
+
+
+def worker_layout(max_workers=MAX_WORKERS, resources=None):
+    """
+    Return (workers, threads per worker) for this machine: as many workers as
+    the cores (MIN_THREADS_PER_WORKER each) and RAM (RAM_PER_WORKER_GB each) allow.
+    """
+    cores, ram = resources or machine_resources()
+    workers = max(1, cores // MIN_THREADS_PER_WORKER)
+    if ram:
+        workers = min(workers, max(1, int(ram // (RAM_PER_WORKER_GB * 1024 ** 3))))
+    workers = max(1, min(workers, max_workers))
+    return workers, max(1, cores // workers)
+
+
+def worker_env():
+    """Environment for the worker processes: unbuffered output, no display needed."""
+    env = dict(os.environ)
+    env['PYTHONUNBUFFERED'] = "1"
+    if sys.platform.startswith("linux"):
+        env['QT_QPA_PLATFORM'] = "offscreen"
+        env.pop('DISPLAY', None)
+    return env
+
+
+def parse_progress_line(line):
+    """Parse a worker frame progress line; returns a FrameEvent or None."""
+    parts = line.split()
+    if len(parts) < 4 or parts[0] != PROGRESS_PREFIX or parts[1] != "frame":
+        return None
+    telemetry = [None, None, None]
+    for index, value in enumerate(parts[4:7]):
+        try:
+            number = float(value)
+        except ValueError:
+            continue
+        if number >= 0:
+            telemetry[index] = number
+    seconds, output_bytes, peak_memory_mb = telemetry
+    return FrameEvent('frame', parts[2], int(parts[3]), seconds,
+                      int(output_bytes) if output_bytes is not None else None, peak_memory_mb)
+
+
+def parse_chunk_line(line):
+    """Parse a worker 'chunk finished' line; returns its status (0 = success) or None."""
+    parts = line.split()
+    if len(parts) == 3 and parts[0] == PROGRESS_PREFIX and parts[1] == "chunk":
+        return int(parts[2])
+    return None
+
+
+# Worker events used inside the scheduler: a chunk finished, or the process exited
+_WorkerEvent = namedtuple('_WorkerEvent', ['kind', 'process', 'returncode', 'output'])
+
+
+class RenderScheduler(object):
+    """
+    Runs RenderChunks of a saved script on long-lived worker processes.
+    """
+
+    def __init__(self, nuke_exe, script_path, chunks, workers, threads):
+        self.nuke_exe = nuke_exe
+        self.script_path = script_path
+        self.pending = list(chunks)
+        self.workers = workers
+        self.threads = threads
+        # Live worker process -> the chunk it is rendering (None while idle)
+        self.assigned = {}
+        self.processes = []
+        self.events = queue.Queue()
+        self.stopped = False
+
+    @property
+    def finished(self):
+        return not self.pending and not any(self.assigned.values())
+
+    def _command(self):
+        return [self.nuke_exe, "-t", "-m", str(self.threads), WORKER_SCRIPT, self.script_path]
+
+    def _read_output(self, process):
+        output = deque(maxlen=20)
+        for line in process.stdout:
+            event = parse_progress_line(line)
+            if event:
+                self.events.put(event)
+                continue
+            status = parse_chunk_line(line)
+            if status is None:
+                output.append(line)
+            else:
+                self.events.put(_WorkerEvent('done', process, status, "".join(output)))
+                output.clear()
+        process.wait()
+        self.events.put(_WorkerEvent('exit', process, process.returncode, "".join(output)))
+
+    def _send(self, process, line):
+        """Write a command to a worker; a dead worker is reported by its reader thread."""
+        try:
+            process.stdin.write(line + "\n")
+            process.stdin.flush()
+        except (OSError, ValueError):
+            pass
+
+    def _assign(self, process, chunk):
+        self.assigned[process] = chunk
+        self._send(process, f"chunk {chunk.first} {chunk.last} {' '.join(chunk.writes)}")
+
+    def _start_worker(self, chunk):
+        process = subprocess.Popen(
+            self._command(), stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+            universal_newlines=True, env=worker_env(),
+            creationflags=getattr(subprocess, 'CREATE_NO_WINDOW', 0)
+        )
+        self.processes.append(process)
+        # The first chunk waits in the pipe while the worker opens the script
+        self._assign(process, chunk)
+        reader = threading.Thread(target=self._read_output, args=(process,))
+        reader.daemon = True
+        reader.start()
+
+    def _quit(self, process):
+        del self.assigned[process]
+        self._send(process, "quit")
+        try:
+            process.stdin.close()
+        except OSError:
+            pass
+
+    def start(self):
+        """Give idle workers their next chunk, start workers for free slots, and let idle workers quit when the queue is empty."""
+        if self.stopped:
+            return
+        for process, chunk in list(self.assigned.items()):
+            if chunk is None:
+                if self.pending:
+                    self._assign(process, self.pending.pop(0))
+                else:
+                    self._quit(process)
+        while self.pending and len(self.assigned) < self.workers:
+            self._start_worker(self.pending.pop(0))
+
+    def poll(self):
+        """
+        Return the events since the last call and hand new chunks to idle workers.
+        Never blocks.
+        """
+        events = []
+        while True:
+            try:
+                event = self.events.get_nowait()
+            except queue.Empty:
+                break
+            if event.kind == 'frame':
+                events.append(event)
+            elif event.kind == 'done':
+                chunk = self.assigned.get(event.process)
+                if chunk is not None:
+                    self.assigned[event.process] = None
+                    events.append(ChunkEvent('chunk', chunk, event.returncode, event.output))
+            else:
+                # The worker exited; if it was rendering, that chunk failed
+                chunk = self.assigned.pop(event.process, None)
+                if chunk is not None:
+                    events.append(ChunkEvent('chunk', chunk, event.returncode or 1, event.output))
+        self.start()
+        return events
+
+    def stop(self):
+        """Cancel the queue and kill the running workers."""
+        self.stopped = True
+        self.pending = []
+        self.assigned = {}
+        for process in self.processes:
+            if process.poll() is None:
+                process.kill()
@@ -0,0 +1,156 @@
+"""
+Render Telemetry
+Per-frame render timings for BatchRenderWriteNodes.
+
+The render workers time every frame between Nuke's before- and after-frame
+callbacks and report the wall time, the size of the written file and the
+worker's peak memory with the frame's progress line. The render window
+appends those records to a JSON lines trace next to the script and keeps a
+ThroughputMeter per Write and for the whole batch (fps, MB/s, ETA).
+
+A Write with a high MB/s and low seconds per frame is waiting on the file
+server; one with low MB/s and high seconds per frame is compute-bound.
+
+Trace layout (<script dir>/render_traces/<script name>.jsonl, appended per render):
+    {"time": ..., "script": ..., "write": "Write1", "frame": 1001, "seconds": 4.2,
+     "bytes": 31457280, "peak_memory_mb": 5120.0, "width": 3840, "height": 2160, "channels": 4}
+"""
+
+import os
+import json
+import time
+
+TRACE_DIR_NAME = "render_traces"
+
+
+def trace_path(script_path):
+    """The trace file of a saved script."""
+    directory, file_name = os.path.split(script_path)
+    return os.path.join(directory, TRACE_DIR_NAME, f"{os.path.splitext(file_name)[0]}.jsonl")
+
+
+def load_trace(path):
+    """All records of a trace file ([] if there is none yet)."""
+    records = []
+    try:
+        with open(path, 'r', encoding='utf-8') as trace_file:
+            for line in trace_file:
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    # Skip a line cut off by a crash
+                    continue
+    except OSError:
+        return []
+    return records
+
+
+class RenderTrace(object):
+    """
+    Appends per-frame records to a trace file. Records are buffered and
+    written by flush(), so the render window can call it once per poll.
+    """
+
+    def __init__(self, path, script_path=None):
+        self.path = path
+        self.script_path = script_path
+        self.buffer = []
+
+    def record(self, write, frame, seconds, output_bytes, peak_memory_mb, **extra):
+        record = {
+            'time': round(time.time(), 3),
+            'script': self.script_path,
+            'write': write,
+            'frame': frame,
+            'seconds': seconds,
+            'bytes': output_bytes,
+            'peak_memory_mb': peak_memory_mb
+        }
+        record.update(extra)
+        self.buffer.append(record)
+
+    def flush(self):
+        if not self.buffer:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with open(self.path, 'a', encoding='utf-8') as trace_file:
+                for record in self.buffer:
+                    trace_file.write(json.dumps(record) + "\n")
+        except OSError as e:
+            print(f"Could not write render trace {self.path}: {str(e)}")
+        self.buffer = []
+
+
+def format_eta(seconds):
+    """Seconds -> 'h:mm:ss' (or 'm:ss'); '--' if unknown."""
+    if seconds is None:
+        return "--"
+    seconds = int(round(seconds))
+    hours, rest = divmod(seconds, 3600)
+    minutes, seconds = divmod(rest, 60)
+    if hours:
+        return f"{hours}:{minutes:02d}:{seconds:02d}"
+    return f"{minutes}:{seconds:02d}"
+
+
+class ThroughputMeter(object):
+    """
+    Live throughput of a Write (or the batch) over wall-clock time.
+    The clock starts at the first reported frame, backdated by that frame's
+    render time, so a Write that starts late in the queue isn't penalized.
+    """
+
+    def __init__(self, total_frames):
+        self.total_frames = total_frames
+        self.frames = 0
+        self.bytes = 0
+        self.render_seconds = 0.0
+        self.peak_memory_mb = None
+        self.started = None
+        self.updated = None
+
+    def add(self, seconds=None, output_bytes=None, peak_memory_mb=None, now=None):
+        now = now if now is not None else time.time()
+        if self.started is None:
+            self.started = now - (seconds or 0.0)
+        self.updated = now
+        self.frames += 1
+        self.bytes += output_bytes or 0
+        self.render_seconds += seconds or 0.0
+        if peak_memory_mb is not None:
+            self.peak_memory_mb = max(self.peak_memory_mb or 0.0, peak_memory_mb)
+
+    @property
+    def remaining(self):
+        return max(self.total_frames - self.frames, 0)
+
+    def elapsed(self, now=None):
+        if self.started is None:
+            return 0.0
+        end = self.updated if not self.remaining else (now if now is not None else time.time())
+        return max(end - self.started, 1e-6)
+
+    def fps(self, now=None):
+        return self.frames / self.elapsed(now) if self.frames else 0.0
+
+    def mb_per_second(self, now=None):
+        return self.bytes / (1024 ** 2) / self.elapsed(now) if self.frames else 0.0
+
+    def seconds_per_frame(self):
+        """Average render time of one frame in a worker."""
+        return self.render_seconds / self.frames if self.frames else None
+
+    def eta(self, now=None):
+        """Seconds left at the current rate, None before the first frame."""
+        rate = self.fps(now)
+        return self.remaining / rate if rate else None
+
+    def summary(self, now=None):
+        text = (f"{self.frames}/{self.total_frames} frames, {self.fps(now):.2f} fps, "
+                f"{self.mb_per_second(now):.1f} MB/s, ETA {format_eta(self.eta(now) if self.remaining else 0)}")
+        if self.seconds_per_frame() is not None:
+            text += f", {self.seconds_per_frame():.1f} s/frame"
+        if self.peak_memory_mb is not None:
+            text += f", peak {self.peak_memory_mb / 1024:.1f} GB"
+        return text
@@ -0,0 +1,113 @@
+"""
+Render Worker
+Headless worker started by render_queue.RenderScheduler:
+
+    nuke -t -m <threads> render_worker.py <script.nk>
+
+Opens the saved script once, then renders the chunks the scheduler writes to
+stdin, one per line, until it gets "quit" (or stdin closes):
+
+    chunk <first> <last> <write> [<write> ...]
+
+Several Writes in a chunk are rendered together with nuke.executeMultiple.
+Progress goes to stdout, one line per rendered frame and one per chunk
+(status 0 = success):
+
+    MOLOCH_RENDER frame <write> <frame> <seconds> <output bytes> <peak memory MB>
+    MOLOCH_RENDER chunk <status>
+"""
+
+import os
+import sys
+import time
+
+import nuke
+
+PROGRESS_PREFIX = "MOLOCH_RENDER"
+
+# Write -> perf_counter() when its current frame started
+_frame_started = {}
+
+
+def peak_memory_mb():
+    """Peak resident memory of this worker in MB, or -1 if it can't be read."""
+    try:
+        if sys.platform == "win32":
+            import ctypes
+            from ctypes import wintypes
+
+            class PROCESS_MEMORY_COUNTERS(ctypes.Structure):
+                _fields_ = [('cb', wintypes.DWORD), ('PageFaultCount', wintypes.DWORD),
+                            ('PeakWorkingSetSize', ctypes.c_size_t), ('WorkingSetSize', ctypes.c_size_t),
+                            ('QuotaPeakPagedPoolUsage', ctypes.c_size_t), ('QuotaPagedPoolUsage', ctypes.c_size_t),
+                            ('QuotaPeakNonPagedPoolUsage', ctypes.c_size_t), ('QuotaNonPagedPoolUsage', ctypes.c_size_t),
+                            ('PagefileUsage', ctypes.c_size_t), ('PeakPagefileUsage', ctypes.c_size_t)]
+
+            counters = PROCESS_MEMORY_COUNTERS()
+            counters.cb = ctypes.sizeof(PROCESS_MEMORY_COUNTERS)
+            ctypes.windll.psapi.GetProcessMemoryInfo(ctypes.windll.kernel32.GetCurrentProcess(),
+                                                     ctypes.byref(counters), counters.cb)
+            return counters.PeakWorkingSetSize / 1024 ** 2
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss is in bytes on macOS and in KB elsewhere
+        return peak / 1024 ** 2 if sys.platform == "darwin" else peak / 1024
+    except (ImportError, AttributeError, OSError):
+        return -1
+
+
+def start_frame():
+    """Before-frame callback: start the frame's clock."""
+    _frame_started[nuke.thisNode().fullName()] = time.perf_counter()
+
+
+def report_frame():
+    """After-frame callback: tell the scheduler which Write finished which frame, and what it cost."""
+    node = nuke.thisNode()
+    started = _frame_started.pop(node.fullName(), None)
+    seconds = time.perf_counter() - started if started is not None else -1
+    try:
+        output_bytes = os.path.getsize(nuke.filename(node, nuke.REPLACE))
+    except (OSError, TypeError):
+        output_bytes = -1
+    print(f"{PROGRESS_PREFIX} frame {node.fullName()} {int(nuke.frame())} "
+          f"{seconds:.3f} {output_bytes} {peak_memory_mb():.1f}", flush=True)
+
+
+def render_chunk(script_path, first, last, write_names):
+    """Render first-last of the Write nodes; returns True on success."""
+    write_nodes = [nuke.toNode(name) for name in write_names]
+    missing = [name for name, node in zip(write_names, write_nodes) if node is None]
+    if missing:
+        print(f"Write nodes not found in {script_path}: {', '.join(missing)}", flush=True)
+        return False
+    try:
+        if len(write_nodes) > 1:
+            # Writes that share upstream nodes: every upstream frame is computed once for all of them
+            nuke.executeMultiple(write_nodes, ((first, last, 1),))
+        else:
+            nuke.execute(write_nodes[0], first, last)
+    except Exception as e:
+        print(f"Error rendering {', '.join(write_names)} frames {first}-{last}: {str(e)}", flush=True)
+        return False
+    return True
+
+
+def main():
+    script_path = sys.argv[1]
+    nuke.scriptOpen(script_path)
+    nuke.addBeforeFrameRender(start_frame, nodeClass='Write')
+    nuke.addAfterFrameRender(report_frame, nodeClass='Write')
+
+    for line in sys.stdin:
+        parts = line.split()
+        if not parts:
+            continue
+        if parts[0] == "quit":
+            break
+        if parts[0] == "chunk" and len(parts) >= 4:
+            success = render_chunk(script_path, int(parts[1]), int(parts[2]), parts[3:])
+            print(f"{PROGRESS_PREFIX} chunk {0 if success else 1}", flush=True)
+
+if __name__ == "__main__":
+    main()